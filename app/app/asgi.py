@@ -2,6 +2,8 @@
 ASGI config for app project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Besides the Django views it serves the price push streams, see
+``market.stream``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
@@ -13,4 +15,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from market.stream import PriceStreamRouter  # noqa: E402
+
+application = PriceStreamRouter(django_application)
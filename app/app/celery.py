@@ -11,7 +11,7 @@ from celery import Celery
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 # you can change the name here
-app = Celery("app", broker='redis://redis:6379/0')
+app = Celery("app")
 
 # read config from Django settings, the CELERY namespace would make celery
 # config keys has `CELERY` prefix
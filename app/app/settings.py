@@ -14,8 +14,6 @@ from datetime import timedelta
 import os
 from pathlib import Path
 
-import app.tasks
-
 from celery.schedules import crontab
 
 
@@ -50,6 +48,7 @@ INSTALLED_APPS = [
     'drf_spectacular',
     'user',
     'order',
+    'market',
 ]
 
 MIDDLEWARE = [
@@ -115,6 +114,28 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# https://docs.djangoproject.com/en/3.2/topics/auth/passwords/
+
+# Hasher of new passwords: argon2, bcrypt or pbkdf2. Passwords hashed by
+# any of the others are still accepted and rehashed on the next login.
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'argon2')
+
+_PASSWORD_HASHERS = {
+    'argon2': 'user.hashers.Argon2PasswordHasher',
+    'bcrypt': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [
+    _PASSWORD_HASHERS.pop(PASSWORD_HASHER),
+    *_PASSWORD_HASHERS.values(),
+]
+
+# Argon2id costs, the OWASP recommended minimum: tens of ms per login.
+ARGON2_TIME_COST = int(os.environ.get('ARGON2_TIME_COST', 2))
+ARGON2_MEMORY_COST = int(os.environ.get('ARGON2_MEMORY_COST', 19456))
+ARGON2_PARALLELISM = int(os.environ.get('ARGON2_PARALLELISM', 1))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
@@ -144,15 +165,108 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Render fixed-point prices as JSON numbers, as they were as floats.
+    'COERCE_DECIMAL_TO_STRING': False,
+    # Reverse proxies in front of the app. Client IPs (login throttling)
+    # are read from X-Forwarded-For only behind this many trusted hops,
+    # REMOTE_ADDR otherwise, so clients cannot spoof them.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+}
+
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://redis:6379/0')
+REDIS_SOCKET_TIMEOUT = 2
+
+# Token -> user lookups are cached in Redis and in a bounded per process
+# LRU. Other processes may serve a revoked token from their LRU for up to
+# AUTH_TOKEN_LOCAL_TTL seconds.
+AUTH_TOKEN_CACHE_TTL = 300
+AUTH_TOKEN_LOCAL_TTL = 5
+AUTH_TOKEN_LOCAL_SIZE = 10000
+
+# Login token buckets: (burst capacity, tokens refilled per second).
+LOGIN_RATE_LIMIT_IP = (30, 0.5)
+LOGIN_RATE_LIMIT_EMAIL = (5, 0.1)
+
+# Market data API client: (connect, read) timeouts in seconds, retries
+# with exponential backoff capped at MARKET_DATA_MAX_BACKOFF, a token
+# bucket (burst capacity, requests per second) under the exchange's
+# public limit, and a circuit breaker opening after (consecutive
+# failures) for (seconds).
+MARKET_DATA_TIMEOUT = (3.05, 10)
+MARKET_DATA_RETRIES = 3
+MARKET_DATA_BACKOFF = 0.5
+MARKET_DATA_MAX_BACKOFF = 8
+MARKET_DATA_RATE_LIMIT = (15, 10)
+# The exchange limits requests per IP: the token bucket is kept in Redis
+# under this key, shared by every process. Hosts calling the API from
+# different addresses can set one key each.
+MARKET_DATA_RATE_LIMIT_KEY = os.environ.get(
+    'MARKET_DATA_RATE_LIMIT_KEY', 'ratelimit:marketdata',
+)
+MARKET_DATA_BREAKER = (5, 30)
+MARKET_DATA_POOL_SIZE = 32
+
+# Where tickers and candles come from: 'coinbase' (live API) or 'replay'
+# (a recorded gzip NDJSON or Parquet file played back SPEED times faster
+# than real time, e.g. for offline load tests).
+MARKET_DATA_PROVIDER = os.environ.get('MARKET_DATA_PROVIDER', 'coinbase')
+MARKET_DATA_REPLAY_PATH = os.environ.get('MARKET_DATA_REPLAY_PATH')
+MARKET_DATA_REPLAY_SPEED = float(
+    os.environ.get('MARKET_DATA_REPLAY_SPEED', 1)
+)
+
+# Range-partition the Crypto table by month (PostgreSQL only). Applied by
+# the core migrations, so set it before running migrate.
+CRYPTO_PARTITIONING = os.environ.get('CRYPTO_PARTITIONING') == 'true'
+
+# Seconds a process serves symbols from its registry cache before
+# checking the change counter in Redis.
+SYMBOL_CACHE_TTL = 5
+
+# Seconds between full rebuilds of the in-memory SL/TP trigger index.
+ORDER_INDEX_REFRESH = 60
+
+# Processes a backtest parameter sweep is fanned out across.
+BACKTEST_WORKERS = int(
+    os.environ.get('BACKTEST_WORKERS', os.cpu_count() or 1)
+)
+
+# Active symbols polled per ingestion task.
+INGESTION_SHARD_SIZE = int(os.environ.get('INGESTION_SHARD_SIZE', 10))
+
+# Seconds between beat ticks of the ticker and candle polls. Each tick
+# polls a symbol at most once; a run still going when the next one
+# starts holds a lock on its symbol for at most POLL_LOCK_TTL seconds.
+POLL_TICKERS_EVERY = 15.0
+POLL_CANDLES_EVERY = 60.0
+POLL_LOCK_TTL = 120
+
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER', REDIS_URL)
+# Chords collect the results of every ingestion shard here.
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_BACKEND', REDIS_URL)
+CELERY_RESULT_EXPIRES = 3600
+
+CELERY_IMPORTS = ['app.tasks']
+
+# Ingestion, order evaluation and analytics each get their own queue so
+# they can be scaled separately (celery worker -Q <queue>).
+CELERY_TASK_ROUTES = {
+    'app.tasks.*': {'queue': 'ingestion'},
+    'order.tasks.*': {'queue': 'evaluation'},
+    'market.tasks.*': {'queue': 'analytics'},
 }
 
 CELERY_BEAT_SCHEDULE = {
-    "get_intra_minute_data": {
-        "task": "app.tasks.get_intra_minute_data",
-        "schedule": 15.0,
+    "poll_intra_minute_data": {
+        "task": "app.tasks.poll_intra_minute_data",
+        "schedule": POLL_TICKERS_EVERY,
+    },
+    "poll_minute_data": {
+        "task": "app.tasks.poll_minute_data",
+        "schedule": POLL_CANDLES_EVERY,
+    },
+    "create_upcoming_partitions": {
+        "task": "app.tasks.create_upcoming_partitions",
+        "schedule": crontab(minute=0, hour=0),
     },
-    "get_minute_data": {
-        "task": "app.tasks.get_minute_data",
-        "schedule": 60.0,
-    }
 }
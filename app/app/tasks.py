@@ -1,71 +1,316 @@
-from celery import shared_task
+from celery import chord, group, shared_task
 from celery.utils.log import get_task_logger
+from django.conf import settings
 
+import redis
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from itertools import chain
+import pytz
+import time
 
+from core.ingest import (
+    chunked,
+    parse_candles,
+    parse_ticker,
+    upsert_candles,
+    upsert_tickers,
+)
+from core.locks import claim, count, guarded, mark_polled
+from core.partitions import create_crypto_partitions, is_partitioned
+from core.providers import get_provider
+from core.symbols import active_symbols
+from market.prices import set_prices
+from market.tasks import refresh_rollups
+from order.tasks import evaluate_orders
 
-SYMBOLS = ['ETH-USD', 'BTC-USD', 'AVAX-USD']
-COINBASE_URL = 'https://api.pro.coinbase.com/'
+
+REQUEST_TIMEOUT = 5
+MAX_WORKERS = 32
+# Finished candles fetched by each minute poll. The one before the last
+# may have been stored while still in progress; fetching it again
+# overwrites it with its final values.
+CANDLES_PER_POLL = 2
 
 
 logger = get_task_logger(__name__)
 
 
-def get_data_from_api(symbols=SYMBOLS):
+def _fetch(fetch, symbol, *args):
     """
-    Generates API call to gather real-time symbol data.
+    Fetch one provider payload for a symbol.
+    Return (json, status code), or (None, None) if the request failed.
     """
-    for symbol in symbols:
-        data = requests.get(
-            f'{COINBASE_URL}products/{symbol}/ticker',
-            headers={"content-type": "application/json"}
-        )
-        logger.info(
-            f"symbol: {symbol} | {data.json()}"
-        )
+    try:
+        payload, status = fetch(symbol, *args, timeout=REQUEST_TIMEOUT)
+    except (requests.RequestException, ValueError) as exc:
+        logger.error(f"symbol: {symbol} | request failed: {exc}")
+        return None, None
+
+    logger.info(
+        f"symbol: {symbol} | {payload}"
+    )
+    return payload, status
+
 
-        return data.json(), data.status_code
+def fetch_concurrently(symbols, fetch, *args):
+    """
+    Call the provider method fetch for every symbol at once (default:
+    the active ones), return {symbol: result}.
+    """
+    symbols = active_symbols() if symbols is None else list(symbols)
+    if not symbols:
+        return {}
+
+    workers = min(len(symbols), MAX_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(lambda s: _fetch(fetch, s, *args), symbols)
+        return dict(zip(symbols, results))
+
+
+def get_data_from_api(symbols=None):
+    """
+    Generates API calls to gather real-time data for every symbol.
+    Returns a {symbol: (json, status code)} mapping.
+    """
+    return fetch_concurrently(symbols, get_provider().ticker)
 
 
 def get_data_from_api_lastmin(
-    symbols=SYMBOLS,
-    end_datetime=datetime.now(),
+    symbols=None,
+    end_datetime=None,
     granularity=60
 ):
     """
-    Generates API call to gather symbol data from end datetime,
-    x nummber of days window.
+    Generates API calls to gather every symbol's last CANDLES_PER_POLL
+    finished candles before end datetime (default: now), rounded down
+    to a whole candle so the one in progress is left out.
     Granularity defines if records are daily, monthly, hourly, etc.
     (default: seconds).
+    Returns a {symbol: (json, status code)} mapping.
+    """
+    if end_datetime is None:
+        end_datetime = datetime.now(pytz.UTC)
+    end = int(end_datetime.timestamp()) // granularity * granularity
+    end_datetime = datetime.fromtimestamp(end, pytz.UTC)
+    start_datetime = end_datetime - timedelta(
+        seconds=CANDLES_PER_POLL * granularity,
+    )
+
+    return fetch_concurrently(
+        symbols,
+        get_provider().candles,
+        start_datetime,
+        end_datetime,
+        granularity,
+    )
+
+
+def _successful(results):
+    """Yield (symbol, json) for every result the API answered with 200."""
+    for symbol, (data, status) in results.items():
+        if status == 200:
+            yield symbol, data
+        else:
+            logger.warning(f"symbol: {symbol} | skipped, status {status}")
+
+
+def _late(task, dispatched_at, interval):
+    """
+    Count and return whether task starts a whole interval after it was
+    dispatched, e.g. behind a backlog in its queue.
     """
-    delta = timedelta(minutes=1)
-    start_datetime = end_datetime - delta
+    delay = time.time() - dispatched_at
+    if delay < interval:
+        return False
 
-    parameters = {
-        'start': start_datetime.isoformat(),
-        'end': end_datetime.isoformat(),
-        'granularity': str(granularity),
+    count(task, 'late')
+    logger.warning(f"{task} | started {delay:.1f}s after dispatch")
+    return True
+
+
+def _first_tick(task, window, interval):
+    """Return whether this is the first beat tick of task for window."""
+    try:
+        if claim(f'{task}:{window}', 2 * int(interval)):
+            return True
+    except redis.RedisError as exc:
+        logger.error(f"{task} tick dedup unavailable: {exc}")
+        return True
+
+    count(task, 'duplicate')
+    logger.warning(f"{task} | window {window} already dispatched")
+    return False
+
+
+def store_tickers(symbols=None):
+    """
+    Poll the latest ticker of every symbol, store and cache it.
+    Return (rows stored, symbols polled successfully).
+    """
+    results = get_data_from_api(symbols)
+    tickers = [
+        parse_ticker(symbol, data)
+        for symbol, data in _successful(results)
+    ]
+    # Ticks older than the stored ones must not roll the cache, the
+    # stream or order evaluation back to a stale price.
+    stored = upsert_tickers(tickers)
+
+    try:
+        set_prices(stored)
+    except redis.RedisError as exc:
+        logger.error(f"price cache update failed: {exc}")
+
+    if stored:
+        evaluate_orders.delay({t.symbol: t.price for t in stored})
+
+    return len(stored), [t.symbol for t in tickers]
+
+
+def store_candles(symbols=None, end=None):
+    """
+    Poll the last finished minute candles of every symbol before end
+    (unix seconds, default: now) and store them, overwriting any stored
+    while still in progress. Return what was written as
+    {'stored', 'symbols', 'start', 'end'} for refresh_rollups.
+    """
+    end_datetime = None if end is None \
+        else datetime.fromtimestamp(end, pytz.UTC)
+    results = get_data_from_api_lastmin(symbols, end_datetime)
+    candles = list(chain.from_iterable(
+        parse_candles(symbol, data)
+        for symbol, data in _successful(results)
+    ))
+    stored = upsert_candles(candles)
+
+    times = [c.date_and_time.timestamp() for c in candles]
+    return {
+        'stored': stored,
+        'symbols': sorted({c.symbol for c in candles}),
+        'start': min(times, default=None),
+        'end': max(times, default=None),
     }
 
-    for symbol in symbols:
-        data = requests.get(
-            f'{COINBASE_URL}products/{symbol}/candles',
-            params=parameters,
-            headers={"content-type": "application/json"}
-        )
-        logger.info(
-            f"symbol: {symbol} | {data.json()}"
-        )
 
-        return data.json(), data.status_code
+@shared_task
+def get_intra_minute_data(symbols=None, window=None, dispatched_at=None):
+    """
+    Poll and store the tickers of symbols (default: the active ones).
+    Dispatched for a beat window, symbols already polled for it or
+    still being polled are skipped, and so is the whole run once it
+    starts an interval after dispatched_at: its tickers would be stale.
+    """
+    if window is None:
+        return store_tickers(symbols)[0]
+
+    task = 'get_intra_minute_data'
+    interval = settings.POLL_TICKERS_EVERY
+    if dispatched_at is not None and _late(task, dispatched_at, interval):
+        return 0
+
+    symbols = active_symbols() if symbols is None else symbols
+    with guarded(task, symbols, window) as free:
+        stored, polled = store_tickers(free)
+        mark_polled(task, polled, window, 2 * int(interval))
+
+    return stored
+
+
+@shared_task
+def get_minute_data(symbols=None, end=None, window=None):
+    """
+    Poll and store the last finished minute candles of symbols before
+    end (see store_candles). Dispatched for a beat window, symbols
+    already polled for it or still being polled are skipped. Late runs
+    still poll: the minutes they cover are fixed by end.
+    """
+    if window is None:
+        return store_candles(symbols, end)
+
+    task = 'get_minute_data'
+    interval = settings.POLL_CANDLES_EVERY
+    if end is not None:
+        _late(task, end, interval)
+
+    symbols = active_symbols() if symbols is None else symbols
+    with guarded(task, symbols, window) as free:
+        result = store_candles(free, end)
+        mark_polled(task, result['symbols'], window, 2 * int(interval))
+
+    return result
+
+
+def shards(symbols=None):
+    """Split symbols (default: the active ones) into ingestion shards."""
+    symbols = active_symbols() if symbols is None else symbols
+    return list(chunked(sorted(symbols), settings.INGESTION_SHARD_SIZE))
+
+
+@shared_task
+def intra_minute_data_done(results):
+    """Total the tickers stored by every shard."""
+    stored = sum(results)
+    logger.info(f"stored {stored} ticker(s) from {len(results)} shard(s)")
+
+    return stored
+
+
+@shared_task
+def poll_intra_minute_data():
+    """
+    Poll the tickers of the active symbols with one task per shard, so
+    a slow symbol only delays its own shard. Repeated beat ticks within
+    one POLL_TICKERS_EVERY window dispatch nothing.
+    """
+    now = time.time()
+    window = int(now // settings.POLL_TICKERS_EVERY)
+    if not _first_tick(
+        'poll_intra_minute_data', window, settings.POLL_TICKERS_EVERY,
+    ):
+        return
+
+    header = group(
+        get_intra_minute_data.s(shard, window, now) for shard in shards()
+    )
+    if header.tasks:
+        chord(header)(intra_minute_data_done.s())
 
 
 @shared_task
-def get_intra_minute_data(symbols=SYMBOLS):
-    get_data_from_api(symbols)
+def poll_minute_data():
+    """
+    Poll the last finished minute candles of the active symbols with one
+    task per shard, then refresh the rollups they touched in one analytics
+    task once every shard is done. Repeated beat ticks within one
+    POLL_CANDLES_EVERY window dispatch nothing.
+    """
+    end = time.time()
+    window = int(end // settings.POLL_CANDLES_EVERY)
+    if not _first_tick(
+        'poll_minute_data', window, settings.POLL_CANDLES_EVERY,
+    ):
+        return
+
+    header = group(
+        get_minute_data.s(shard, end, window) for shard in shards()
+    )
+    if header.tasks:
+        chord(header)(refresh_rollups.s())
 
 
 @shared_task
-def get_minute_data(symbols=SYMBOLS):
-    get_data_from_api_lastmin(symbols)
+def create_upcoming_partitions():
+    """
+    Create the Crypto partitions of the coming months, if partitioned,
+    before candles for them would land in the default partition.
+    """
+    if not is_partitioned():
+        return []
+
+    created = create_crypto_partitions()
+    for name in created:
+        logger.info(f"created partition {name}")
+
+    return created
@@ -1,9 +1,22 @@
 """
 Tests for Celery Tasks functions.
 """
-from django.test import SimpleTestCase
+import threading
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+import pytz
+import redis
+import requests
 
 from app import tasks
+from app.celery import app
+from core.locks import acquire_lock, task_metrics
+from core.models import Crypto, Ticker
+from core.tests.fakes import FakeRedis
 
 
 SYMBOLS_VALID = ['BTC-USD', ]
@@ -17,27 +30,363 @@ class TasksTest(SimpleTestCase):
     def test_get_data_from_api_ok(self):
         """Test the response of the API ticker endpoint is OK."""
 
-        res, status = tasks.get_data_from_api(SYMBOLS_VALID)
+        res, status = tasks.get_data_from_api(SYMBOLS_VALID)['BTC-USD']
 
         self.assertEqual(status, 200)
 
     def test_get_data_from_api_error(self):
         """Test the response of the API ticker endpoint fails."""
 
-        res, status = tasks.get_data_from_api(SYMBOLS_NOT_VALID)
+        res, status = tasks.get_data_from_api(SYMBOLS_NOT_VALID)['ASDASD']
 
         self.assertEqual(status, 404)
 
     def test_get_data_from_api_lastmin_ok(self):
         """Test the response of the API for last minute data is OK."""
 
-        res, status = tasks.get_data_from_api_lastmin(SYMBOLS_VALID)
+        res, status = tasks.get_data_from_api_lastmin(
+            SYMBOLS_VALID
+        )['BTC-USD']
 
         self.assertEqual(status, 200)
 
     def test_get_data_from_api_lastmin_error(self):
         """Test the response of the API for last minute data fails."""
 
-        res, status = tasks.get_data_from_api_lastmin(SYMBOLS_NOT_VALID)
+        res, status = tasks.get_data_from_api_lastmin(
+            SYMBOLS_NOT_VALID
+        )['ASDASD']
 
         self.assertEqual(status, 404)
+
+
+@patch('core.providers.get_client')
+class ConcurrentPollingTests(SimpleTestCase):
+    """Test symbols are polled concurrently over the shared client."""
+
+    def test_every_symbol_fetched_in_parallel(self, patched_client):
+        """Test all symbols are requested at the same time."""
+        symbols = ['ETH-USD', 'BTC-USD', 'AVAX-USD']
+        barrier = threading.Barrier(len(symbols), timeout=5)
+
+        def fake_get(path, params=None, timeout=None):
+            barrier.wait()
+            res = MagicMock(status_code=200)
+            res.json.return_value = {'price': '1.0', 'path': path}
+            return res
+
+        patched_client.return_value.get.side_effect = fake_get
+
+        results = tasks.get_data_from_api(symbols)
+
+        self.assertEqual(list(results), symbols)
+        for symbol in symbols:
+            data, status = results[symbol]
+            self.assertEqual(status, 200)
+            self.assertIn(symbol, data['path'])
+        for call in patched_client.return_value.get.call_args_list:
+            self.assertEqual(call.kwargs['timeout'], tasks.REQUEST_TIMEOUT)
+
+    def test_failed_symbol_does_not_block_others(self, patched_client):
+        """Test a timed out symbol is reported without losing the rest."""
+        def fake_get(path, params=None, timeout=None):
+            if 'ETH-USD' in path:
+                raise requests.Timeout('timed out')
+            res = MagicMock(status_code=200)
+            res.json.return_value = []
+            return res
+
+        patched_client.return_value.get.side_effect = fake_get
+
+        results = tasks.get_data_from_api_lastmin(['ETH-USD', 'BTC-USD'])
+
+        self.assertEqual(results['ETH-USD'], (None, None))
+        self.assertEqual(results['BTC-USD'], ([], 200))
+
+    @patch('app.tasks.get_provider')
+    def test_last_finished_minutes_fetched(
+        self, patched_provider, patched_client,
+    ):
+        """Test the candle window is aligned to whole finished minutes."""
+        candles = patched_provider.return_value.candles
+        candles.return_value = ([], 200)
+
+        tasks.get_data_from_api_lastmin(
+            ['BTC-USD'], datetime(2023, 1, 24, 18, 0, 42, tzinfo=pytz.UTC),
+        )
+
+        symbol, start, end, granularity = candles.call_args.args
+        self.assertEqual(
+            start, datetime(2023, 1, 24, 17, 58, tzinfo=pytz.UTC),
+        )
+        self.assertEqual(end, datetime(2023, 1, 24, 18, 0, tzinfo=pytz.UTC))
+
+
+@patch('app.tasks.evaluate_orders')
+class PersistTasksTests(TestCase):
+    """Test polled data is stored by the Celery tasks."""
+
+    @patch('app.tasks.set_prices')
+    @patch('app.tasks.get_data_from_api')
+    def test_intra_minute_data_upserts_tickers(
+        self, patched_api, patched_set_prices, patched_evaluate
+    ):
+        """Test the latest ticker per symbol is stored and overwritten."""
+        tick = {
+            'trade_id': 1,
+            'price': '21000.5',
+            'bid': '21000.1',
+            'ask': '21000.9',
+            'volume': '1234.5',
+            'time': '2023-01-24T17:59:12.123456Z',
+        }
+        patched_api.return_value = {
+            'BTC-USD': (tick, 200),
+            'ASDASD': ({'message': 'NotFound'}, 404),
+        }
+        tasks.get_intra_minute_data(['BTC-USD', 'ASDASD'])
+
+        patched_api.return_value = {
+            'BTC-USD': (dict(tick, trade_id=2, price='21001.0'), 200),
+        }
+        tasks.get_intra_minute_data(['BTC-USD'])
+
+        self.assertEqual(Ticker.objects.count(), 1)
+        ticker = Ticker.objects.get(symbol='BTC-USD')
+        self.assertEqual(ticker.price, 21001.0)
+        self.assertEqual(ticker.trade_id, 2)
+        self.assertEqual(ticker.bid, Decimal('21000.1'))
+        cached = patched_set_prices.call_args.args[0]
+        self.assertEqual([t.price for t in cached], [21001.0])
+        patched_evaluate.delay.assert_called_with({'BTC-USD': 21001.0})
+
+    @patch('app.tasks.set_prices')
+    @patch('app.tasks.get_data_from_api')
+    def test_older_ticker_not_stored(
+        self, patched_api, patched_set_prices, patched_evaluate
+    ):
+        """Test a delayed tick does not overwrite a newer one."""
+        patched_api.return_value = {
+            'BTC-USD': ({'price': '2.0', 'time': '2023-01-24T17:59:12Z'}, 200),
+        }
+        tasks.get_intra_minute_data(['BTC-USD'])
+        patched_api.return_value = {
+            'BTC-USD': ({'price': '1.0', 'time': '2023-01-24T17:59:11Z'}, 200),
+        }
+
+        patched_set_prices.reset_mock()
+        patched_evaluate.reset_mock()
+
+        stored = tasks.get_intra_minute_data(['BTC-USD'])
+
+        self.assertEqual(stored, 0)
+        self.assertEqual(Ticker.objects.get(symbol='BTC-USD').price, 2.0)
+        patched_set_prices.assert_called_once_with([])
+        patched_evaluate.delay.assert_not_called()
+
+    @patch('app.tasks.set_prices')
+    @patch('app.tasks.get_data_from_api')
+    def test_intra_minute_data_survives_cache_outage(
+        self, patched_api, patched_set_prices, patched_evaluate
+    ):
+        """Test tickers are still stored when Redis is unreachable."""
+        patched_api.return_value = {
+            'BTC-USD': ({'price': '1.5', 'time': '2023-01-24T17:59:12Z'}, 200),
+        }
+        patched_set_prices.side_effect = redis.ConnectionError
+
+        stored = tasks.get_intra_minute_data(['BTC-USD'])
+
+        self.assertEqual(stored, 1)
+        self.assertTrue(Ticker.objects.filter(symbol='BTC-USD').exists())
+
+    @patch('app.tasks.get_data_from_api_lastmin')
+    def test_minute_data_upserts_candles(self, patched_api, patched_evaluate):
+        """Test minute candles of every symbol are stored once."""
+        candle = [1674583140, 1.0, 2.0, 1.5, 1.7, 10.0]
+        patched_api.return_value = {
+            'BTC-USD': ([candle], 200),
+            'ETH-USD': ([candle], 200),
+            'AVAX-USD': (None, None),
+        }
+
+        tasks.get_minute_data()
+        tasks.get_minute_data()
+
+        self.assertEqual(Crypto.objects.count(), 2)
+
+        result = tasks.get_minute_data(['BTC-USD', 'ETH-USD'], 1674583200.0)
+
+        self.assertEqual(result, {
+            'stored': 2,
+            'symbols': ['BTC-USD', 'ETH-USD'],
+            'start': 1674583140.0,
+            'end': 1674583140.0,
+        })
+        end = patched_api.call_args.args[1]
+        self.assertEqual(end.timestamp(), 1674583200.0)
+
+
+@override_settings(INGESTION_SHARD_SIZE=2)
+@patch('app.tasks.chord')
+@patch(
+    'app.tasks.active_symbols',
+    return_value=['ETH-USD', 'BTC-USD', 'AVAX-USD'],
+)
+class FanOutTests(SimpleTestCase):
+    """Test polling is fanned out to one task per symbol shard."""
+
+    def setUp(self):
+        patcher = patch('core.locks.get_redis', return_value=FakeRedis())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_tickers_polled_per_shard(self, patched_symbols, patched_chord):
+        """Test each shard polls its own tickers in a chord."""
+        tasks.poll_intra_minute_data()
+
+        header = patched_chord.call_args.args[0]
+        self.assertEqual(
+            [sig.args[0] for sig in header.tasks],
+            [['AVAX-USD', 'BTC-USD'], ['ETH-USD']],
+        )
+        body = patched_chord.return_value.call_args.args[0]
+        self.assertEqual(body.task, 'app.tasks.intra_minute_data_done')
+
+    def test_candles_aggregated_into_rollups(
+        self, patched_symbols, patched_chord
+    ):
+        """Test shards share one window and one rollup refresh."""
+        tasks.poll_minute_data()
+
+        header = patched_chord.call_args.args[0]
+        shards = [sig.args[0] for sig in header.tasks]
+        ends = {sig.args[1] for sig in header.tasks}
+        self.assertEqual(shards, [['AVAX-USD', 'BTC-USD'], ['ETH-USD']])
+        self.assertEqual(len(ends), 1)
+        body = patched_chord.return_value.call_args.args[0]
+        self.assertEqual(body.task, 'market.tasks.refresh_rollups')
+
+    def test_no_active_symbols(self, patched_symbols, patched_chord):
+        """Test nothing is sent when no symbol is active."""
+        patched_symbols.return_value = []
+
+        tasks.poll_minute_data()
+
+        patched_chord.assert_not_called()
+
+    def test_repeated_beat_tick_dispatched_once(
+        self, patched_symbols, patched_chord
+    ):
+        """Test a second tick within the same window sends nothing."""
+        with patch('app.tasks.time.time', return_value=600.0):
+            tasks.poll_minute_data()
+        with patch('app.tasks.time.time', return_value=659.0):
+            tasks.poll_minute_data()
+
+        self.assertEqual(patched_chord.call_count, 1)
+        self.assertEqual(
+            task_metrics(), {'poll_minute_data.duplicate': 1},
+        )
+
+
+class TaskRoutingTests(SimpleTestCase):
+    """Test tasks are routed to their dedicated queues."""
+
+    def test_queues(self):
+        """Test ingestion, evaluation and analytics queues."""
+        router = app.amqp.router
+        for task, queue in [
+            ('app.tasks.get_intra_minute_data', 'ingestion'),
+            ('app.tasks.poll_minute_data', 'ingestion'),
+            ('order.tasks.evaluate_orders', 'evaluation'),
+            ('market.tasks.refresh_rollups', 'analytics'),
+        ]:
+            self.assertEqual(router.route({}, task)['queue'].name, queue)
+
+
+@patch('app.tasks.time.time', return_value=150.0)
+@patch(
+    'app.tasks.store_tickers',
+    side_effect=lambda symbols: (len(symbols), symbols),
+)
+class OverlapTests(SimpleTestCase):
+    """Test overlapping and repeated shard runs poll each symbol once."""
+
+    def setUp(self):
+        patcher = patch('core.locks.get_redis', return_value=FakeRedis())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_window_polled_once(self, patched_store, patched_time):
+        """Test a redelivered shard skips the symbols already polled."""
+        tasks.get_intra_minute_data(['BTC-USD', 'ETH-USD'], 10)
+        tasks.get_intra_minute_data(['BTC-USD', 'ETH-USD'], 10)
+        tasks.get_intra_minute_data(['BTC-USD', 'ETH-USD'], 11)
+
+        self.assertEqual(
+            [call.args[0] for call in patched_store.call_args_list],
+            [['BTC-USD', 'ETH-USD'], [], ['BTC-USD', 'ETH-USD']],
+        )
+        self.assertEqual(
+            task_metrics(), {'get_intra_minute_data.duplicate': 2},
+        )
+
+    def test_running_symbol_skipped(self, patched_store, patched_time):
+        """Test a symbol still polled by an earlier run is skipped."""
+        acquire_lock('get_intra_minute_data:BTC-USD', 60)
+
+        self.assertEqual(
+            tasks.get_intra_minute_data(['BTC-USD', 'ETH-USD'], 10), 1,
+        )
+        self.assertEqual(
+            task_metrics(), {'get_intra_minute_data.skipped': 1},
+        )
+
+    def test_failed_symbol_polled_again(self, patched_store, patched_time):
+        """Test a symbol that failed is retried within its window."""
+        patched_store.side_effect = [(1, ['BTC-USD']), (1, ['ETH-USD'])]
+
+        tasks.get_intra_minute_data(['BTC-USD', 'ETH-USD'], 10)
+        tasks.get_intra_minute_data(['BTC-USD', 'ETH-USD'], 10)
+
+        self.assertEqual(patched_store.call_args.args[0], ['ETH-USD'])
+
+    def test_prompt_run_late_in_window_kept(
+        self, patched_store, patched_time
+    ):
+        """Test lateness counts from dispatch, not from the window start."""
+        self.assertEqual(
+            tasks.get_intra_minute_data(['BTC-USD'], 9, 149.5), 1,
+        )
+        self.assertEqual(task_metrics(), {})
+
+    def test_late_tickers_dropped(self, patched_store, patched_time):
+        """Test a run starting an interval after dispatch polls nothing."""
+        self.assertEqual(
+            tasks.get_intra_minute_data(['BTC-USD'], 8, 130.0), 0,
+        )
+
+        patched_store.assert_not_called()
+        self.assertEqual(
+            task_metrics(), {'get_intra_minute_data.late': 1},
+        )
+
+    @patch('app.tasks.store_candles')
+    def test_late_candles_polled(
+        self, patched_candles, patched_store, patched_time
+    ):
+        """Test late candle runs still poll the minute they cover."""
+        patched_candles.return_value = {'symbols': ['BTC-USD']}
+
+        tasks.get_minute_data(['BTC-USD'], 60.0, 1)
+
+        patched_candles.assert_called_once_with(['BTC-USD'], 60.0)
+        self.assertEqual(task_metrics(), {'get_minute_data.late': 1})
+
+    def test_redis_outage_polls_anyway(self, patched_store, patched_time):
+        """Test polling is not blocked when Redis is unreachable."""
+        with patch('core.locks.get_redis', side_effect=redis.ConnectionError):
+            self.assertEqual(
+                tasks.get_intra_minute_data(['BTC-USD'], 10), 1,
+            )
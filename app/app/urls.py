@@ -29,5 +29,6 @@ urlpatterns = [
         name='api-docs',
         ),
     path('api/user/', include('user.urls')),
-    path('api/order/', include('order.urls'),)
+    path('api/order/', include('order.urls'),),
+    path('api/', include('market.urls')),
 ]
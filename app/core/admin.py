@@ -70,6 +70,32 @@ class CryptoAdmin(admin.ModelAdmin):
     list_filter = ['symbol']
 
 
+class TickerAdmin(admin.ModelAdmin):
+    """Define the admin pages for Ticker."""
+    ordering = ['symbol']
+    list_display = (
+        'symbol',
+        'price',
+        'bid',
+        'ask',
+        'time',
+    )
+
+
+class SymbolAdmin(admin.ModelAdmin):
+    """Define the admin pages for Symbol."""
+    ordering = ['name']
+    list_display = (
+        'name',
+        'tick_size',
+        'precision',
+        'is_active',
+    )
+    list_filter = ['is_active']
+
+
 admin.site.register(models.User, UserAdmin)
 admin.site.register(models.Order, OrderAdmin)
 admin.site.register(models.Crypto, CryptoAdmin)
+admin.site.register(models.Ticker, TickerAdmin)
+admin.site.register(models.Symbol, SymbolAdmin)
@@ -0,0 +1,101 @@
+"""
+Paginated historical candle backfill with concurrent page fetching.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+import requests
+
+from core.providers import get_provider
+
+
+PAGE_SIZE = 300
+DEFAULT_WORKERS = 8
+
+
+logger = logging.getLogger(__name__)
+
+
+class BackfillError(Exception):
+    """Raised when some pages could not be fetched after all retries."""
+
+    def __init__(self, symbol, failed_pages):
+        self.symbol = symbol
+        self.failed_pages = failed_pages
+        super().__init__(
+            f'{symbol}: {len(failed_pages)} page(s) failed after retries.'
+        )
+
+
+def split_pages(start, end, granularity=60, page_size=PAGE_SIZE):
+    """
+    Split [start, end) into consecutive (page_start, page_end) windows
+    of at most page_size candles each.
+    """
+    step = timedelta(seconds=granularity * page_size)
+    page_start = start
+    while page_start < end:
+        page_end = min(page_start + step, end)
+        yield page_start, page_end
+        page_start = page_end
+
+
+def fetch_page(provider, symbol, start, end, granularity=60):
+    """Fetch one page of candles in [start, end) from provider."""
+    rows, status = provider.candles(symbol, start, end, granularity)
+    if status != 200:
+        raise requests.HTTPError(f'{symbol} candles answered {status}')
+
+    return rows
+
+
+def iter_backfill(
+    symbol,
+    start,
+    end,
+    granularity=60,
+    workers=DEFAULT_WORKERS,
+    provider=None,
+):
+    """
+    Fetch every candle of symbol in [start, end) with a bounded pool of
+    workers and yield each page's rows as soon as it arrives. Pages are
+    fetched from provider (default: the configured one) and retried
+    independently by the market data client; BackfillError is raised at
+    the end if any page still failed.
+    """
+    pages = list(split_pages(start, end, granularity))
+    if not pages:
+        return
+
+    provider = provider or get_provider()
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                fetch_page, provider, symbol, *page, granularity=granularity,
+            ): page
+            for page in pages
+        }
+        for future in as_completed(futures):
+            try:
+                rows = future.result()
+            except (requests.RequestException, ValueError) as exc:
+                logger.error(f'{symbol} page {futures[future]} failed: {exc}')
+                failed.append(futures[future])
+                continue
+            yield rows
+
+    if failed:
+        raise BackfillError(symbol, sorted(failed))
+
+
+def backfill(symbol, start, end, **kwargs):
+    """Return every candle of symbol in [start, end), oldest first."""
+    rows = [row for page in iter_backfill(symbol, start, end, **kwargs)
+            for row in page]
+    rows.sort(key=lambda row: row[0])
+
+    return rows
@@ -0,0 +1,182 @@
+"""
+Batched ingestion helpers for Crypto candle data.
+"""
+from datetime import datetime
+from decimal import Decimal
+from itertools import islice
+
+from django.db import connection
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+import pytz
+
+from core.models import Crypto, Ticker
+
+
+DEFAULT_BATCH_SIZE = 1000
+CANDLE_FIELDS = ['date_and_time', 'low', 'high', 'open', 'close', 'volume']
+TICKER_FIELDS = ['price', 'bid', 'ask', 'volume', 'trade_id', 'time']
+
+
+def parse_candles(symbol, rows):
+    """
+    Lazily turn raw API candle rows into unsaved Crypto objects.
+    Rows come as [time, low, high, open, close, volume]; prices are
+    kept as the decimals the API sent, not their float approximation.
+    """
+    for row in rows:
+        low, high, open_, close, volume = (Decimal(str(v)) for v in row[1:6])
+        yield Crypto(
+            date_and_time=datetime.fromtimestamp(row[0], pytz.UTC),
+            low=low,
+            high=high,
+            open=open_,
+            close=close,
+            volume=volume,
+            symbol=symbol,
+        )
+
+
+def chunked(iterable, size):
+    """Yield lists of at most size items from iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bulk_insert_candles(candles, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Write candles in chunks of batch_size rows, one INSERT per chunk.
+    progress, if given, is called with the running row count after
+    every chunk. Return the number of rows written.
+    """
+    written = 0
+    for chunk in chunked(candles, batch_size):
+        Crypto.objects.bulk_create(chunk, batch_size=batch_size)
+        written += len(chunk)
+        if progress is not None:
+            progress(written)
+
+    return written
+
+
+def upsert(model, objs, conflict_fields, update_fields,
+           batch_size=DEFAULT_BATCH_SIZE, progress=None, newer_on=None,
+           returning=None):
+    """
+    Insert objs in chunks, one statement per chunk, overwriting
+    update_fields on rows that clash on conflict_fields. With newer_on,
+    a clashing row is only overwritten by one at least as new on that
+    column. Return the number of rows written, or with returning, the
+    values of that column in the rows written.
+    """
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    columns = list(conflict_fields) + list(update_fields)
+    column_sql = ', '.join(qn(c) for c in columns)
+    conflict_sql = ', '.join(qn(c) for c in conflict_fields)
+    update_sql = ', '.join(
+        f'{qn(c)} = EXCLUDED.{qn(c)}' for c in update_fields
+    )
+    if newer_on is not None:
+        update_sql += (
+            f' WHERE EXCLUDED.{qn(newer_on)} >= {table}.{qn(newer_on)}'
+        )
+    returning_sql = '' if returning is None \
+        else f' RETURNING {qn(returning)}'
+    row_sql = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    fields = [model._meta.get_field(c) for c in columns]
+
+    written = 0
+    returned = []
+    for chunk in chunked(objs, batch_size):
+        params = []
+        for obj in chunk:
+            params.extend(
+                f.get_db_prep_save(getattr(obj, f.attname), connection)
+                for f in fields
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({column_sql}) '
+                f'VALUES {", ".join([row_sql] * len(chunk))} '
+                f'ON CONFLICT ({conflict_sql}) DO UPDATE SET {update_sql}'
+                f'{returning_sql}',
+                params,
+            )
+            written += cursor.rowcount
+            if returning is not None:
+                returned.extend(row[0] for row in cursor.fetchall())
+        if progress is not None:
+            progress(written)
+
+    return written if returning is None else returned
+
+
+def upsert_candles(candles, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Insert candles in chunks, overwriting rows that already exist for
+    the same (symbol, date_and_time). Return the number of rows written.
+    """
+    return upsert(
+        Crypto,
+        candles,
+        ['symbol', 'date_and_time'],
+        CANDLE_FIELDS[1:],
+        batch_size=batch_size,
+        progress=progress,
+    )
+
+
+def parse_ticker(symbol, data):
+    """
+    Turn a raw API ticker payload into an unsaved Ticker object, keeping
+    the decimals the API sent.
+    """
+    def number(key):
+        value = data.get(key)
+        return None if value is None else Decimal(str(value))
+
+    return Ticker(
+        symbol=symbol,
+        price=Decimal(str(data['price'])),
+        bid=number('bid'),
+        ask=number('ask'),
+        volume=number('volume'),
+        trade_id=data.get('trade_id'),
+        time=parse_datetime(data['time']),
+    )
+
+
+def upsert_tickers(tickers):
+    """
+    Store tickers as the latest one of their symbol in one query. A
+    delayed or retried tick older than the stored one is dropped.
+    Return the tickers stored, the only ones newer than what was known.
+    """
+    tickers = list(tickers)
+    stored = set(upsert(
+        Ticker,
+        tickers,
+        ['symbol'],
+        TICKER_FIELDS,
+        newer_on='time',
+        returning='symbol',
+    ))
+    return [t for t in tickers if t.symbol in stored]
+
+
+def latest_candle_times(symbols=None):
+    """Return a {symbol: latest date_and_time} mapping of stored candles."""
+    queryset = Crypto.objects.all()
+    if symbols is not None:
+        queryset = queryset.filter(symbol__in=symbols)
+
+    rows = queryset.order_by().values('symbol').annotate(
+        latest=Max('date_and_time'),
+    )
+    return {row['symbol']: row['latest'] for row in rows}
@@ -0,0 +1,134 @@
+"""
+Redis locks, idempotency keys and run counters for periodic tasks.
+"""
+import logging
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+
+import redis
+
+from core.cache import get_redis
+
+
+LOCK_PREFIX = 'lock:'
+DONE_PREFIX = 'done:'
+METRICS_KEY = 'metrics:tasks'
+
+# KEYS[1]: lock, ARGV[1]: token. Only the holder may release the lock.
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+logger = logging.getLogger(__name__)
+
+_release = None
+
+
+def release_script():
+    """Return the lock release script, registered once per Redis client."""
+    global _release
+    client = get_redis()
+    if _release is None or _release.registered_client is not client:
+        _release = client.register_script(RELEASE_SCRIPT)
+
+    return _release
+
+
+def acquire_lock(name, ttl):
+    """Take lock name for ttl seconds, return its token or None if held."""
+    token = uuid.uuid4().hex
+    if get_redis().set(LOCK_PREFIX + name, token, nx=True, px=int(ttl * 1000)):
+        return token
+
+    return None
+
+
+def release_lock(name, token):
+    """Release lock name if token still holds it."""
+    release_script()(keys=[LOCK_PREFIX + name], args=[token])
+
+
+def claim(key, ttl):
+    """Claim idempotency key for ttl seconds, False if already claimed."""
+    return bool(get_redis().set(DONE_PREFIX + key, 1, nx=True, ex=ttl))
+
+
+def is_claimed(key):
+    """Return whether idempotency key is claimed."""
+    return bool(get_redis().exists(DONE_PREFIX + key))
+
+
+def mark_polled(task, symbols, window, ttl):
+    """Claim the (task, symbol, window) keys of symbols polled by task."""
+    if not symbols:
+        return
+
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for symbol in symbols:
+            pipe.set(DONE_PREFIX + f'{task}:{symbol}:{window}', 1, ex=ttl)
+        pipe.execute()
+    except redis.RedisError as exc:
+        logger.error(f"{task} idempotency keys not saved: {exc}")
+
+
+def count(task, event):
+    """Add one to the event counter of task, e.g. skipped or late."""
+    try:
+        get_redis().hincrby(METRICS_KEY, f'{task}.{event}', 1)
+    except redis.RedisError as exc:
+        logger.error(f"task metrics update failed: {exc}")
+
+
+def task_metrics():
+    """Return the {'<task>.<event>': count} counters."""
+    return {
+        name.decode(): int(value)
+        for name, value in get_redis().hgetall(METRICS_KEY).items()
+    }
+
+
+@contextmanager
+def guarded(task, symbols, window):
+    """
+    Yield the symbols task may poll for window (a beat slot number):
+    those whose previous run is over (lock, counted as skipped) and not
+    already polled for window (idempotency key, counted as duplicate).
+    Polled symbols are recorded with mark_polled while the locks are
+    held, so symbols that failed can be polled again in the window.
+    The locks are held until exit, or expire after POLL_LOCK_TTL if the
+    worker dies. Every symbol is let through if Redis is unreachable.
+    """
+    held = {}
+    free = []
+    try:
+        for symbol in symbols:
+            token = acquire_lock(
+                f'{task}:{symbol}', settings.POLL_LOCK_TTL,
+            )
+            if token is None:
+                count(task, 'skipped')
+                continue
+            held[symbol] = token
+            if is_claimed(f'{task}:{symbol}:{window}'):
+                count(task, 'duplicate')
+            else:
+                free.append(symbol)
+    except redis.RedisError as exc:
+        logger.error(f"{task} locks unavailable, polling anyway: {exc}")
+        free = list(symbols)
+
+    try:
+        yield free
+    finally:
+        for symbol, token in held.items():
+            try:
+                release_lock(f'{task}:{symbol}', token)
+            except redis.RedisError as exc:
+                logger.error(f"{task} lock release failed: {exc}")
@@ -0,0 +1,157 @@
+"""
+Django command to show the query plans of the hot Order queries.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import Order
+from core.symbols import active_symbols
+
+
+PAGE_SIZE = 100
+
+SEED_SQL = """
+INSERT INTO {table} (
+    user_id, start_date_time, close_date_time, symbol, amount,
+    stop_loss, take_profit, leverage, initial_price, closing_price, title
+)
+SELECT
+    users[1 + g %% cardinality(users)],
+    now() - g * interval '1 second',
+    CASE WHEN open THEN NULL ELSE now() END,
+    symbols[1 + g %% cardinality(symbols)],
+    100, 90, 110, 10, 100,
+    CASE WHEN open THEN NULL ELSE 105 END,
+    'benchmark order'
+FROM (
+    SELECT g, random() < %(open_ratio)s AS open
+    FROM generate_series(1, %(orders)s) AS g
+) AS series,
+(SELECT %(users)s::bigint[] AS users, %(symbols)s::text[] AS symbols) AS p
+"""
+
+
+class Command(BaseCommand):
+    """
+    Seed synthetic orders inside a transaction, print the EXPLAIN
+    ANALYZE plans of the queries the API and the SL/TP evaluation run,
+    then roll everything back.
+    """
+    help = 'Show the plans of the hot Order queries at scale.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=10_000_000,
+            help='Number of synthetic orders to seed.',
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=1000,
+            help='Number of synthetic users owning the orders.',
+        )
+        parser.add_argument(
+            '--open-ratio',
+            type=float,
+            default=0.05,
+            help='Share of the orders left open.',
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Commit the synthetic data instead of rolling it back.',
+        )
+
+    def handle(self, *args, **options):
+        self.symbols = active_symbols()
+        if not self.symbols:
+            self.stdout.write('No active symbols, nothing to benchmark.')
+            return
+
+        with transaction.atomic():
+            users = self.seed(
+                options['orders'], options['users'], options['open_ratio'],
+            )
+            for title, queryset in self.queries(users[0]):
+                self.stdout.write(self.style.MIGRATE_HEADING(title))
+                self.stdout.write(
+                    queryset.explain(analyze=True, buffers=True)
+                )
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def seed(self, orders, users, open_ratio):
+        """Create users and orders, return the user ids."""
+        start = time.time()
+        password = make_password(None)
+        created = get_user_model().objects.bulk_create([
+            get_user_model()(
+                email=f'benchmark-{i}@example.com',
+                name='benchmark',
+                password=password,
+            )
+            for i in range(users)
+        ])
+        user_ids = [user.id for user in created]
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                SEED_SQL.format(
+                    table=connection.ops.quote_name(Order._meta.db_table),
+                ),
+                {
+                    'orders': orders,
+                    'open_ratio': open_ratio,
+                    'users': user_ids,
+                    'symbols': self.symbols,
+                },
+            )
+            cursor.execute(
+                f'ANALYZE {connection.ops.quote_name(Order._meta.db_table)}'
+            )
+
+        self.stdout.write(
+            f'Seeded {orders} orders for {users} users '
+            f'in {time.time() - start:.1f}s.'
+        )
+        return user_ids
+
+    def queries(self, user_id):
+        """Yield (title, queryset) of the queries to explain."""
+        mine = Order.objects.filter(user_id=user_id).order_by('-id')
+        count = mine.count()
+        middle = mine.values_list('id', flat=True)[count // 2] if count else 0
+        open_orders = Order.objects.filter(close_date_time__isnull=True)
+        open_ids = list(
+            open_orders.filter(symbol=self.symbols[0])
+            .values_list('id', flat=True)[:50]
+        )
+
+        yield 'Order list, first page', mine[:PAGE_SIZE + 1]
+        yield (
+            'Order list, page in the middle',
+            mine.filter(id__lt=middle)[:PAGE_SIZE + 1],
+        )
+        yield (
+            'Open orders of a symbol',
+            open_orders.filter(symbol=self.symbols[0]).values_list(
+                'id', 'stop_loss', 'take_profit',
+            ),
+        )
+        yield (
+            'SL/TP index rebuild',
+            open_orders.values_list(
+                'id', 'symbol', 'stop_loss', 'take_profit',
+            ),
+        )
+        yield (
+            'Closing triggered orders',
+            open_orders.filter(symbol=self.symbols[0], id__in=open_ids),
+        )
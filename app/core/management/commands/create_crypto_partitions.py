@@ -0,0 +1,34 @@
+"""
+Django command to create upcoming monthly Crypto table partitions.
+"""
+from django.core.management.base import BaseCommand
+
+from core.partitions import create_crypto_partitions, is_partitioned
+
+
+class Command(BaseCommand):
+    """Command to keep Crypto partitions ahead of incoming data."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=2,
+            help='Number of future months to create partitions for.',
+        )
+
+    def handle(self, *args, **options):
+        """Create missing partitions if the Crypto table is partitioned."""
+        if not is_partitioned():
+            self.stdout.write('Crypto table is not partitioned, skipping.')
+            return
+
+        created = create_crypto_partitions(
+            months_ahead=options['months_ahead'],
+        )
+        for name in created:
+            self.stdout.write(f'Created partition {name}.')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'{len(created)} partition(s) created.')
+        )
@@ -1,82 +1,219 @@
 """
 Django command to populate Crypto Tables with external API data.
 """
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from django.core.management.base import BaseCommand
 
-from core.models import Crypto
+from core.backfill import DEFAULT_WORKERS, BackfillError, iter_backfill
+from core.ingest import (
+    DEFAULT_BATCH_SIZE,
+    bulk_insert_candles,
+    latest_candle_times,
+    parse_candles,
+    upsert_candles,
+)
+from core.models import Crypto, CryptoRollup
+from core.symbols import active_symbols
+from market.rollups import update_rollups
 
-import requests
 from datetime import datetime, timedelta
 import pytz
 
 
-SYMBOLS = ['ETH-USD', 'BTC-USD', 'AVAX-USD']
-COINBASE_URL = 'https://api.pro.coinbase.com/'
-
-
 def get_data_from_api(
     symbol,
-    end_datetime=datetime.now(),
+    end_datetime=None,
     window_days=30,
-    granularity=60
+    granularity=60,
+    start_datetime=None,
+    workers=DEFAULT_WORKERS,
 ):
     """
-    Generates API call to gather symbol data from end datetime,
-    x nummber of days window.
+    Gather symbol candles from end datetime back x number of days,
+    fetching the 300-candle API pages concurrently. Return an iterator
+    of pages of rows, in no particular order.
     Granularity defines if records are daily, monthly, hourly, etc.
     (default: seconds).
+    A later start datetime narrows the window to the candles after it.
     """
-    delta = timedelta(minutes=1)
-    start_datetime = end_datetime - (300*delta)
-
-    parameters = {
-        'start': start_datetime.isoformat(),
-        'end': end_datetime.isoformat(),
-        'granularity': str(granularity),
-    }
-
-    data = requests.get(
-        f'{COINBASE_URL}products/{symbol}/candles',
-        params=parameters,
-        headers={"content-type": "application/json"}
+    if end_datetime is None:
+        end_datetime = datetime.now(pytz.UTC)
+    window_start = end_datetime - timedelta(days=window_days)
+    if start_datetime is None or start_datetime < window_start:
+        start_datetime = window_start
+
+    return iter_backfill(
+        symbol,
+        start_datetime,
+        end_datetime,
+        granularity=granularity,
+        workers=workers,
     )
-    return data.json()
+
+
+def _feed(pages, symbol, out):
+    """
+    Put (symbol, rows, None) on out for every page of symbol, then
+    (symbol, None, error) once done, error being None on success.
+    """
+    error = None
+    try:
+        for rows in pages:
+            out.put((symbol, rows, None))
+    except Exception as exc:
+        error = exc
+    out.put((symbol, None, error))
 
 
 class Command(BaseCommand):
     """Command to populate database tables with external API."""
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Number of candles written per INSERT.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=DEFAULT_WORKERS,
+            help='Number of API pages fetched concurrently per symbol.',
+        )
+        parser.add_argument(
+            '--window-days',
+            type=int,
+            default=30,
+            help='Number of days of history to backfill.',
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help=(
+                'Keep stored rows and only fetch candles newer than the '
+                'latest one stored per symbol.'
+            ),
+        )
+
     def handle(self, *args, **options):
-        """Loop through symbols to get data and upidate to db table."""
-        tz = pytz.timezone('America/Los_Angeles')
+        """Fetch symbols concurrently and stream candles into the db."""
+        batch_size = options['batch_size']
+        symbols = active_symbols()
+        if not symbols:
+            self.stdout.write('No active symbols, nothing to populate.')
+            return
         self.stdout.write('Starting to populate Crypto table...')
 
-        self.stdout.write('Deleting old rows...')
-        Crypto.objects.all().delete()
-
-        for symbol in SYMBOLS:
-            data = get_data_from_api(symbol)
-            for row in data:
-                Crypto.objects.create(
-                    date_and_time=datetime.fromtimestamp(
-                        row[0],
-                        tz
-                    ).isoformat(),
-                    low=row[1],
-                    high=row[2],
-                    open=row[3],
-                    close=row[4],
-                    volume=row[5],
-                    symbol=symbol,
+        if options['incremental']:
+            latest = latest_candle_times(symbols)
+            write_candles = upsert_candles
+        else:
+            self.stdout.write('Deleting old rows...')
+            Crypto.objects.all().delete()
+            CryptoRollup.objects.all().delete()
+            latest = {}
+            write_candles = bulk_insert_candles
+
+        started = time.monotonic()
+        # Pages are written as they arrive, a few at a time, so a long
+        # window is never held in memory whole.
+        pages = queue.Queue(maxsize=2 * len(symbols))
+        written = dict.fromkeys(symbols, 0)
+        spans = {}
+        failed = []
+        errors = []
+        with ThreadPoolExecutor(max_workers=len(symbols)) as pool:
+            for symbol in symbols:
+                pool.submit(
+                    _feed,
+                    get_data_from_api(
+                        symbol,
+                        window_days=options['window_days'],
+                        start_datetime=latest.get(symbol),
+                        workers=options['workers'],
+                    ),
+                    symbol,
+                    pages,
                 )
+
+            pending = len(symbols)
+            while pending:
+                symbol, rows, error = pages.get()
+                if rows is not None:
+                    written[symbol] += self._write_page(
+                        write_candles, symbol, rows, batch_size,
+                        written[symbol],
+                    )
+                    if rows:
+                        times = [row[0] for row in rows]
+                        if symbol in spans:
+                            times.extend(spans[symbol])
+                        spans[symbol] = (min(times), max(times))
+                    continue
+
+                pending -= 1
+                if symbol in spans:
+                    low, high = spans[symbol]
+                    update_rollups(
+                        [symbol],
+                        datetime.fromtimestamp(low, pytz.UTC),
+                        datetime.fromtimestamp(high, pytz.UTC),
+                    )
+                if isinstance(error, BackfillError):
+                    failed.append(symbol)
+                    self._report_failed(error, written[symbol])
+                elif error is not None:
+                    # Raised once every other symbol is drained, so no
+                    # feeder is left blocked on a full queue.
+                    errors.append(error)
+                else:
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f'{symbol} populated successfully '
+                            f'({written[symbol]} rows).'
+                        )
+                    )
+
+        if errors:
+            raise errors[0]
+
+        total = sum(written.values())
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed else 0
+        summary = (
+            f'{total} rows in {elapsed:.2f}s ({rate:.0f} rows/sec).'
+        )
+        if failed:
+            self.stderr.write(
+                f'{len(failed)} symbol(s) incomplete '
+                f'({", ".join(failed)}): {summary}'
+            )
+        else:
             self.stdout.write(
                 self.style.SUCCESS(
-                    f'{symbol} populated successfully.'
+                    f'All Symbol data populated successfully: {summary}'
                 )
             )
 
-        self.stdout.write(
-            self.style.SUCCESS(
-                'All Symbol data populated successfully.'
-            )
+    def _write_page(self, write_candles, symbol, rows, batch_size, done):
+        """Write one page of symbol rows, done rows being written before."""
+        return write_candles(
+            parse_candles(symbol, rows),
+            batch_size=batch_size,
+            progress=lambda n: self.stdout.write(
+                f'{symbol}: {done + n} rows written...'
+            ),
+        )
+
+    def _report_failed(self, error, written):
+        """Report the candle ranges a backfill could not fetch."""
+        self.stderr.write(
+            f'{error.symbol}: {written} rows written, '
+            f'{len(error.failed_pages)} page(s) failed:'
         )
+        for start, end in error.failed_pages:
+            self.stderr.write(f'  {start.isoformat()} - {end.isoformat()}')
@@ -0,0 +1,45 @@
+"""
+Django command to rebuild the Crypto rollup tables from minute candles.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from market.candles import ROLLUP_INTERVALS
+from market.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    """Command to recompute 5m/1h/1d rollups from scratch."""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--symbol',
+            action='append',
+            dest='symbols',
+            help='Only rebuild this symbol (repeatable, default: all).',
+        )
+        parser.add_argument(
+            '--interval',
+            action='append',
+            dest='intervals',
+            choices=ROLLUP_INTERVALS,
+            help='Only rebuild this interval (repeatable, default: all).',
+        )
+
+    def handle(self, *args, **options):
+        """Drop and recompute the requested rollups."""
+        self.stdout.write('Rebuilding Crypto rollups...')
+        started = time.monotonic()
+
+        written = rebuild_rollups(
+            symbols=options['symbols'],
+            intervals=options['intervals'] or ROLLUP_INTERVALS,
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{written} rollup rows rebuilt in '
+                f'{time.monotonic() - started:.2f}s.'
+            )
+        )
@@ -0,0 +1,19 @@
+"""
+Django command to show the skipped, duplicate and late polling runs.
+"""
+from django.core.management.base import BaseCommand
+
+from core.locks import task_metrics
+
+
+class Command(BaseCommand):
+    """Command to print the periodic task run counters."""
+
+    def handle(self, *args, **options):
+        """Print every counter as '<task>.<event> <count>'."""
+        metrics = task_metrics()
+        if not metrics:
+            self.stdout.write('No skipped, duplicate or late runs.')
+
+        for name, value in sorted(metrics.items()):
+            self.stdout.write(f'{name} {value}')
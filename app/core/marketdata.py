@@ -0,0 +1,240 @@
+"""
+Shared HTTP client for the exchange market data API.
+"""
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+
+import redis
+import requests
+
+from user.throttling import consume
+
+
+COINBASE_URL = 'https://api.pro.coinbase.com/'
+
+# Answers worth retrying: rate limited or the exchange failing.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling the API while the circuit is open."""
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at rate tokens per second up to capacity. With
+    a key, tokens live in Redis and are shared by every process calling
+    the API from the same address; while Redis is unreachable, or
+    without a key, a thread-safe per process bucket is used instead.
+    """
+
+    def __init__(self, capacity, rate, key=None):
+        self.capacity = capacity
+        self.rate = rate
+        self.key = key
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _take_shared(self):
+        """
+        Take one token from the Redis bucket. Return the seconds until
+        one is available, 0 if taken, or None if Redis is unreachable.
+        """
+        try:
+            allowed, wait = consume(self.key, self.capacity, self.rate)
+        except redis.RedisError as exc:
+            logger.error(f'shared market data rate limit unavailable: {exc}')
+            return None
+
+        return 0 if allowed else wait
+
+    def _take_local(self):
+        """Take one local token, return the seconds until one is available."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity,
+                self.tokens + max(0, now - self.updated) * self.rate,
+            )
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Take one token, sleeping until one is available."""
+        while True:
+            wait = None if self.key is None else self._take_shared()
+            if wait is None:
+                wait = self._take_local()
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing API after `threshold` consecutive failures,
+    then let a single trial call through every `reset_timeout` seconds
+    until one succeeds.
+    """
+
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """Return whether a call may go through now."""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Half open: this caller probes, the others keep waiting.
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                if self.opened_at is None:
+                    logger.error(
+                        f'market data circuit opened after '
+                        f'{self.failures} failures'
+                    )
+                self.opened_at = time.monotonic()
+
+
+class MarketDataClient:
+    """
+    Rate limited keep-alive session to the market data API.
+
+    Every request has connect and read timeouts, is retried with
+    exponential backoff and full jitter on transport errors, 429 and
+    5xx answers, and is refused with CircuitOpenError while the API
+    keeps failing.
+    """
+
+    def __init__(
+        self,
+        base_url=COINBASE_URL,
+        timeout=None,
+        retries=None,
+        backoff=None,
+        max_backoff=None,
+        rate_limit=None,
+        breaker=None,
+        pool_size=None,
+    ):
+        self.base_url = base_url
+        self.timeout = timeout or settings.MARKET_DATA_TIMEOUT
+        self.retries = (
+            settings.MARKET_DATA_RETRIES if retries is None else retries
+        )
+        self.backoff = (
+            settings.MARKET_DATA_BACKOFF if backoff is None else backoff
+        )
+        self.max_backoff = max_backoff or settings.MARKET_DATA_MAX_BACKOFF
+        self.bucket = TokenBucket(
+            *(rate_limit or settings.MARKET_DATA_RATE_LIMIT),
+            key=settings.MARKET_DATA_RATE_LIMIT_KEY,
+        )
+        self.breaker = CircuitBreaker(
+            *(breaker or settings.MARKET_DATA_BREAKER)
+        )
+
+        pool_size = pool_size or settings.MARKET_DATA_POOL_SIZE
+        self.session = requests.Session()
+        self.session.headers.update({"content-type": "application/json"})
+        self.session.mount(
+            base_url,
+            requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=pool_size,
+            ),
+        )
+
+    def _sleep(self, attempt, res=None):
+        """
+        Wait before retry attempt + 1, honouring Retry-After up to
+        max_backoff so one answer cannot stall a worker for long.
+        """
+        delay = random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** attempt)
+        )
+        try:
+            retry_after = float(res.headers['Retry-After'])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            retry_after = None
+        if retry_after is not None and retry_after >= 0:
+            delay = max(delay, min(retry_after, self.max_backoff))
+        time.sleep(delay)
+
+    def get(self, path, params=None, timeout=None):
+        """
+        GET base_url + path and return the response, retried answers
+        included once retries are exhausted. Transport errors raise
+        requests.RequestException.
+        """
+        url = f'{self.base_url}{path}'
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f'circuit open, not calling {url}')
+
+            self.bucket.acquire()
+            try:
+                res = self.session.get(
+                    url, params=params, timeout=timeout or self.timeout,
+                )
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                self.breaker.record_failure()
+                if attempt == self.retries:
+                    raise
+                logger.warning(
+                    f'{url} failed (attempt {attempt + 1}): {exc}'
+                )
+                self._sleep(attempt)
+                continue
+
+            if res.status_code not in RETRY_STATUSES:
+                self.breaker.record_success()
+                return res
+
+            self.breaker.record_failure()
+            if attempt == self.retries:
+                return res
+            logger.warning(
+                f'{url} answered {res.status_code} (attempt {attempt + 1})'
+            )
+            self._sleep(attempt, res)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process wide market data client."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = MarketDataClient()
+
+    return _client
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_alter_order_title'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=(
+                'DELETE FROM core_crypto a USING core_crypto b '
+                'WHERE a.id > b.id AND a.symbol = b.symbol '
+                'AND a.date_and_time = b.date_and_time;'
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='crypto',
+            constraint=models.UniqueConstraint(fields=('symbol', 'date_and_time'), name='unique_crypto_symbol_date_and_time'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:08
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_crypto_unique_symbol_date_and_time'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='crypto',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['date_and_time'], name='crypto_date_and_time_brin'),
+        ),
+    ]
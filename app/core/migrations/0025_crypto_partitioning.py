@@ -0,0 +1,34 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:10
+
+from django.conf import settings
+from django.db import migrations
+
+from core import partitions
+
+
+def partition_crypto(apps, schema_editor):
+    if (
+        settings.CRYPTO_PARTITIONING
+        and schema_editor.connection.vendor == 'postgresql'
+    ):
+        partitions.partition_crypto_table(schema_editor.connection)
+
+
+def unpartition_crypto(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        partitions.unpartition_crypto_table(schema_editor.connection)
+
+
+# Database only: a partitioned core_crypto has the primary key
+# (id, date_and_time), which Django 3.2 cannot model. The migration state
+# keeps id as the primary key, so later makemigrations runs see no change
+# to the Crypto model from this migration.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_crypto_date_and_time_brin'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_crypto, unpartition_crypto),
+    ]
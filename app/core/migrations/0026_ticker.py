@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_crypto_partitioning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ticker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=10, unique=True)),
+                ('price', models.FloatField()),
+                ('bid', models.FloatField(blank=True, null=True)),
+                ('ask', models.FloatField(blank=True, null=True)),
+                ('volume', models.FloatField(blank=True, null=True)),
+                ('trade_id', models.BigIntegerField(blank=True, null=True)),
+                ('time', models.DateTimeField()),
+            ],
+        ),
+    ]
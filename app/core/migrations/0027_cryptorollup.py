@@ -0,0 +1,34 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_ticker'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CryptoRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('interval', models.CharField(max_length=3)),
+                ('bucket', models.DateTimeField()),
+                ('low', models.FloatField()),
+                ('high', models.FloatField()),
+                ('open', models.FloatField()),
+                ('close', models.FloatField()),
+                ('volume', models.FloatField()),
+                ('symbol', models.CharField(max_length=10)),
+            ],
+            options={
+                'ordering': ('bucket',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='cryptorollup',
+            constraint=models.UniqueConstraint(fields=('symbol', 'interval', 'bucket'), name='unique_cryptorollup_symbol_interval_bucket'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:30
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without blocking writes to a live Order table.
+    atomic = False
+
+    dependencies = [
+        ('core', '0027_cryptorollup'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(
+                fields=['user', '-id'],
+                name='order_user_id_desc',
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(
+                condition=models.Q(('close_date_time__isnull', True)),
+                fields=['symbol'],
+                name='order_open_symbol',
+            ),
+        ),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:30
+
+from django.db import migrations, models
+
+
+NUMERIC = 'numeric(20, 8)'
+FLOAT = 'double precision'
+
+COLUMNS = {
+    'core_crypto': ['low', 'high', 'open', 'close', 'volume'],
+    'core_cryptorollup': ['low', 'high', 'open', 'close', 'volume'],
+    'core_order': [
+        'amount', 'stop_loss', 'take_profit', 'initial_price',
+        'closing_price',
+    ],
+}
+
+
+def alter_sql(table, columns, type_):
+    """One ALTER TABLE for all columns, so the table is rewritten once."""
+    return f'ALTER TABLE "{table}" ' + ', '.join(
+        f'ALTER COLUMN "{c}" TYPE {type_} USING "{c}"::{type_}'
+        for c in columns
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_order_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    alter_sql(table, columns, NUMERIC),
+                    alter_sql(table, columns, FLOAT),
+                )
+                for table, columns in COLUMNS.items()
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='crypto',
+                    name='close',
+                    field=models.DecimalField(decimal_places=8, max_digits=20),
+                ),
+                migrations.AlterField(
+                    model_name='crypto',
+                    name='high',
+                    field=models.DecimalField(decimal_places=8, max_digits=20),
+                ),
+                migrations.AlterField(
+                    model_name='crypto',
+                    name='low',
+                    field=models.DecimalField(decimal_places=8, max_digits=20),
+                ),
+                migrations.AlterField(
+                    model_name='crypto',
+                    name='open',
+                    field=models.DecimalField(decimal_places=8, max_digits=20),
+                ),
+                migrations.AlterField(
+                    model_name='crypto',
+                    name='volume',
+                    field=models.DecimalField(decimal_places=8, max_digits=20),
+                ),
+                migrations.AlterField(
+                    model_name='cryptorollup',
+                    name='close',
+                    field=models.DecimalField(decimal_places=8, max_digits=20),
+                ),
+                migrations.AlterField(
+                    model_name='cryptorollup',
+                    name='high',
+                    field=models.DecimalField(decimal_places=8, max_digits=20),
+                ),
+                migrations.AlterField(
+                    model_name='cryptorollup',
+                    name='low',
+                    field=models.DecimalField(decimal_places=8, max_digits=20),
+                ),
+                migrations.AlterField(
+                    model_name='cryptorollup',
+                    name='open',
+                    field=models.DecimalField(decimal_places=8, max_digits=20),
+                ),
+                migrations.AlterField(
+                    model_name='cryptorollup',
+                    name='volume',
+                    field=models.DecimalField(decimal_places=8, max_digits=20),
+                ),
+                migrations.AlterField(
+                    model_name='order',
+                    name='amount',
+                    field=models.DecimalField(decimal_places=8, max_digits=20, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='order',
+                    name='closing_price',
+                    field=models.DecimalField(blank=True, decimal_places=8, max_digits=20, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='order',
+                    name='initial_price',
+                    field=models.DecimalField(decimal_places=8, max_digits=20),
+                ),
+                migrations.AlterField(
+                    model_name='order',
+                    name='stop_loss',
+                    field=models.DecimalField(decimal_places=8, max_digits=20),
+                ),
+                migrations.AlterField(
+                    model_name='order',
+                    name='take_profit',
+                    field=models.DecimalField(decimal_places=8, max_digits=20),
+                ),
+            ],
+        ),
+    ]
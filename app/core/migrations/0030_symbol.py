@@ -0,0 +1,45 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:49
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+# The pairs polled so far, with the exchange's quote increments.
+SYMBOLS = [
+    ('ETH-USD', Decimal('0.01'), 2),
+    ('BTC-USD', Decimal('0.01'), 2),
+    ('AVAX-USD', Decimal('0.01'), 2),
+]
+
+
+def seed_symbols(apps, schema_editor):
+    Symbol = apps.get_model('core', 'Symbol')
+    Symbol.objects.bulk_create([
+        Symbol(name=name, tick_size=tick_size, precision=precision)
+        for name, tick_size, precision in SYMBOLS
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_fixed_point_prices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Symbol',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=10, unique=True)),
+                ('tick_size', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('precision', models.PositiveSmallIntegerField()),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ('name',),
+            },
+        ),
+        migrations.RunPython(seed_symbols, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-18 21:05
+
+from django.db import migrations
+
+from market import rollups
+
+
+def backfill_rollups(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        rollups.rebuild_rollups()
+
+
+# 0027 created the rollups empty, and 5m/1h/1d candles are only served
+# from them: aggregate the minute candles stored before it. On a large
+# Crypto table this takes a while; rebuild_crypto_rollups does the same.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_symbol'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
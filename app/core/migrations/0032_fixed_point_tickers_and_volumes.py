@@ -0,0 +1,78 @@
+# Generated by Django 3.2.25 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+PRICE = 'numeric(20, 8)'
+VOLUME = 'numeric(28, 8)'
+FLOAT = 'double precision'
+
+# table: [(column, new type, previous type)]
+COLUMNS = {
+    'core_crypto': [('volume', VOLUME, PRICE)],
+    'core_cryptorollup': [('volume', VOLUME, PRICE)],
+    'core_ticker': [
+        ('price', PRICE, FLOAT),
+        ('bid', PRICE, FLOAT),
+        ('ask', PRICE, FLOAT),
+        ('volume', VOLUME, FLOAT),
+    ],
+}
+
+
+def alter_sql(table, columns):
+    """One ALTER TABLE for all columns, so the table is rewritten once."""
+    return f'ALTER TABLE "{table}" ' + ', '.join(
+        f'ALTER COLUMN "{c}" TYPE {type_} USING "{c}"::{type_}'
+        for c, type_ in columns
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_backfill_crypto_rollups'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    alter_sql(table, [(c, new) for c, new, _ in columns]),
+                    alter_sql(table, [(c, old) for c, _, old in columns]),
+                )
+                for table, columns in COLUMNS.items()
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='crypto',
+                    name='volume',
+                    field=models.DecimalField(decimal_places=8, max_digits=28),
+                ),
+                migrations.AlterField(
+                    model_name='cryptorollup',
+                    name='volume',
+                    field=models.DecimalField(decimal_places=8, max_digits=28),
+                ),
+                migrations.AlterField(
+                    model_name='ticker',
+                    name='ask',
+                    field=models.DecimalField(blank=True, decimal_places=8, max_digits=20, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='ticker',
+                    name='bid',
+                    field=models.DecimalField(blank=True, decimal_places=8, max_digits=20, null=True),
+                ),
+                migrations.AlterField(
+                    model_name='ticker',
+                    name='price',
+                    field=models.DecimalField(decimal_places=8, max_digits=20),
+                ),
+                migrations.AlterField(
+                    model_name='ticker',
+                    name='volume',
+                    field=models.DecimalField(blank=True, decimal_places=8, max_digits=28, null=True),
+                ),
+            ],
+        ),
+    ]
@@ -2,6 +2,7 @@
 Database models.
 """
 from django.conf import settings
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -10,6 +11,23 @@ from django.contrib.auth.models import (
 )
 
 
+# Fixed-point precision of prices, amounts and volumes: 12 integer and
+# 8 fractional digits, down to one satoshi. Volumes get 20 integer
+# digits, enough for a day of a low priced coin summed in a rollup.
+MAX_DIGITS = 20
+VOLUME_MAX_DIGITS = 28
+DECIMAL_PLACES = 8
+
+
+def fixed_point(max_digits=MAX_DIGITS, **kwargs):
+    """Return a DecimalField with the fixed-point precision."""
+    return models.DecimalField(
+        max_digits=max_digits,
+        decimal_places=DECIMAL_PLACES,
+        **kwargs,
+    )
+
+
 class UserManager(BaseUserManager):
     """Manager for users."""
 
@@ -45,6 +63,20 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
+class Symbol(models.Model):
+    """Tradable pair and its quoting rules."""
+    name = models.CharField(max_length=10, unique=True)
+    tick_size = fixed_point()
+    precision = models.PositiveSmallIntegerField()
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ('name',)
+
+    def __str__(self):
+        return self.name
+
+
 class Order(models.Model):
     """Order objects."""
     user = models.ForeignKey(
@@ -57,12 +89,12 @@ class Order(models.Model):
         blank=True,
     )
     symbol = models.CharField(max_length=10)
-    amount = models.FloatField(null=True)
-    stop_loss = models.FloatField()
-    take_profit = models.FloatField()
+    amount = fixed_point(null=True)
+    stop_loss = fixed_point()
+    take_profit = fixed_point()
     leverage = models.IntegerField()
-    initial_price = models.FloatField()
-    closing_price = models.FloatField(
+    initial_price = fixed_point()
+    closing_price = fixed_point(
         null=True,
         blank=True,
         )
@@ -71,6 +103,16 @@ class Order(models.Model):
         default=f'{symbol} order created on {start_date_time}',
         )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'], name='order_user_id_desc'),
+            models.Index(
+                fields=['symbol'],
+                name='order_open_symbol',
+                condition=models.Q(close_date_time__isnull=True),
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -78,12 +120,61 @@ class Order(models.Model):
 class Crypto(models.Model):
     """Crypto historical data objects."""
     date_and_time = models.DateTimeField()
-    low = models.FloatField()
-    high = models.FloatField()
-    open = models.FloatField()
-    close = models.FloatField()
-    volume = models.FloatField()
+    low = fixed_point()
+    high = fixed_point()
+    open = fixed_point()
+    close = fixed_point()
+    volume = fixed_point(max_digits=VOLUME_MAX_DIGITS)
     symbol = models.CharField(max_length=10)
 
     class Meta:
         ordering = ('date_and_time',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['symbol', 'date_and_time'],
+                name='unique_crypto_symbol_date_and_time',
+            ),
+        ]
+        indexes = [
+            BrinIndex(
+                fields=['date_and_time'],
+                name='crypto_date_and_time_brin',
+            ),
+        ]
+
+
+class CryptoRollup(models.Model):
+    """Crypto candles pre-aggregated into a coarser interval."""
+    interval = models.CharField(max_length=3)
+    bucket = models.DateTimeField()
+    low = fixed_point()
+    high = fixed_point()
+    open = fixed_point()
+    close = fixed_point()
+    volume = fixed_point(max_digits=VOLUME_MAX_DIGITS)
+    symbol = models.CharField(max_length=10)
+
+    class Meta:
+        ordering = ('bucket',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['symbol', 'interval', 'bucket'],
+                name='unique_cryptorollup_symbol_interval_bucket',
+            ),
+        ]
+
+
+class Ticker(models.Model):
+    """Latest polled ticker per symbol."""
+    symbol = models.CharField(max_length=10, unique=True)
+    price = fixed_point()
+    bid = fixed_point(null=True, blank=True)
+    ask = fixed_point(null=True, blank=True)
+    volume = fixed_point(
+        max_digits=VOLUME_MAX_DIGITS, null=True, blank=True,
+    )
+    trade_id = models.BigIntegerField(null=True, blank=True)
+    time = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.symbol} {self.price}'
@@ -0,0 +1,163 @@
+"""
+Optional monthly range partitioning of the Crypto table on PostgreSQL.
+"""
+from datetime import date, datetime
+
+from django.db import connection as default_connection, transaction
+
+import pytz
+
+
+TABLE = 'core_crypto'
+DEFAULT_PARTITION = f'{TABLE}_default'
+UNIQUE_CONSTRAINT = 'unique_crypto_symbol_date_and_time'
+BRIN_INDEX = 'crypto_date_and_time_brin'
+
+
+def _month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def _next_month(value):
+    if value.month == 12:
+        return date(value.year + 1, 1, 1)
+    return date(value.year, value.month + 1, 1)
+
+
+def _month_bounds(start, end):
+    """Yield (month_start, next_month_start) pairs covering start..end."""
+    month = _month_start(start)
+    while month <= end:
+        yield month, _next_month(month)
+        month = _next_month(month)
+
+
+def is_partitioned(connection=default_connection):
+    """Return True if the Crypto table is a partitioned table."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE relname = %s", [TABLE]
+        )
+        row = cursor.fetchone()
+
+    return row is not None and row[0] == 'p'
+
+
+def create_crypto_partitions(
+    start=None,
+    months_ahead=2,
+    connection=default_connection,
+):
+    """
+    Create the monthly partitions from start's month up to months_ahead
+    months after the current one. Existing partitions are left alone,
+    rows already in the default partition for a new month are moved to
+    it. Return the names of the partitions created.
+    """
+    today = datetime.now(pytz.UTC).date()
+    end = today
+    for _ in range(months_ahead):
+        end = _next_month(end)
+    start = start or today
+
+    created = []
+    with transaction.atomic(using=connection.alias), \
+            connection.cursor() as cursor:
+        for lower, upper in _month_bounds(start, end):
+            name = f'{TABLE}_{lower:%Y_%m}'
+            cursor.execute("SELECT to_regclass(%s)", [name])
+            if cursor.fetchone()[0] is not None:
+                continue
+            _create_partition(cursor, name, lower, upper)
+            created.append(name)
+
+    return created
+
+
+def _create_partition(cursor, name, lower, upper):
+    """
+    Create the partition name for [lower, upper). PostgreSQL refuses to
+    add a partition while the default one holds rows in its range, so
+    those are moved into the new table before it is attached.
+    """
+    bounds = f"FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+    cursor.execute("SELECT to_regclass(%s)", [DEFAULT_PARTITION])
+    if cursor.fetchone()[0] is None:
+        cursor.execute(
+            f'CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES {bounds}'
+        )
+        return
+
+    cursor.execute(f'CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)')
+    cursor.execute(
+        f'WITH moved AS ('
+        f'DELETE FROM {DEFAULT_PARTITION} '
+        f'WHERE date_and_time >= %s AND date_and_time < %s RETURNING *'
+        f') INSERT INTO {name} SELECT * FROM moved',
+        [lower, upper],
+    )
+    cursor.execute(
+        f'ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES {bounds}'
+    )
+
+
+def _add_constraints(cursor, primary_key):
+    cursor.execute(f'ALTER TABLE {TABLE} ADD PRIMARY KEY ({primary_key})')
+    cursor.execute(
+        f'ALTER TABLE {TABLE} ADD CONSTRAINT {UNIQUE_CONSTRAINT} '
+        f'UNIQUE (symbol, date_and_time)'
+    )
+    cursor.execute(
+        f'CREATE INDEX {BRIN_INDEX} ON {TABLE} USING brin (date_and_time)'
+    )
+
+
+def _swap_table(cursor, partition_clause):
+    """Rebuild the Crypto table with the given PARTITION BY clause."""
+    old = f'{TABLE}_old'
+    cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {old}')
+    cursor.execute(
+        f'CREATE TABLE {TABLE} (LIKE {old} INCLUDING DEFAULTS) '
+        f'{partition_clause}'
+    )
+    if partition_clause:
+        cursor.execute(f'SELECT min(date_and_time) FROM {old}')
+        oldest = cursor.fetchone()[0]
+        create_crypto_partitions(
+            start=oldest.date() if oldest else None,
+            connection=cursor.db,
+        )
+        cursor.execute(
+            f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT'
+        )
+    cursor.execute(f'INSERT INTO {TABLE} SELECT * FROM {old}')
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [old])
+    sequence = cursor.fetchone()[0]
+    if sequence:
+        cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {TABLE}.id')
+    cursor.execute(f'DROP TABLE {old} CASCADE')
+    _add_constraints(
+        cursor, 'id, date_and_time' if partition_clause else 'id',
+    )
+
+
+def partition_crypto_table(connection=default_connection):
+    """
+    Convert the Crypto table into a table range-partitioned by month on
+    date_and_time, copying existing rows. The primary key becomes
+    (id, date_and_time) as PostgreSQL requires the partition key in it.
+    Django cannot model a composite primary key, so the migration state
+    keeps id as the primary key: ids stay unique through their sequence.
+    """
+    if is_partitioned(connection):
+        return
+    with connection.cursor() as cursor:
+        _swap_table(cursor, 'PARTITION BY RANGE (date_and_time)')
+
+
+def unpartition_crypto_table(connection=default_connection):
+    """Convert a partitioned Crypto table back into a plain table."""
+    if not is_partitioned(connection):
+        return
+    with connection.cursor() as cursor:
+        _swap_table(cursor, '')
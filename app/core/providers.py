@@ -0,0 +1,255 @@
+"""
+Market data providers: the live exchange API or a recorded replay.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.dateparse import parse_datetime
+
+import redis
+
+from core.cache import get_redis
+from core.marketdata import get_client
+
+
+CANDLE_COLUMNS = ['low', 'high', 'open', 'close', 'volume']
+NOT_FOUND = {'message': 'NotFound'}
+REPLAY_KEY_PREFIX = 'marketdata:replay:'
+
+
+logger = logging.getLogger(__name__)
+
+
+class Provider:
+    """
+    Source of ticker and candle payloads in the exchange API format.
+    Both methods return (json, status code).
+    """
+
+    def ticker(self, symbol, timeout=None):
+        """Return the latest ticker of symbol."""
+        raise NotImplementedError
+
+    def candles(self, symbol, start, end, granularity=60, timeout=None):
+        """
+        Return the [time, low, high, open, close, volume] rows of symbol
+        starting in [start, end), newest first.
+        """
+        raise NotImplementedError
+
+
+class CoinbaseProvider(Provider):
+    """Live data from the exchange API through the shared client."""
+
+    def __init__(self, client=None):
+        self.client = client
+
+    def _get(self, symbol, path, params=None, timeout=None):
+        res = (self.client or get_client()).get(
+            f'products/{symbol}/{path}', params=params, timeout=timeout,
+        )
+        return res.json(), res.status_code
+
+    def ticker(self, symbol, timeout=None):
+        return self._get(symbol, 'ticker', timeout=timeout)
+
+    def candles(self, symbol, start, end, granularity=60, timeout=None):
+        rows, status = self._get(
+            symbol,
+            'candles',
+            params={
+                'start': start.isoformat(),
+                'end': end.isoformat(),
+                'granularity': str(granularity),
+            },
+            timeout=timeout,
+        )
+        if status != 200:
+            return rows, status
+
+        # The API also answers the candle starting exactly at end.
+        start_ts, end_ts = start.timestamp(), end.timestamp()
+        return [row for row in rows if start_ts <= row[0] < end_ts], status
+
+
+def _read_ndjson(path):
+    """Yield the records of a plain or gzip compressed NDJSON file."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _read_parquet(path):
+    """Yield the rows of a Parquet file as records (needs pyarrow)."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImproperlyConfigured('Replaying Parquet requires pyarrow.')
+
+    for record in pq.read_table(path).to_pylist():
+        yield {k: v for k, v in record.items() if v is not None}
+
+
+def read_recording(path):
+    """
+    Read recorded market data, one record per line or row:
+
+        {"type": "ticker", "symbol": ..., "time": ISO 8601, "price": ...,
+         "bid": ..., "ask": ..., "volume": ..., "trade_id": ...}
+        {"type": "candle", "symbol": ..., "time": unix seconds,
+         "low": ..., "high": ..., "open": ..., "close": ..., "volume": ...}
+
+    Return ({symbol: sorted [(time, ticker payload)]},
+    {symbol: sorted [(time, candle row)]}).
+    """
+    records = _read_parquet(path) if path.endswith('.parquet') \
+        else _read_ndjson(path)
+
+    ticks, candles = defaultdict(list), defaultdict(list)
+    for record in records:
+        symbol = record.pop('symbol')
+        if record.pop('type') == 'candle':
+            row = [record['time']] + [record[c] for c in CANDLE_COLUMNS]
+            candles[symbol].append((record['time'], row))
+        else:
+            ts = parse_datetime(record['time']).timestamp()
+            ticks[symbol].append((ts, record))
+
+    for series in (*ticks.values(), *candles.values()):
+        series.sort(key=lambda item: item[0])
+
+    return dict(ticks), dict(candles)
+
+
+class ReplayProvider(Provider):
+    """
+    Recorded data played back `speed` times faster than real time.
+
+    Recording time runs from the first recorded record, starting when
+    the replay started; the tickers and candles served are the ones
+    recorded up to that point. Payloads keep their recorded times.
+    A shared replay takes its start from the clock in Redis (see
+    replay_started_at) and rejoins it once the replay is over.
+    """
+
+    def __init__(self, path, speed=1.0, started_at=None, shared=False):
+        self.path = path
+        self.speed = speed
+        self.shared = shared
+        ticks, candles = read_recording(path)
+        self.ticks = {s: self._split(series) for s, series in ticks.items()}
+        self.rows = {s: self._split(series) for s, series in candles.items()}
+        series = [*self.ticks.values(), *self.rows.values()]
+        if not series:
+            raise ImproperlyConfigured(
+                f'Recording {path} holds no tickers or candles.'
+            )
+        self.origin = min(times[0] for times, _ in series)
+        # Wall clock seconds the whole replay lasts.
+        self.duration = (
+            max(times[-1] for times, _ in series) - self.origin
+        ) / speed
+        if shared:
+            self.started_at = replay_started_at(path, self.duration)
+        else:
+            self.started_at = started_at or time.time()
+
+    @staticmethod
+    def _split(series):
+        return [t for t, _ in series], [item for _, item in series]
+
+    def recording_time(self, timestamp):
+        """Map a wall clock unix timestamp to recording time."""
+        return self.origin + (timestamp - self.started_at) * self.speed
+
+    def _follow_clock(self):
+        """Rejoin the shared clock once this process's replay is over."""
+        if self.shared and time.time() - self.started_at > self.duration:
+            self.started_at = replay_started_at(self.path, self.duration)
+
+    def ticker(self, symbol, timeout=None):
+        self._follow_clock()
+        times, payloads = self.ticks.get(symbol, ([], []))
+        i = bisect_right(times, self.recording_time(time.time()))
+        if not i:
+            return NOT_FOUND, 404
+        return payloads[i - 1], 200
+
+    def candles(self, symbol, start, end, granularity=60, timeout=None):
+        if symbol not in self.rows:
+            return NOT_FOUND, 404
+        self._follow_clock()
+        times, rows = self.rows[symbol]
+        until = min(
+            self.recording_time(end.timestamp()),
+            self.recording_time(time.time()),
+        )
+        lo = bisect_left(times, self.recording_time(start.timestamp()))
+        hi = bisect_left(times, until)
+        return rows[lo:hi][::-1], 200
+
+
+def replay_started_at(path, duration):
+    """
+    Return the wall clock time the replay of path started at, shared
+    through Redis so every worker process replays on the same clock.
+    The first process to ask starts it; the clock is dropped once the
+    replay lasting duration seconds is over, so the next run restarts.
+    """
+    now = time.time()
+    key = REPLAY_KEY_PREFIX + hashlib.sha256(path.encode()).hexdigest()
+    try:
+        client = get_redis()
+        client.set(key, now, nx=True, ex=math.ceil(duration) + 60)
+        return float(client.get(key))
+    except redis.RedisError as exc:
+        logger.error(f"replay clock unavailable, starting locally: {exc}")
+        return now
+
+
+def _replay():
+    path = settings.MARKET_DATA_REPLAY_PATH
+    if not path:
+        raise ImproperlyConfigured(
+            'MARKET_DATA_REPLAY_PATH is required by the replay provider.'
+        )
+    return ReplayProvider(
+        path, settings.MARKET_DATA_REPLAY_SPEED, shared=True,
+    )
+
+
+PROVIDERS = {
+    'coinbase': CoinbaseProvider,
+    'replay': _replay,
+}
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """Return the process wide provider named by MARKET_DATA_PROVIDER."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            try:
+                factory = PROVIDERS[settings.MARKET_DATA_PROVIDER]
+            except KeyError:
+                raise ImproperlyConfigured(
+                    f'Unknown MARKET_DATA_PROVIDER '
+                    f'{settings.MARKET_DATA_PROVIDER!r}.'
+                )
+            _provider = factory()
+
+    return _provider
@@ -0,0 +1,16 @@
+"""
+Notify every process of changes to the symbol registry.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Symbol
+from core.symbols import registry
+
+
+@receiver(post_save, sender=Symbol)
+@receiver(post_delete, sender=Symbol)
+def symbols_changed(sender, **kwargs):
+    """Reload the registry once the change is committed."""
+    transaction.on_commit(registry.changed)
@@ -0,0 +1,100 @@
+"""
+In-process registry of the tradable symbols.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+import redis
+
+from core.cache import get_redis
+from core.models import Symbol
+
+
+VERSION_KEY = 'symbols:version'
+
+
+logger = logging.getLogger(__name__)
+
+
+class SymbolRegistry:
+    """
+    Cached {name: Symbol} mapping of every registered symbol.
+
+    Saving or deleting a Symbol bumps a version counter in Redis (see
+    core.signals); each process compares it with the version it loaded
+    at most every SYMBOL_CACHE_TTL seconds and reloads on a change.
+    Without Redis the symbols are reloaded every SYMBOL_CACHE_TTL.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = settings.SYMBOL_CACHE_TTL if ttl is None else ttl
+        self.symbols = None
+        self.version = None
+        self.checked_at = None
+        self.lock = threading.Lock()
+
+    def _remote_version(self):
+        """Return the version in Redis, or None if unreachable."""
+        try:
+            return get_redis().get(VERSION_KEY) or b'0'
+        except redis.RedisError as exc:
+            logger.warning(f"symbol version check failed: {exc}")
+            return None
+
+    def _load(self):
+        now = time.monotonic()
+        if self.symbols is not None and now - self.checked_at < self.ttl:
+            return self.symbols
+
+        version = self._remote_version()
+        if (
+            self.symbols is None
+            or version is None
+            or version != self.version
+        ):
+            self.symbols = {s.name: s for s in Symbol.objects.all()}
+            self.version = version
+        self.checked_at = now
+
+        return self.symbols
+
+    def all(self):
+        """Return {name: Symbol} of every registered symbol."""
+        with self.lock:
+            return self._load()
+
+    def get(self, name):
+        """Return the Symbol called name, or None."""
+        return self.all().get(name)
+
+    def active(self):
+        """Return the names of the active symbols."""
+        return [name for name, s in self.all().items() if s.is_active]
+
+    def is_active(self, name):
+        symbol = self.get(name)
+        return symbol is not None and symbol.is_active
+
+    def clear(self):
+        """Forget the cached symbols of this process."""
+        with self.lock:
+            self.symbols = None
+
+    def changed(self):
+        """Reload here and notify the other processes of a change."""
+        self.clear()
+        try:
+            get_redis().incr(VERSION_KEY)
+        except redis.RedisError as exc:
+            logger.warning(f"symbol change notification failed: {exc}")
+
+
+registry = SymbolRegistry()
+
+
+def active_symbols():
+    """Return the names of the symbols to poll, ingest and trade."""
+    return registry.active()
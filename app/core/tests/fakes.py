@@ -0,0 +1,88 @@
+"""
+In-memory stand-ins shared by the tests.
+"""
+from core import locks
+
+
+def _encode(value):
+    """Store value as bytes, as Redis returns it."""
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode()
+
+
+def _release(redis, keys, args):
+    if redis.store.get(keys[0]) == _encode(args[0]):
+        return redis.delete(keys[0])
+    return 0
+
+
+# Lua scripts the fake can run, by source.
+SCRIPTS = {
+    locks.RELEASE_SCRIPT: _release,
+}
+
+
+class FakeRedis:
+    """
+    Minimal in-memory stand-in for the Redis commands the app uses.
+    Pipelines run every command at once; expiry is ignored.
+    """
+
+    def __init__(self):
+        self.store = {}
+        self.hashes = {}
+        self.published = []
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        pass
+
+    def get(self, name):
+        return self.store.get(name)
+
+    def set(self, name, value, nx=False, px=None, ex=None):
+        if nx and name in self.store:
+            return None
+        self.store[name] = _encode(value)
+        return True
+
+    def exists(self, name):
+        return int(name in self.store)
+
+    def delete(self, *names):
+        return sum(self.store.pop(name, None) is not None for name in names)
+
+    def incr(self, name):
+        self.store[name] = _encode(int(self.store.get(name, 0)) + 1)
+        return int(self.store[name])
+
+    def hset(self, name, mapping):
+        self.hashes.setdefault(name, {}).update(
+            {_encode(k): _encode(v) for k, v in mapping.items()}
+        )
+
+    def hmget(self, name, keys):
+        values = self.hashes.get(name, {})
+        return [values.get(_encode(k)) for k in keys]
+
+    def hgetall(self, name):
+        return dict(self.hashes.get(name, {}))
+
+    def hincrby(self, name, key, amount):
+        counters = self.hashes.setdefault(name, {})
+        counters[_encode(key)] = _encode(
+            int(counters.get(_encode(key), 0)) + amount
+        )
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+    def register_script(self, script):
+        def run(keys, args):
+            return SCRIPTS[script](self, keys, args)
+
+        run.registered_client = self
+        return run
@@ -0,0 +1,127 @@
+"""
+Tests for the paginated candle backfill against a local stub API.
+"""
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+from django.test import SimpleTestCase
+
+import pytz
+
+from core import backfill
+from core.marketdata import MarketDataClient
+from core.providers import CoinbaseProvider
+
+
+START = datetime(2023, 1, 1, tzinfo=pytz.UTC)
+
+
+class StubCandlesHandler(BaseHTTPRequestHandler):
+    """Serve minute candles for any [start, end] window like the API."""
+    failures = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        start = datetime.fromisoformat(query['start'][0])
+        end = datetime.fromisoformat(query['end'][0])
+        granularity = int(query['granularity'][0])
+
+        with self.lock:
+            remaining = self.failures.get(query['start'][0], 0)
+            if remaining:
+                self.failures[query['start'][0]] = remaining - 1
+        if remaining:
+            self.send_response(500)
+            self.end_headers()
+            return
+
+        rows = []
+        ts = int(end.timestamp())
+        while ts >= start.timestamp():
+            rows.append([ts, 1.0, 2.0, 1.5, 1.7, 10.0])
+            ts -= granularity
+        body = json.dumps(rows).encode()
+
+        self.send_response(200)
+        self.send_header('content-type', 'application/json')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class BackfillTests(SimpleTestCase):
+    """Test the backfill engine."""
+
+    def setUp(self):
+        StubCandlesHandler.failures = {}
+        patcher = patch(
+            'core.marketdata.consume', return_value=(True, 0.0),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubCandlesHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}/'
+        self.provider = CoinbaseProvider(MarketDataClient(
+            self.base_url, backoff=0, rate_limit=(1000, 1000),
+        ))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_split_pages(self):
+        """Test a range is split into 300 candle pages."""
+        pages = list(backfill.split_pages(START, START + timedelta(days=1)))
+
+        self.assertEqual(len(pages), 5)
+        self.assertEqual(pages[0], (START, START + timedelta(minutes=300)))
+        self.assertEqual(pages[-1][1], START + timedelta(days=1))
+
+    def test_backfill_fetches_every_candle_once(self):
+        """Test a month of minute candles is fetched without gaps."""
+        end = START + timedelta(days=30)
+
+        rows = backfill.backfill(
+            'BTC-USD', START, end, workers=16, provider=self.provider,
+        )
+
+        times = [row[0] for row in rows]
+        self.assertEqual(len(times), 30 * 24 * 60)
+        self.assertEqual(times, sorted(set(times)))
+        self.assertEqual(times[0], START.timestamp())
+
+    def test_backfill_retries_failed_pages(self):
+        """Test a failing page is retried on its own."""
+        second_page = START + timedelta(minutes=300)
+        StubCandlesHandler.failures = {second_page.isoformat(): 2}
+
+        rows = backfill.backfill(
+            'BTC-USD', START, START + timedelta(days=1),
+            provider=self.provider,
+        )
+
+        self.assertEqual(len(rows), 24 * 60)
+        failures = StubCandlesHandler.failures
+        self.assertEqual(failures[second_page.isoformat()], 0)
+
+    def test_backfill_raises_when_retries_exhausted(self):
+        """Test BackfillError lists pages that never succeeded."""
+        StubCandlesHandler.failures = {START.isoformat(): 10}
+
+        with self.assertRaises(backfill.BackfillError) as ctx:
+            backfill.backfill(
+                'BTC-USD', START, START + timedelta(days=1),
+                provider=CoinbaseProvider(
+                    MarketDataClient(self.base_url, retries=1, backoff=0),
+                ),
+            )
+
+        self.assertEqual(ctx.exception.failed_pages[0][0], START)
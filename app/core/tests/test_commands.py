@@ -2,6 +2,9 @@
 Test Django Custom management commands
 """
 
+from datetime import datetime
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2Error
@@ -12,7 +15,10 @@ from django.test import (
     TestCase,
     SimpleTestCase,
 )
-from core.models import Crypto
+from core.backfill import BackfillError
+from core.models import Crypto, Order
+
+import pytz
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -44,11 +50,171 @@ class CommandDBTests(SimpleTestCase):
 class CommandCryptoTests(TestCase):
     """Test Populate Crypto table command."""
 
-    def test_command_run_successfully(self, patched_check):
+    @patch('core.backfill.get_provider')
+    def test_command_run_successfully(self, patched_provider, patched_check):
         """Test command run successfully"""
 
         patched_check.return_value = True
-
-        call_command('populate_crypto_tables')
-
-        self.assertNotEqual(Crypto.objects.all().count(), 0)
+        patched_provider.return_value.candles.side_effect = (
+            lambda symbol, start, end, granularity: (
+                [[int(start.timestamp()), 1.0, 2.0, 1.5, 1.7, 10.0]], 200,
+            )
+        )
+
+        call_command(
+            'populate_crypto_tables', '--window-days', '1', stdout=StringIO(),
+        )
+
+        # One candle per 300-minute page: 5 pages a day for each symbol.
+        self.assertEqual(Crypto.objects.all().count(), 15)
+
+    @patch('core.management.commands.populate_crypto_tables.get_data_from_api')
+    def test_command_bulk_inserts_in_batches(self, patched_api, patched_check):
+        """Test candles are written for every symbol in batches."""
+        patched_api.return_value = [
+            [
+                [1674259200 - 60 * (i + page), 1.0, 2.0, 1.5, 1.7, 10.0]
+                for i in range(5)
+            ]
+            for page in range(0, 25, 5)
+        ]
+
+        call_command('populate_crypto_tables', '--batch-size', '10')
+
+        self.assertEqual(patched_api.call_count, 3)
+        self.assertEqual(Crypto.objects.count(), 75)
+        self.assertEqual(Crypto.objects.filter(symbol='BTC-USD').count(), 25)
+
+    @patch('core.management.commands.populate_crypto_tables.get_data_from_api')
+    def test_command_incremental_upserts_gap(self, patched_api, patched_check):
+        """Test incremental mode keeps rows and upserts from the latest."""
+        latest = datetime(2023, 1, 21, 0, 0, tzinfo=pytz.UTC)
+        Crypto.objects.create(
+            date_and_time=latest,
+            low=1.0,
+            high=2.0,
+            open=1.5,
+            close=1.6,
+            volume=5.0,
+            symbol='BTC-USD',
+        )
+        timestamp = int(latest.timestamp())
+        patched_api.return_value = [[
+            [timestamp + 60, 1.0, 2.0, 1.5, 1.8, 10.0],
+            [timestamp, 1.0, 2.0, 1.5, 1.7, 10.0],
+        ]]
+
+        call_command('populate_crypto_tables', '--incremental')
+
+        starts = {
+            c.args[0]: c.kwargs['start_datetime']
+            for c in patched_api.call_args_list
+        }
+        self.assertEqual(starts['BTC-USD'], latest)
+        self.assertIsNone(starts['ETH-USD'])
+        self.assertEqual(Crypto.objects.count(), 6)
+        updated = Crypto.objects.get(symbol='BTC-USD', date_and_time=latest)
+        self.assertEqual(updated.close, Decimal('1.7'))
+
+    @patch('core.management.commands.populate_crypto_tables.get_data_from_api')
+    def test_command_failed_pages_reported(self, patched_api, patched_check):
+        """Test a failed backfill keeps its pages and the other symbols."""
+        timestamp = 1674259200
+        failed_page = (
+            datetime.fromtimestamp(timestamp - 3600, pytz.UTC),
+            datetime.fromtimestamp(timestamp, pytz.UTC),
+        )
+
+        def pages(symbol, **kwargs):
+            yield [[timestamp, 1.0, 2.0, 1.5, 1.7, 10.0]]
+            if symbol == 'ETH-USD':
+                raise BackfillError(symbol, [failed_page])
+
+        patched_api.side_effect = pages
+        err = StringIO()
+
+        call_command(
+            'populate_crypto_tables', stdout=StringIO(), stderr=err,
+        )
+
+        self.assertEqual(Crypto.objects.count(), 3)
+        report = err.getvalue()
+        self.assertIn('ETH-USD: 1 rows written, 1 page(s) failed', report)
+        self.assertIn(failed_page[0].isoformat(), report)
+        self.assertIn('1 symbol(s) incomplete (ETH-USD)', report)
+
+    @patch(
+        'core.management.commands.populate_crypto_tables.active_symbols',
+        return_value=[],
+    )
+    def test_command_without_active_symbols(
+        self, patched_symbols, patched_check
+    ):
+        """Test nothing is deleted or fetched when no symbol is active."""
+        Crypto.objects.create(
+            date_and_time=datetime(2023, 1, 21, tzinfo=pytz.UTC),
+            low=1.0, high=2.0, open=1.5, close=1.6, volume=5.0,
+            symbol='BTC-USD',
+        )
+        out = StringIO()
+
+        call_command('populate_crypto_tables', stdout=out)
+
+        self.assertIn('No active symbols', out.getvalue())
+        self.assertEqual(Crypto.objects.count(), 1)
+
+
+class CommandOrderBenchmarkTests(TestCase):
+    """Test the Order query benchmark command."""
+
+    def test_benchmark_explains_and_rolls_back(self):
+        """Test plans are printed and the synthetic data is discarded."""
+        out = StringIO()
+
+        call_command(
+            'benchmark_order_queries',
+            orders=500,
+            users=3,
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn('Seeded 500 orders for 3 users', output)
+        self.assertIn('Order list, first page', output)
+        self.assertIn('Execution Time', output)
+        self.assertFalse(Order.objects.exists())
+
+    def test_benchmark_keep(self):
+        """Test --keep commits the synthetic orders."""
+        call_command(
+            'benchmark_order_queries',
+            orders=100,
+            users=2,
+            open_ratio=1.0,
+            keep=True,
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(
+            Order.objects.filter(close_date_time__isnull=True).count(), 100,
+        )
+
+
+class CommandTaskMetricsTests(SimpleTestCase):
+    """Test the task run counters command."""
+
+    @patch('core.management.commands.task_metrics.task_metrics')
+    def test_metrics_printed(self, patched_metrics):
+        """Test every counter is printed, sorted by name."""
+        patched_metrics.return_value = {
+            'get_minute_data.late': 2,
+            'get_intra_minute_data.skipped': 1,
+        }
+        out = StringIO()
+
+        call_command('task_metrics', stdout=out)
+
+        self.assertEqual(
+            out.getvalue().splitlines(),
+            ['get_intra_minute_data.skipped 1', 'get_minute_data.late 2'],
+        )
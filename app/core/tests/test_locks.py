@@ -0,0 +1,78 @@
+"""
+Tests for the task locks and run counters.
+"""
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+import redis
+
+from core import locks
+from core.tests.fakes import FakeRedis
+
+
+class LockTests(SimpleTestCase):
+    """Test locks, idempotency keys and counters."""
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = patch('core.locks.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lock_exclusive(self):
+        """Test a held lock is not handed out twice."""
+        token = locks.acquire_lock('poll:BTC-USD', 60)
+
+        self.assertIsNotNone(token)
+        self.assertIsNone(locks.acquire_lock('poll:BTC-USD', 60))
+
+        locks.release_lock('poll:BTC-USD', token)
+        self.assertIsNotNone(locks.acquire_lock('poll:BTC-USD', 60))
+
+    def test_release_by_other_holder_ignored(self):
+        """Test a stale token cannot release a lock taken over since."""
+        locks.acquire_lock('poll:BTC-USD', 60)
+
+        locks.release_lock('poll:BTC-USD', 'stale')
+
+        self.assertIsNone(locks.acquire_lock('poll:BTC-USD', 60))
+
+    def test_claim_once(self):
+        """Test an idempotency key is only claimed once."""
+        self.assertTrue(locks.claim('poll:BTC-USD:7', 30))
+        self.assertFalse(locks.claim('poll:BTC-USD:7', 30))
+        self.assertTrue(locks.claim('poll:BTC-USD:8', 30))
+
+    def test_guarded_releases_locks(self):
+        """Test guarded locks symbols only while the block runs."""
+        with locks.guarded('poll', ['BTC-USD'], 7) as free:
+            self.assertEqual(free, ['BTC-USD'])
+            self.assertIsNone(locks.acquire_lock('poll:BTC-USD', 60))
+
+        self.assertIsNotNone(locks.acquire_lock('poll:BTC-USD', 60))
+
+    def test_only_polled_symbols_skipped(self):
+        """Test a symbol not marked polled is let through again."""
+        with locks.guarded('poll', ['BTC-USD', 'ETH-USD'], 7) as free:
+            locks.mark_polled('poll', free[:1], 7, 30)
+
+        with locks.guarded('poll', ['BTC-USD', 'ETH-USD'], 7) as free:
+            self.assertEqual(free, ['ETH-USD'])
+
+    def test_counters(self):
+        """Test events are counted per task."""
+        locks.count('poll', 'late')
+        locks.count('poll', 'late')
+        locks.count('poll', 'skipped')
+
+        self.assertEqual(
+            locks.task_metrics(), {'poll.late': 2, 'poll.skipped': 1},
+        )
+
+    def test_count_without_redis(self):
+        """Test counting never fails the task."""
+        with patch(
+            'core.locks.get_redis', side_effect=redis.ConnectionError,
+        ):
+            locks.count('poll', 'late')
@@ -0,0 +1,174 @@
+"""
+Tests for the market data client.
+"""
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+import redis
+import requests
+
+from core import marketdata
+
+
+def response(status_code, headers=None):
+    """Return a stub response with status_code."""
+    return MagicMock(status_code=status_code, headers=headers or {})
+
+
+@patch('core.marketdata.time.sleep')
+class MarketDataClientTests(SimpleTestCase):
+    """Test timeouts, retries and the circuit breaker."""
+
+    def setUp(self):
+        patcher = patch(
+            'core.marketdata.consume', return_value=(True, 0.0),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = marketdata.MarketDataClient(
+            'https://example.com/',
+            timeout=(1, 2),
+            retries=2,
+            rate_limit=(1000, 1000),
+            breaker=(3, 30),
+        )
+        self.client.session = MagicMock()
+        self.get = self.client.session.get
+
+    def test_request_has_timeouts(self, patched_sleep):
+        """Test every request is sent with connect and read timeouts."""
+        self.get.return_value = response(200)
+
+        res = self.client.get('products/BTC-USD/ticker')
+
+        self.assertEqual(res.status_code, 200)
+        self.get.assert_called_once_with(
+            'https://example.com/products/BTC-USD/ticker',
+            params=None,
+            timeout=(1, 2),
+        )
+        patched_sleep.assert_not_called()
+
+    def test_retries_server_errors(self, patched_sleep):
+        """Test 5xx answers and timeouts are retried with backoff."""
+        self.get.side_effect = [
+            response(502),
+            requests.Timeout('timed out'),
+            response(200),
+        ]
+
+        res = self.client.get('products/BTC-USD/ticker')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.get.call_count, 3)
+        self.assertEqual(patched_sleep.call_count, 2)
+        for call in patched_sleep.call_args_list:
+            self.assertLessEqual(call.args[0], self.client.max_backoff)
+
+    def test_client_errors_not_retried(self, patched_sleep):
+        """Test a 404 is returned at once."""
+        self.get.return_value = response(404)
+
+        res = self.client.get('products/ASDASD/ticker')
+
+        self.assertEqual(res.status_code, 404)
+        self.assertEqual(self.get.call_count, 1)
+
+    def test_rate_limited_waits_retry_after(self, patched_sleep):
+        """Test a 429 waits at least as long as the API asks."""
+        self.get.side_effect = [
+            response(429, {'Retry-After': '5'}),
+            response(200),
+        ]
+
+        self.client.get('products/BTC-USD/ticker')
+
+        self.assertGreaterEqual(patched_sleep.call_args.args[0], 5)
+
+    def test_retry_after_capped(self, patched_sleep):
+        """Test a huge, negative or unparsable Retry-After is bounded."""
+        for value in ('3600', '-10', 'Wed, 21 Oct 2015 07:28:00 GMT'):
+            self.get.side_effect = [
+                response(429, {'Retry-After': value}),
+                response(200),
+            ]
+
+            self.client.get('products/BTC-USD/ticker')
+
+            delay = patched_sleep.call_args.args[0]
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, self.client.max_backoff)
+
+    def test_transport_errors_raised_when_exhausted(self, patched_sleep):
+        """Test the last connection error is raised after all retries."""
+        self.get.side_effect = requests.ConnectionError('refused')
+
+        with self.assertRaises(requests.ConnectionError):
+            self.client.get('products/BTC-USD/ticker')
+
+        self.assertEqual(self.get.call_count, 3)
+
+    @patch('core.marketdata.time.monotonic')
+    def test_circuit_opens_and_recovers(self, patched_monotonic, _):
+        """Test a failing API is not called until the reset timeout."""
+        patched_monotonic.return_value = 100.0
+        self.get.side_effect = requests.ConnectionError('refused')
+        with self.assertRaises(requests.ConnectionError):
+            self.client.get('products/BTC-USD/ticker')
+
+        with self.assertRaises(marketdata.CircuitOpenError):
+            self.client.get('products/BTC-USD/ticker')
+        self.assertEqual(self.get.call_count, 3)
+
+        patched_monotonic.return_value = 130.0
+        self.get.side_effect = None
+        self.get.return_value = response(200)
+        res = self.client.get('products/BTC-USD/ticker')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(self.client.breaker.allow())
+
+
+class TokenBucketTests(SimpleTestCase):
+    """Test the client side rate limit."""
+
+    @patch('core.marketdata.time.sleep')
+    @patch('core.marketdata.time.monotonic')
+    def test_waits_for_refill(self, patched_monotonic, patched_sleep):
+        """Test calls past the burst wait for the next token."""
+        patched_monotonic.return_value = 0.0
+        bucket = marketdata.TokenBucket(capacity=2, rate=4)
+
+        def advance(seconds):
+            patched_monotonic.return_value += seconds
+
+        patched_sleep.side_effect = advance
+        for _ in range(3):
+            bucket.acquire()
+
+        patched_sleep.assert_called_once_with(0.25)
+
+    @patch('core.marketdata.time.sleep')
+    @patch('core.marketdata.consume')
+    def test_shared_bucket_in_redis(self, patched_consume, patched_sleep):
+        """Test tokens are taken from the bucket every process shares."""
+        patched_consume.side_effect = [(False, 0.5), (True, 0.0)]
+        bucket = marketdata.TokenBucket(capacity=2, rate=4, key='bucket')
+
+        bucket.acquire()
+
+        patched_consume.assert_called_with('bucket', 2, 4)
+        patched_sleep.assert_called_once_with(0.5)
+
+    @patch('core.marketdata.time.sleep')
+    @patch('core.marketdata.consume', side_effect=redis.ConnectionError)
+    def test_local_bucket_without_redis(self, patched_consume, patched_sleep):
+        """Test the process keeps its own bucket while Redis is down."""
+        bucket = marketdata.TokenBucket(capacity=2, rate=4, key='bucket')
+
+        bucket.acquire()
+        bucket.acquire()
+
+        self.assertLess(bucket.tokens, 1)
+        patched_sleep.assert_not_called()
@@ -0,0 +1,82 @@
+"""
+Tests for the Crypto table partitioning helpers.
+"""
+from datetime import datetime, timedelta
+
+from django.db import connection
+from django.test import TestCase
+
+import pytz
+
+from app import tasks
+from core import partitions
+from core.models import Crypto
+
+
+def create_candle(date_and_time, symbol='BTC-USD'):
+    """Create and return a sample candle."""
+    return Crypto.objects.create(
+        date_and_time=date_and_time,
+        low=1.0,
+        high=2.0,
+        open=1.5,
+        close=1.7,
+        volume=10.0,
+        symbol=symbol,
+    )
+
+
+class PartitionTests(TestCase):
+    """Test converting the Crypto table to and from partitions."""
+
+    def test_partition_and_unpartition_keep_rows(self):
+        """Test rows survive a round trip through partitioning."""
+        create_candle(datetime(2023, 1, 20, tzinfo=pytz.UTC))
+        create_candle(datetime(2023, 3, 5, tzinfo=pytz.UTC))
+
+        partitions.partition_crypto_table()
+
+        self.assertTrue(partitions.is_partitioned())
+        self.assertEqual(Crypto.objects.count(), 2)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_inherits "
+                "WHERE inhparent = 'core_crypto'::regclass"
+            )
+            self.assertGreater(cursor.fetchone()[0], 3)
+
+        create_candle(datetime(2023, 2, 1, tzinfo=pytz.UTC))
+        partitions.unpartition_crypto_table()
+
+        self.assertFalse(partitions.is_partitioned())
+        self.assertEqual(Crypto.objects.count(), 3)
+
+    def test_create_partitions_is_idempotent(self):
+        """Test partitions that already exist are not recreated."""
+        partitions.partition_crypto_table()
+
+        created = partitions.create_crypto_partitions(months_ahead=3)
+
+        self.assertEqual(len(created), 1)
+        again = partitions.create_crypto_partitions(months_ahead=3)
+        self.assertEqual(again, [])
+
+    def test_default_partition_rows_moved(self):
+        """Test a new month takes over rows already in the default one."""
+        partitions.partition_crypto_table()
+        later = datetime.now(pytz.UTC) + timedelta(days=120)
+        create_candle(later)
+
+        created = partitions.create_crypto_partitions(months_ahead=5)
+
+        self.assertIn(f'core_crypto_{later:%Y_%m}', created)
+        self.assertEqual(Crypto.objects.get().date_and_time, later)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM core_crypto_{later:%Y_%m}')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('SELECT count(*) FROM core_crypto_default')
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_scheduled_task_skips_plain_table(self):
+        """Test the daily task leaves an unpartitioned table alone."""
+        self.assertEqual(tasks.create_upcoming_partitions(), [])
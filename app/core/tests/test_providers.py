@@ -0,0 +1,221 @@
+"""
+Tests for the market data providers.
+"""
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+import pytz
+import redis
+
+from core import providers
+
+
+ORIGIN = datetime(2023, 1, 13, 14, 0, tzinfo=pytz.UTC).timestamp()
+
+
+def write_recording(path, records):
+    """Write records as gzip compressed NDJSON."""
+    with gzip.open(path, 'wt') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def candle(symbol, minute, close):
+    return {
+        'type': 'candle',
+        'symbol': symbol,
+        'time': ORIGIN + minute * 60,
+        'low': close, 'high': close, 'open': close, 'close': close,
+        'volume': '1.0',
+    }
+
+
+def tick(symbol, second, price):
+    return {
+        'type': 'ticker',
+        'symbol': symbol,
+        'time': datetime.fromtimestamp(ORIGIN + second, pytz.UTC).isoformat(),
+        'price': price,
+        'trade_id': second,
+    }
+
+
+class CoinbaseProviderTests(SimpleTestCase):
+    """Test the live API provider."""
+
+    def test_candles_inside_window(self):
+        """Test the candle starting at the window end is left out."""
+        client = MagicMock()
+        client.get.return_value.status_code = 200
+        client.get.return_value.json.return_value = [
+            [ORIGIN + 60, 1, 1, 1, 1, 1],
+            [ORIGIN, 1, 1, 1, 1, 1],
+        ]
+        start = datetime.fromtimestamp(ORIGIN, pytz.UTC)
+        end = datetime.fromtimestamp(ORIGIN + 60, pytz.UTC)
+
+        rows, status = providers.CoinbaseProvider(client).candles(
+            'BTC-USD', start, end, timeout=5,
+        )
+
+        self.assertEqual(status, 200)
+        self.assertEqual([row[0] for row in rows], [ORIGIN])
+        self.assertEqual(client.get.call_args.kwargs['timeout'], 5)
+
+
+@patch('core.providers.time.time')
+class ReplayProviderTests(SimpleTestCase):
+    """Test recorded data is played back on a sped up clock."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'recording.ndjson.gz')
+        write_recording(self.path, [
+            candle('BTC-USD', 2, '3.0'),
+            candle('BTC-USD', 0, '1.0'),
+            candle('BTC-USD', 1, '2.0'),
+            tick('BTC-USD', 0, '100.0'),
+            tick('BTC-USD', 90, '101.0'),
+        ])
+
+    def replay(self, speed=60):
+        return providers.ReplayProvider(self.path, speed, started_at=1000.0)
+
+    def test_ticker_follows_replay_clock(self, patched_time):
+        """Test the latest tick recorded up to the replay clock is served."""
+        provider = self.replay()
+
+        patched_time.return_value = 1001.0
+        self.assertEqual(provider.ticker('BTC-USD')[0]['price'], '100.0')
+
+        patched_time.return_value = 1001.5
+        payload, status = provider.ticker('BTC-USD')
+        self.assertEqual(status, 200)
+        self.assertEqual(payload['price'], '101.0')
+        self.assertNotIn('symbol', payload)
+
+    def test_candles_of_sped_up_window(self, patched_time):
+        """Test a wall clock window covers speed times more candles."""
+        provider = self.replay()
+        patched_time.return_value = 1010.0
+
+        rows, status = provider.candles(
+            'BTC-USD',
+            datetime.fromtimestamp(1000, pytz.UTC),
+            datetime.fromtimestamp(1002, pytz.UTC),
+        )
+
+        self.assertEqual(status, 200)
+        self.assertEqual([row[4] for row in rows], ['2.0', '1.0'])
+
+    def test_future_candles_not_served(self, patched_time):
+        """Test candles past the replay clock are held back."""
+        provider = self.replay()
+        patched_time.return_value = 1001.5
+
+        rows, _ = provider.candles(
+            'BTC-USD',
+            datetime.fromtimestamp(900, pytz.UTC),
+            datetime.fromtimestamp(1100, pytz.UTC),
+        )
+
+        self.assertEqual([row[0] for row in rows], [ORIGIN + 60, ORIGIN])
+
+    def test_unknown_symbol(self, patched_time):
+        """Test symbols missing from the recording answer 404."""
+        patched_time.return_value = 1010.0
+        provider = self.replay()
+
+        self.assertEqual(provider.ticker('ETH-USD')[1], 404)
+        self.assertEqual(
+            provider.candles(
+                'ETH-USD',
+                datetime.fromtimestamp(1000, pytz.UTC),
+                datetime.fromtimestamp(1002, pytz.UTC),
+            )[1],
+            404,
+        )
+
+
+class ProviderSettingTests(SimpleTestCase):
+    """Test the provider is picked by MARKET_DATA_PROVIDER."""
+
+    def setUp(self):
+        providers._provider = None
+        self.addCleanup(setattr, providers, '_provider', None)
+
+    def test_default_is_coinbase(self):
+        """Test the live API is used by default."""
+        self.assertIsInstance(
+            providers.get_provider(), providers.CoinbaseProvider,
+        )
+
+    @override_settings(MARKET_DATA_PROVIDER='nope')
+    def test_unknown_provider(self):
+        """Test a misspelled provider fails loudly."""
+        with self.assertRaises(ImproperlyConfigured):
+            providers.get_provider()
+
+    @patch('core.providers.get_redis')
+    def test_replay_clock_shared(self, patched_redis):
+        """Test worker processes join the replay clock already started."""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'recording.ndjson.gz')
+        write_recording(path, [candle('BTC-USD', 0, '1.0')])
+        patched_redis.return_value.get.return_value = b'1234.5'
+
+        with override_settings(
+            MARKET_DATA_PROVIDER='replay',
+            MARKET_DATA_REPLAY_PATH=path,
+        ):
+            provider = providers.get_provider()
+
+        self.assertIsInstance(provider, providers.ReplayProvider)
+        self.assertEqual(provider.started_at, 1234.5)
+        kwargs = patched_redis.return_value.set.call_args.kwargs
+        self.assertTrue(kwargs['nx'])
+
+    @patch('core.providers.get_redis')
+    def test_replay_clock_rejoined_after_end(self, patched_redis):
+        """Test a finished replay follows the clock restarted in Redis."""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'recording.ndjson.gz')
+        write_recording(path, [
+            candle('BTC-USD', 0, '1.0'), candle('BTC-USD', 2, '3.0'),
+        ])
+        patched_redis.return_value.get.return_value = b'1000.0'
+        provider = providers.ReplayProvider(path, speed=60, shared=True)
+
+        patched_redis.return_value.get.return_value = b'1100.0'
+        with patch('core.providers.time.time', return_value=1001.0):
+            provider.ticker('BTC-USD')
+            self.assertEqual(provider.started_at, 1000.0)
+        with patch('core.providers.time.time', return_value=1100.5):
+            provider.ticker('BTC-USD')
+            self.assertEqual(provider.started_at, 1100.0)
+
+    def test_empty_recording(self):
+        """Test an empty recording fails with its path."""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'recording.ndjson.gz')
+        write_recording(path, [])
+
+        with self.assertRaisesMessage(ImproperlyConfigured, path):
+            providers.ReplayProvider(path)
+
+    @patch('core.providers.get_redis', side_effect=redis.ConnectionError)
+    def test_replay_clock_without_redis(self, patched_redis):
+        """Test the replay still starts when Redis is unreachable."""
+        with patch('core.providers.time.time', return_value=99.0):
+            self.assertEqual(providers.replay_started_at('x', 10), 99.0)
@@ -0,0 +1,102 @@
+"""
+Tests for the symbol registry.
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+
+import redis
+
+from core.models import Symbol
+from core.symbols import VERSION_KEY, SymbolRegistry, active_symbols
+from core.tests.fakes import FakeRedis
+
+
+@patch('core.symbols.time.monotonic')
+class SymbolRegistryTests(TestCase):
+    """Test symbols are cached and reloaded on change."""
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = patch('core.symbols.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_seeded_symbols_active(self, patched_monotonic):
+        """Test the pairs polled so far are registered and active."""
+        patched_monotonic.return_value = 0.0
+
+        self.assertEqual(
+            sorted(SymbolRegistry().active()),
+            ['AVAX-USD', 'BTC-USD', 'ETH-USD'],
+        )
+        self.assertEqual(
+            Symbol.objects.get(name='BTC-USD').tick_size, Decimal('0.01'),
+        )
+
+    def test_cached_between_checks(self, patched_monotonic):
+        """Test lookups within the ttl do not query."""
+        patched_monotonic.return_value = 0.0
+        registry = SymbolRegistry(ttl=5)
+        registry.all()
+
+        patched_monotonic.return_value = 4.0
+        with self.assertNumQueries(0):
+            self.assertTrue(registry.is_active('BTC-USD'))
+            self.assertIsNone(registry.get('DOGE-USD'))
+
+    def test_unchanged_version_not_reloaded(self, patched_monotonic):
+        """Test an unchanged version keeps the cached symbols."""
+        patched_monotonic.return_value = 0.0
+        registry = SymbolRegistry(ttl=5)
+        registry.all()
+
+        patched_monotonic.return_value = 10.0
+        with self.assertNumQueries(0):
+            registry.all()
+
+    def test_change_in_other_process_reloaded(self, patched_monotonic):
+        """Test a bumped version reloads the symbols after the ttl."""
+        patched_monotonic.return_value = 0.0
+        registry = SymbolRegistry(ttl=5)
+        registry.all()
+        Symbol.objects.filter(name='AVAX-USD').update(is_active=False)
+        self.redis.incr(VERSION_KEY)
+
+        patched_monotonic.return_value = 2.0
+        self.assertTrue(registry.is_active('AVAX-USD'))
+
+        patched_monotonic.return_value = 5.0
+        self.assertFalse(registry.is_active('AVAX-USD'))
+
+    def test_save_notifies_processes(self, patched_monotonic):
+        """Test saving a symbol bumps the version once committed."""
+        patched_monotonic.return_value = 0.0
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Symbol.objects.create(
+                name='SOL-USD', tick_size=Decimal('0.01'), precision=2,
+            )
+
+        self.assertEqual(self.redis.get(VERSION_KEY), b'1')
+
+    def test_redis_outage_reloads_every_ttl(self, patched_monotonic):
+        """Test symbols are reloaded from the db when Redis is down."""
+        patched_monotonic.return_value = 0.0
+        registry = SymbolRegistry(ttl=5)
+
+        with patch(
+            'core.symbols.get_redis', side_effect=redis.ConnectionError,
+        ):
+            registry.all()
+            Symbol.objects.filter(name='ETH-USD').update(is_active=False)
+            patched_monotonic.return_value = 5.0
+
+            self.assertNotIn('ETH-USD', registry.active())
+
+    def test_active_symbols(self, patched_monotonic):
+        """Test active_symbols lists the active registered symbols."""
+        patched_monotonic.return_value = 0.0
+
+        self.assertIn('BTC-USD', active_symbols())
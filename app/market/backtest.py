@@ -0,0 +1,254 @@
+"""
+Vectorized backtesting of SL/TP orders against stored candles.
+
+For an entry bar, running minima of lows and maxima of highs are
+monotonic, so the first bar that hits any stop loss or take profit
+level is a binary search. Any number of SL/TP levels sharing an entry
+is therefore resolved with one O(n) pass plus O(log n) per level.
+"""
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+
+STOP_LOSS = 'stop_loss'
+TAKE_PROFIT = 'take_profit'
+OPEN = 'open'
+
+# Smallest number of SL/TP pairs worth shipping to another process.
+MIN_CHUNK = 256
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers):
+    """
+    Return the process pool shared by sweeps, started on first use.
+    Workers are spawned, not forked: a fork of the multi-threaded web or
+    Celery process could inherit locks held by its other threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def _drop_pool(pool):
+    """Forget pool once broken, e.g. by a killed process."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+@atexit.register
+def shutdown_pool():
+    """Stop the shared pool's workers, at the latest on exit."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def _running_extremes(data, entry):
+    """Running low minimum and high maximum from the entry bar on."""
+    return (
+        np.minimum.accumulate(data['l'][entry:]),
+        np.maximum.accumulate(data['h'][entry:]),
+    )
+
+
+def _exits(run_low, run_high, stop_loss, take_profit, is_long):
+    """
+    Return (offset, reason) arrays of the first bar, counted from the
+    entry, at which each SL/TP pair triggers. A bar touching both
+    levels counts as a stop loss; offset equals len(run_low) and reason
+    OPEN when neither level is ever reached.
+    """
+    is_long = np.broadcast_to(is_long, stop_loss.shape)
+    falling = -run_low
+    sl_hit = np.empty(stop_loss.shape, dtype=np.int64)
+    tp_hit = np.empty(stop_loss.shape, dtype=np.int64)
+    sl_hit[is_long] = np.searchsorted(falling, -stop_loss[is_long])
+    tp_hit[is_long] = np.searchsorted(run_high, take_profit[is_long])
+    sl_hit[~is_long] = np.searchsorted(run_high, stop_loss[~is_long])
+    tp_hit[~is_long] = np.searchsorted(falling, -take_profit[~is_long])
+    offset = np.minimum(sl_hit, tp_hit)
+    reason = np.where(
+        offset == len(run_low),
+        OPEN,
+        np.where(sl_hit <= tp_hit, STOP_LOSS, TAKE_PROFIT),
+    )
+
+    return offset, reason
+
+
+def _pnl(entry_price, exit_price, is_long, exposure):
+    """PnL of positions of the given exposure, amount times leverage."""
+    direction = np.where(is_long, 1.0, -1.0)
+    return direction * exposure * (exit_price / entry_price - 1.0)
+
+
+def simulate_orders(data, orders):
+    """
+    Simulate hypothetical orders, a list of dicts with entry_time (unix
+    seconds), stop_loss, take_profit, leverage and amount, over candle
+    arrays. Orders fill at the open of the first bar at or after their
+    entry time and exit at the level they hit, or are marked to the last
+    close. Return one result dict per order.
+    """
+    times = data['t']
+    size = len(times)
+    if not size:
+        return [{'filled': False} for _ in orders]
+
+    entry_time = np.array(
+        [o['entry_time'] for o in orders], dtype=np.float64,
+    )
+    stop_loss = np.array([o['stop_loss'] for o in orders], dtype=np.float64)
+    take_profit = np.array(
+        [o['take_profit'] for o in orders], dtype=np.float64,
+    )
+    exposure = np.array(
+        [(o.get('amount') or 0.0) * o['leverage'] for o in orders],
+        dtype=np.float64,
+    )
+    is_long = take_profit >= stop_loss
+    entry = np.searchsorted(times, entry_time, side='left')
+
+    exit_index = np.full(len(orders), -1)
+    reason = np.full(len(orders), OPEN, dtype=object)
+    for bar in np.unique(entry[entry < size]):
+        group = np.flatnonzero(entry == bar)
+        run_low, run_high = _running_extremes(data, bar)
+        offset, group_reason = _exits(
+            run_low, run_high,
+            stop_loss[group], take_profit[group], is_long[group],
+        )
+        exit_index[group] = np.minimum(bar + offset, size - 1)
+        reason[group] = group_reason
+
+    filled = entry < size
+    entry_price = data['o'][np.minimum(entry, size - 1)]
+    exit_price = np.select(
+        [reason == STOP_LOSS, reason == TAKE_PROFIT],
+        [stop_loss, take_profit],
+        default=data['c'][-1],
+    )
+    pnl = _pnl(entry_price, exit_price, is_long, exposure)
+
+    results = []
+    for i in range(len(orders)):
+        if not filled[i]:
+            results.append({'filled': False})
+            continue
+        results.append({
+            'filled': True,
+            'side': 'long' if is_long[i] else 'short',
+            'entry_time': int(times[entry[i]]),
+            'entry_price': float(entry_price[i]),
+            'exit_time': int(times[exit_index[i]]),
+            'exit_price': float(exit_price[i]),
+            'exit_reason': reason[i],
+            'pnl': float(pnl[i]),
+        })
+
+    return results
+
+
+def _sweep_chunk(data, entries, sl_pct, tp_pct, is_long, exposure):
+    """Aggregate trades of every entry for one chunk of SL/TP pairs."""
+    pnl = np.zeros(len(sl_pct))
+    wins = np.zeros(len(sl_pct), dtype=np.int64)
+    stops = np.zeros(len(sl_pct), dtype=np.int64)
+    sign = 1.0 if is_long else -1.0
+    for bar in entries:
+        price = data['o'][bar]
+        stop_loss = price * (1.0 - sign * sl_pct)
+        take_profit = price * (1.0 + sign * tp_pct)
+        run_low, run_high = _running_extremes(data, bar)
+        _, reason = _exits(run_low, run_high, stop_loss, take_profit, is_long)
+        exit_price = np.select(
+            [reason == STOP_LOSS, reason == TAKE_PROFIT],
+            [stop_loss, take_profit],
+            default=data['c'][-1],
+        )
+        trade = _pnl(price, exit_price, is_long, exposure)
+        pnl += trade
+        wins += trade > 0
+        stops += reason == STOP_LOSS
+
+    return pnl, wins, stops
+
+
+def sweep(
+    data,
+    stop_loss_pcts,
+    take_profit_pcts,
+    every=60,
+    side='long',
+    leverage=1,
+    amount=100.0,
+    workers=1,
+):
+    """
+    Backtest every (stop loss %, take profit %) combination of a rule
+    that opens a position at the open of every `every`-th bar. The grid
+    is split into chunks of at least MIN_CHUNK pairs evaluated across
+    the shared process pool of up to `workers` processes.
+    Return one result dict per combination, best PnL first.
+    """
+    sl_grid, tp_grid = np.meshgrid(
+        np.asarray(stop_loss_pcts, dtype=np.float64),
+        np.asarray(take_profit_pcts, dtype=np.float64),
+        indexing='ij',
+    )
+    sl_pct, tp_pct = sl_grid.ravel(), tp_grid.ravel()
+    entries = np.arange(0, len(data['t']), every)
+    args = (side == 'long', amount * leverage)
+    workers = min(workers, -(-len(sl_pct) // MIN_CHUNK))
+
+    parts = None
+    if workers > 1:
+        chunks = np.array_split(np.arange(len(sl_pct)), workers)
+        pool = get_pool(workers)
+        try:
+            parts = list(pool.map(
+                _sweep_chunk,
+                *zip(*[
+                    (data, entries, sl_pct[c], tp_pct[c], *args)
+                    for c in chunks
+                ])
+            ))
+        except BrokenProcessPool:
+            _drop_pool(pool)
+
+    if parts is not None:
+        pnl, wins, stops = (np.concatenate(p) for p in zip(*parts))
+    else:
+        pnl, wins, stops = _sweep_chunk(data, entries, sl_pct, tp_pct, *args)
+
+    order = np.argsort(-pnl, kind='stable')
+    return [
+        {
+            'stop_loss_pct': float(sl_pct[i]),
+            'take_profit_pct': float(tp_pct[i]),
+            'trades': len(entries),
+            'wins': int(wins[i]),
+            'stop_losses': int(stops[i]),
+            'pnl': float(pnl[i]),
+        }
+        for i in order
+    ]
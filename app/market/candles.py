@@ -0,0 +1,105 @@
+"""
+OHLCV candle queries resampled in SQL.
+"""
+import json
+from datetime import datetime
+
+from django.db import connection
+
+import pytz
+
+from core.models import Crypto, CryptoRollup
+
+
+INTERVALS = {
+    '1m': 60,
+    '5m': 300,
+    '1h': 3600,
+    '1d': 86400,
+}
+ROLLUP_INTERVALS = ('5m', '1h', '1d')
+COLUMNS = ('t', 'o', 'h', 'l', 'c', 'v')
+
+OHLCV_SQL = '''
+    (array_agg(open ORDER BY date_and_time))[1],
+    max(high),
+    min(low),
+    (array_agg(close ORDER BY date_and_time DESC))[1],
+    sum(volume)
+'''
+
+
+def bucket_sql(interval):
+    """SQL expression of the epoch second starting a row's bucket."""
+    seconds = INTERVALS[interval]
+    return f'floor(extract(epoch FROM date_and_time) / {seconds}) * {seconds}'
+
+
+def floor_time(value, interval):
+    """Return the start of the interval bucket holding value."""
+    seconds = INTERVALS[interval]
+    epoch = int(value.timestamp()) // seconds * seconds
+    return datetime.fromtimestamp(epoch, pytz.UTC)
+
+
+def _columns(rows):
+    if not rows:
+        return {column: [] for column in COLUMNS}
+
+    return {
+        column: [float(v) if i else int(v) for v in values]
+        for i, (column, values) in enumerate(zip(COLUMNS, zip(*rows)))
+    }
+
+
+def resample_candles(symbol, start, end, interval):
+    """
+    Aggregate minute candles of symbol in [start, end) into interval
+    buckets inside the database. Return a {column: list} mapping where
+    t is the bucket start as a unix timestamp.
+    """
+    table = connection.ops.quote_name(Crypto._meta.db_table)
+    sql = f'''
+        SELECT ({bucket_sql(interval)})::bigint AS bucket, {OHLCV_SQL}
+        FROM {table}
+        WHERE symbol = %s AND date_and_time >= %s AND date_and_time < %s
+        GROUP BY bucket
+        ORDER BY bucket
+    '''
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [symbol, start, end])
+        rows = cursor.fetchall()
+
+    return _columns(rows)
+
+
+def rollup_candles(symbol, start, end, interval):
+    """
+    Read pre-aggregated interval candles of symbol whose bucket
+    overlaps [start, end), in the same layout as resample_candles.
+    """
+    rows = CryptoRollup.objects.filter(
+        symbol=symbol,
+        interval=interval,
+        bucket__gte=floor_time(start, interval),
+        bucket__lt=end,
+    ).values_list('bucket', 'open', 'high', 'low', 'close', 'volume')
+
+    return _columns([(b.timestamp(), *rest) for b, *rest in rows])
+
+
+def get_candles(symbol, start, end, interval):
+    """Serve rollup intervals from their tables, the rest from SQL."""
+    if interval in ROLLUP_INTERVALS:
+        return rollup_candles(symbol, start, end, interval)
+
+    return resample_candles(symbol, start, end, interval)
+
+
+def iter_json(header, columns):
+    """Yield a JSON object made of header and column arrays in pieces."""
+    yield json.dumps(header)[:-1]
+    for column in COLUMNS:
+        yield f', "{column}": '
+        yield json.dumps(columns[column])
+    yield '}'
@@ -0,0 +1,489 @@
+"""
+Vectorized technical indicators over candle column arrays.
+
+Every indicator computes a whole series at once from contiguous NumPy
+arrays and can also append a single bar from a small saved state, so
+a cached series is extended without recomputing the window.
+"""
+import logging
+import pickle
+from datetime import datetime
+
+import numpy as np
+import pytz
+import redis
+
+from core.cache import get_redis
+from market.candles import COLUMNS, get_candles
+
+
+BLOCK = 64
+
+
+logger = logging.getLogger(__name__)
+
+
+def ewm(x, alpha, init=None):
+    """
+    Exponentially weighted mean y[i] = y[i-1] + alpha * (x[i] - y[i-1]),
+    seeded with init (or x[0]). Evaluated in closed form per block of
+    BLOCK values so only one Python iteration runs per block.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.empty(len(x))
+    if not len(x):
+        return out
+    if alpha >= 1:
+        out[:] = x
+        return out
+
+    beta = 1.0 - alpha
+    powers = beta ** np.arange(BLOCK)
+    inverse = beta ** -np.arange(BLOCK)
+    prev = x[0] if init is None else init
+    for start in range(0, len(x), BLOCK):
+        block = x[start:start + BLOCK]
+        size = len(block)
+        acc = np.cumsum(block * inverse[:size])
+        out[start:start + size] = powers[:size] * (
+            beta * prev + alpha * acc
+        )
+        prev = out[start + size - 1]
+
+    return out
+
+
+def rolling_window(x, period):
+    """Return a (len(x) - period + 1, period) view of sliding windows."""
+    return np.lib.stride_tricks.sliding_window_view(x, period)
+
+
+def _pad(values, total):
+    """Left-pad values with NaN up to total length."""
+    out = np.full(total, np.nan)
+    if len(values):
+        out[total - len(values):] = values
+    return out
+
+
+class Indicator:
+    """
+    Base class of an indicator.
+
+    compute() returns a {name: array} mapping of the outputs plus any
+    internal series (prefixed with `_`) that state() needs to snapshot
+    the indicator after bar i. step() appends one bar to a state and
+    returns the new output values and state.
+    """
+    name = None
+    params = {}
+    outputs = ()
+
+    def __init__(self, **params):
+        unknown = set(params) - set(self.params)
+        if unknown:
+            raise ValueError(f'Unknown parameters: {sorted(unknown)}')
+        self.p = {**self.params, **params}
+        for key, value in self.p.items():
+            if key != 'k' and (int(value) != value or value < 1):
+                raise ValueError(f'{key} must be a positive integer.')
+
+    def compute(self, data):
+        raise NotImplementedError
+
+    def state(self, data, series, i):
+        raise NotImplementedError
+
+    def step(self, state, bar):
+        raise NotImplementedError
+
+
+class SMA(Indicator):
+    """Simple moving average of the close."""
+    name = 'sma'
+    params = {'period': 20}
+    outputs = ('sma',)
+
+    def compute(self, data):
+        close, period = data['c'], self.p['period']
+        if len(close) < period:
+            return {'sma': np.full(len(close), np.nan)}
+        csum = np.cumsum(np.insert(close, 0, 0.0))
+        return {'sma': _pad((csum[period:] - csum[:-period]) / period,
+                            len(close))}
+
+    def state(self, data, series, i):
+        period = self.p['period']
+        return {'window': data['c'][max(0, i - period + 1):i + 1].tolist()}
+
+    def step(self, state, bar):
+        window = (state.get('window', []) + [bar['c']])[-self.p['period']:]
+        value = (
+            sum(window) / len(window)
+            if len(window) == self.p['period'] else np.nan
+        )
+        return {'sma': value}, {'window': window}
+
+
+class EMA(Indicator):
+    """Exponential moving average of the close."""
+    name = 'ema'
+    params = {'period': 20}
+    outputs = ('ema',)
+
+    def alpha(self):
+        return 2.0 / (self.p['period'] + 1)
+
+    def compute(self, data):
+        return {'ema': ewm(data['c'], self.alpha())}
+
+    def state(self, data, series, i):
+        return {'ema': float(series['ema'][i])}
+
+    def step(self, state, bar):
+        prev = state.get('ema')
+        ema = bar['c'] if prev is None else (
+            prev + self.alpha() * (bar['c'] - prev)
+        )
+        return {'ema': ema}, {'ema': ema}
+
+
+class RSI(Indicator):
+    """Relative strength index with Wilder smoothing."""
+    name = 'rsi'
+    params = {'period': 14}
+    outputs = ('rsi',)
+
+    @staticmethod
+    def _rsi(gain, loss):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+        return np.where(loss == 0, 100.0, rsi)
+
+    def compute(self, data):
+        close, total = data['c'], len(data['c'])
+        alpha = 1.0 / self.p['period']
+        delta = np.diff(close)
+        gain = _pad(ewm(np.clip(delta, 0, None), alpha), total)
+        loss = _pad(ewm(np.clip(-delta, 0, None), alpha), total)
+        rsi = self._rsi(gain, loss)
+        rsi[np.isnan(gain)] = np.nan
+        return {'rsi': rsi, '_gain': gain, '_loss': loss}
+
+    def state(self, data, series, i):
+        gain, loss = series['_gain'][i], series['_loss'][i]
+        return {
+            'prev': float(data['c'][i]),
+            'gain': None if np.isnan(gain) else float(gain),
+            'loss': None if np.isnan(loss) else float(loss),
+        }
+
+    def step(self, state, bar):
+        prev = state.get('prev')
+        if prev is None:
+            return {'rsi': np.nan}, {'prev': bar['c']}
+        alpha = 1.0 / self.p['period']
+        change = bar['c'] - prev
+        up, down = max(change, 0.0), max(-change, 0.0)
+        if state.get('gain') is None:
+            gain, loss = up, down
+        else:
+            gain = state['gain'] + alpha * (up - state['gain'])
+            loss = state['loss'] + alpha * (down - state['loss'])
+        rsi = float(self._rsi(np.float64(gain), np.float64(loss)))
+        return {'rsi': rsi}, {'prev': bar['c'], 'gain': gain, 'loss': loss}
+
+
+class MACD(Indicator):
+    """Moving average convergence divergence."""
+    name = 'macd'
+    params = {'fast': 12, 'slow': 26, 'signal': 9}
+    outputs = ('macd', 'signal', 'histogram')
+
+    def _alphas(self):
+        return tuple(
+            2.0 / (self.p[key] + 1) for key in ('fast', 'slow', 'signal')
+        )
+
+    def compute(self, data):
+        fast_a, slow_a, signal_a = self._alphas()
+        fast = ewm(data['c'], fast_a)
+        slow = ewm(data['c'], slow_a)
+        macd = fast - slow
+        signal = ewm(macd, signal_a)
+        return {
+            'macd': macd,
+            'signal': signal,
+            'histogram': macd - signal,
+            '_fast': fast,
+            '_slow': slow,
+        }
+
+    def state(self, data, series, i):
+        return {
+            key: float(series[f'_{key}' if key != 'signal' else key][i])
+            for key in ('fast', 'slow', 'signal')
+        }
+
+    def step(self, state, bar):
+        fast_a, slow_a, signal_a = self._alphas()
+        close = bar['c']
+        if not state:
+            fast = slow = close
+            signal = 0.0
+        else:
+            fast = state['fast'] + fast_a * (close - state['fast'])
+            slow = state['slow'] + slow_a * (close - state['slow'])
+        macd = fast - slow
+        if state:
+            signal = state['signal'] + signal_a * (macd - state['signal'])
+        values = {'macd': macd, 'signal': signal, 'histogram': macd - signal}
+        return values, {'fast': fast, 'slow': slow, 'signal': signal}
+
+
+class Bollinger(Indicator):
+    """Bollinger bands: SMA of the close plus/minus k deviations."""
+    name = 'bollinger'
+    params = {'period': 20, 'k': 2}
+    outputs = ('middle', 'upper', 'lower')
+
+    def compute(self, data):
+        close, total = data['c'], len(data['c'])
+        period, k = self.p['period'], self.p['k']
+        if total < period:
+            empty = np.full(total, np.nan)
+            return {'middle': empty, 'upper': empty, 'lower': empty}
+        windows = rolling_window(close, period)
+        middle = _pad(windows.mean(axis=1), total)
+        std = _pad(windows.std(axis=1), total)
+        return {
+            'middle': middle,
+            'upper': middle + k * std,
+            'lower': middle - k * std,
+        }
+
+    def state(self, data, series, i):
+        period = self.p['period']
+        return {'window': data['c'][max(0, i - period + 1):i + 1].tolist()}
+
+    def step(self, state, bar):
+        period, k = self.p['period'], self.p['k']
+        window = (state.get('window', []) + [bar['c']])[-period:]
+        if len(window) < period:
+            nan = np.nan
+            return {'middle': nan, 'upper': nan, 'lower': nan}, {
+                'window': window,
+            }
+        middle, std = float(np.mean(window)), float(np.std(window))
+        values = {
+            'middle': middle,
+            'upper': middle + k * std,
+            'lower': middle - k * std,
+        }
+        return values, {'window': window}
+
+
+class ATR(Indicator):
+    """Average true range with Wilder smoothing."""
+    name = 'atr'
+    params = {'period': 14}
+    outputs = ('atr',)
+
+    def compute(self, data):
+        high, low, close = data['h'], data['l'], data['c']
+        prev = np.concatenate(([np.nan], close[:-1]))
+        true_range = np.fmax(
+            high - low,
+            np.fmax(np.abs(high - prev), np.abs(low - prev)),
+        )
+        return {'atr': ewm(true_range, 1.0 / self.p['period'])}
+
+    def state(self, data, series, i):
+        return {'prev': float(data['c'][i]), 'atr': float(series['atr'][i])}
+
+    def step(self, state, bar):
+        prev = state.get('prev')
+        true_range = bar['h'] - bar['l']
+        if prev is not None:
+            true_range = max(
+                true_range, abs(bar['h'] - prev), abs(bar['l'] - prev),
+            )
+        atr = state.get('atr')
+        atr = true_range if atr is None else (
+            atr + (true_range - atr) / self.p['period']
+        )
+        return {'atr': atr}, {'prev': bar['c'], 'atr': atr}
+
+
+class VWAP(Indicator):
+    """Volume weighted average typical price since the range start."""
+    name = 'vwap'
+    params = {}
+    outputs = ('vwap',)
+
+    def compute(self, data):
+        typical = (data['h'] + data['l'] + data['c']) / 3.0
+        price_volume = np.cumsum(typical * data['v'])
+        volume = np.cumsum(data['v'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vwap = price_volume / volume
+        return {'vwap': vwap, '_pv': price_volume, '_v': volume}
+
+    def state(self, data, series, i):
+        return {'pv': float(series['_pv'][i]), 'v': float(series['_v'][i])}
+
+    def step(self, state, bar):
+        typical = (bar['h'] + bar['l'] + bar['c']) / 3.0
+        price_volume = state.get('pv', 0.0) + typical * bar['v']
+        volume = state.get('v', 0.0) + bar['v']
+        vwap = price_volume / volume if volume else np.nan
+        return {'vwap': vwap}, {'pv': price_volume, 'v': volume}
+
+
+INDICATORS = {
+    cls.name: cls for cls in (SMA, EMA, RSI, MACD, Bollinger, ATR, VWAP)
+}
+
+
+def get_indicator(name, **params):
+    """Return a configured indicator, raising ValueError if unknown."""
+    try:
+        return INDICATORS[name](**params)
+    except KeyError:
+        raise ValueError(f'Unknown indicator: {name}')
+
+
+CACHE_TIMEOUT = 3600
+
+
+def load_candles(symbol, start, end, interval):
+    """Load candles as contiguous {column: array} NumPy arrays."""
+    columns = get_candles(symbol, start, end, interval)
+    return {
+        column: np.asarray(
+            columns[column],
+            dtype=np.int64 if column == 't' else np.float64,
+        )
+        for column in COLUMNS
+    }
+
+
+def _listed(values):
+    return [None if np.isnan(v) else float(v) for v in values]
+
+
+def _bar(data, i):
+    return {column: data[column][i].item() for column in COLUMNS}
+
+
+def _full_entry(indicator, data):
+    """Compute a series from scratch, keeping the state before its last bar."""
+    series = indicator.compute(data)
+    size = len(data['t'])
+    return {
+        't': data['t'].tolist(),
+        'values': {
+            name: _listed(series[name]) for name in indicator.outputs
+        },
+        'state': indicator.state(data, series, size - 2) if size > 1 else {},
+        'last_bar': _bar(data, size - 1) if size else None,
+    }
+
+
+def _extend_entry(indicator, entry, data):
+    """
+    Replace the provisional last bar of entry and append the newer bars
+    of data one step at a time from the saved state.
+    """
+    bars = [_bar(data, i) for i in range(len(data['t']))]
+    if bars == [entry['last_bar']]:
+        return entry
+
+    entry['t'].pop()
+    for values in entry['values'].values():
+        values.pop()
+    state = entry['state']
+    for i, bar in enumerate(bars):
+        values, next_state = indicator.step(state, bar)
+        entry['t'].append(bar['t'])
+        for name, value in values.items():
+            entry['values'][name].append(_listed([value])[0])
+        if i < len(bars) - 1:
+            state = next_state
+    entry['state'] = state
+    entry['last_bar'] = bars[-1]
+
+    return entry
+
+
+def _cached(head):
+    """
+    Return the entry cached in Redis under head, shared by every
+    process, or None if there is none or Redis is unreachable.
+    """
+    try:
+        client = get_redis()
+        last_ts = client.get(head)
+        if last_ts is None:
+            return None
+        cached = client.get(f'{head}:{int(last_ts)}')
+    except redis.RedisError as exc:
+        logger.error(f"indicator cache unavailable: {exc}")
+        return None
+
+    return None if cached is None else pickle.loads(cached)
+
+
+def _cache(head, entry):
+    """Cache entry under head and its last candle time."""
+    last_ts = entry['last_bar']['t'] if entry['last_bar'] else 0
+    try:
+        pipe = get_redis().pipeline()
+        pipe.set(f'{head}:{last_ts}', pickle.dumps(entry), ex=CACHE_TIMEOUT)
+        pipe.set(head, last_ts, ex=CACHE_TIMEOUT)
+        pipe.execute()
+    except redis.RedisError as exc:
+        logger.error(f"indicator cache update failed: {exc}")
+
+
+def _series(entry):
+    return {'t': entry['t'], **entry['values']}
+
+
+def indicator_series(symbol, interval, indicator, start, end=None):
+    """
+    Return {'t': [...], output: [...]} for indicator over the candles
+    of symbol in [start, end). Results are cached in Redis by (symbol,
+    interval, indicator, params, last candle time). With no end the
+    series is live: later calls only load the bars since the cached
+    last candle and append them, instead of recomputing the whole
+    window. Ranges ending in the future are neither live nor final and
+    not cached.
+    """
+    now = datetime.now(pytz.UTC)
+    if end is not None and end > now:
+        return _series(
+            _full_entry(indicator, load_candles(symbol, start, end, interval))
+        )
+
+    params = ','.join(f'{k}={v}' for k, v in sorted(indicator.p.items()))
+    head = (
+        f'indicator:{symbol}:{interval}:{indicator.name}:{params}:'
+        f'{int(start.timestamp())}:'
+        f'{int(end.timestamp()) if end else "live"}'
+    )
+    entry = _cached(head)
+
+    if entry is None or (end is None and entry['last_bar'] is None):
+        entry = _full_entry(
+            indicator, load_candles(symbol, start, end or now, interval),
+        )
+    elif end is None:
+        since = datetime.fromtimestamp(entry['last_bar']['t'], pytz.UTC)
+        data = load_candles(symbol, since, now, interval)
+        if len(data['t']):
+            entry = _extend_entry(indicator, entry, data)
+
+    _cache(head, entry)
+
+    return _series(entry)
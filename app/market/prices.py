@@ -0,0 +1,89 @@
+"""
+Latest price cache kept in Redis by the polling tasks, and the pub/sub
+channel quotes are pushed on as they arrive.
+"""
+import json
+
+from core.cache import get_redis
+from core.models import Ticker
+
+
+PRICES_KEY = 'prices:latest'
+PRICES_CHANNEL = 'prices:ticks'
+
+
+def _number(value):
+    # Fixed-point values are cached as JSON numbers, as the API renders them.
+    return None if value is None else float(value)
+
+
+def _quote(ticker):
+    return {
+        'symbol': ticker.symbol,
+        'price': _number(ticker.price),
+        'bid': _number(ticker.bid),
+        'ask': _number(ticker.ask),
+        'volume': _number(ticker.volume),
+        'time': ticker.time.isoformat(),
+    }
+
+
+def set_prices(tickers):
+    """
+    Store the quote of every ticker and publish them to the stream
+    subscribers in one round trip.
+    """
+    quotes = [_quote(t) for t in tickers]
+    if not quotes:
+        return
+
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.hset(PRICES_KEY, mapping={
+        quote['symbol']: json.dumps(quote) for quote in quotes
+    })
+    pipe.publish(PRICES_CHANNEL, json.dumps(quotes))
+    pipe.execute()
+
+
+def get_prices(symbols=None):
+    """
+    Return a {symbol: quote} mapping for symbols, or for every cached
+    symbol if none are given. Unknown symbols map to None.
+    """
+    if symbols is None:
+        cached = get_redis().hgetall(PRICES_KEY)
+        return {
+            symbol.decode(): json.loads(quote)
+            for symbol, quote in cached.items()
+        }
+
+    symbols = list(symbols)
+    if not symbols:
+        return {}
+    cached = get_redis().hmget(PRICES_KEY, symbols)
+    return {
+        symbol: json.loads(quote) if quote is not None else None
+        for symbol, quote in zip(symbols, cached)
+    }
+
+
+def stored_prices(symbols=None):
+    """
+    Return the same mapping as get_prices from the Ticker rows the
+    polling tasks store, for when the Redis cache is unreachable.
+    """
+    tickers = Ticker.objects.all()
+    if symbols is not None:
+        symbols = list(symbols)
+        tickers = tickers.filter(symbol__in=symbols)
+
+    quotes = {t.symbol: _quote(t) for t in tickers}
+    if symbols is None:
+        return quotes
+    return {symbol: quotes.get(symbol) for symbol in symbols}
+
+
+def get_price(symbol):
+    """Return the latest cached price of symbol, or None."""
+    quote = get_prices([symbol])[symbol]
+    return quote['price'] if quote else None
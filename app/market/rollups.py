@@ -0,0 +1,99 @@
+"""
+Incremental maintenance of the pre-aggregated candle rollups.
+"""
+from datetime import timedelta
+
+from django.db import connection, transaction
+
+from core.models import Crypto, CryptoRollup
+from market.candles import (
+    INTERVALS,
+    OHLCV_SQL,
+    ROLLUP_INTERVALS,
+    bucket_sql,
+    floor_time,
+)
+
+
+def _upsert_rollups(interval, where, params):
+    """Recompute the interval buckets of the minute rows matching where."""
+    qn = connection.ops.quote_name
+    source = qn(Crypto._meta.db_table)
+    target = qn(CryptoRollup._meta.db_table)
+    columns = ['open', 'high', 'low', 'close', 'volume']
+    update_sql = ', '.join(f'{qn(c)} = EXCLUDED.{qn(c)}' for c in columns)
+    sql = f'''
+        INSERT INTO {target} (
+            {qn('symbol')}, {qn('interval')}, {qn('bucket')},
+            {', '.join(qn(c) for c in columns)}
+        )
+        SELECT symbol, %s, to_timestamp({bucket_sql(interval)}) AS bucket,
+            {OHLCV_SQL}
+        FROM {source}
+        WHERE {where}
+        GROUP BY symbol, bucket
+        ON CONFLICT ({qn('symbol')}, {qn('interval')}, {qn('bucket')})
+        DO UPDATE SET {update_sql}
+    '''
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [interval, *params])
+        return cursor.rowcount
+
+
+def update_rollups(symbols, start, end, intervals=ROLLUP_INTERVALS):
+    """
+    Refresh the rollup buckets touched by minute candles of symbols in
+    [start, end]. Only those buckets are re-aggregated, from their own
+    minute rows, so replayed or corrected candles stay consistent.
+    Return the number of rollup rows written.
+    """
+    symbols = list(symbols)
+    if not symbols:
+        return 0
+
+    written = 0
+    with transaction.atomic():
+        for interval in intervals:
+            lower = floor_time(start, interval)
+            upper = floor_time(end, interval) + timedelta(
+                seconds=INTERVALS[interval],
+            )
+            written += _upsert_rollups(
+                interval,
+                'symbol = ANY(%s) AND date_and_time >= %s '
+                'AND date_and_time < %s',
+                [symbols, lower, upper],
+            )
+
+    return written
+
+
+def update_rollups_for(candles, intervals=ROLLUP_INTERVALS):
+    """Refresh the rollups covering a batch of just written candles."""
+    if not candles:
+        return 0
+
+    times = [c.date_and_time for c in candles]
+    return update_rollups(
+        {c.symbol for c in candles}, min(times), max(times), intervals,
+    )
+
+
+def rebuild_rollups(symbols=None, intervals=ROLLUP_INTERVALS):
+    """Drop and recompute the rollups of symbols (all if None)."""
+    rollups = CryptoRollup.objects.filter(interval__in=intervals)
+    if symbols is not None:
+        rollups = rollups.filter(symbol__in=symbols)
+
+    written = 0
+    with transaction.atomic():
+        rollups.delete()
+        for interval in intervals:
+            if symbols is None:
+                written += _upsert_rollups(interval, 'TRUE', [])
+            else:
+                written += _upsert_rollups(
+                    interval, 'symbol = ANY(%s)', [list(symbols)],
+                )
+
+    return written
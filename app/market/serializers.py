@@ -0,0 +1,147 @@
+"""
+Serializers for the Market data APIs.
+"""
+from datetime import datetime, timedelta
+
+from rest_framework import serializers
+
+import pytz
+
+from market.candles import INTERVALS, floor_time
+from market.indicators import INDICATORS, get_indicator
+
+
+MAX_BUCKETS = 50000
+MAX_ORDERS = 1000
+MAX_COMBINATIONS = 10000
+# Bound on a sweep's entries * (candles + combinations), the number of
+# array cells it walks: tens of millions take about a second.
+MAX_SWEEP_WORK = 10 ** 8
+
+
+class CandleQuerySerializer(serializers.Serializer):
+    """Validate the query parameters of a candle request."""
+    symbol = serializers.CharField(max_length=10)
+    interval = serializers.ChoiceField(
+        choices=list(INTERVALS),
+        default='1m',
+    )
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        """Default to the last day and bound the number of buckets."""
+        end = attrs.get('end') or datetime.now(pytz.UTC)
+        start = attrs.get('start') or end - timedelta(days=1)
+        if start >= end:
+            raise serializers.ValidationError('start must be before end.')
+
+        buckets = (end - start).total_seconds() / INTERVALS[attrs['interval']]
+        if buckets > MAX_BUCKETS:
+            raise serializers.ValidationError(
+                f'Range too large for interval, max {MAX_BUCKETS} candles.'
+            )
+
+        attrs['start'], attrs['end'] = start, end
+        return attrs
+
+
+class IndicatorQuerySerializer(CandleQuerySerializer):
+    """Validate an indicator request and build the indicator."""
+    indicator = serializers.ChoiceField(choices=sorted(INDICATORS))
+    period = serializers.IntegerField(min_value=1, required=False)
+    fast = serializers.IntegerField(min_value=1, required=False)
+    slow = serializers.IntegerField(min_value=1, required=False)
+    signal = serializers.IntegerField(min_value=1, required=False)
+    k = serializers.FloatField(min_value=0, required=False)
+
+    PARAMS = ('period', 'fast', 'slow', 'signal', 'k')
+
+    def validate(self, attrs):
+        """
+        Requests without an end are live; their default start is
+        aligned to the hour so they keep hitting the same cached series.
+        """
+        live = attrs.get('end') is None
+        if live and attrs.get('start') is None:
+            attrs['start'] = floor_time(
+                datetime.now(pytz.UTC) - timedelta(days=1), '1h',
+            )
+        attrs = super().validate(attrs)
+        if live:
+            attrs['end'] = None
+
+        params = {key: attrs.pop(key) for key in self.PARAMS if key in attrs}
+        try:
+            attrs['indicator'] = get_indicator(attrs['indicator'], **params)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+
+        return attrs
+
+
+class BacktestOrderSerializer(serializers.Serializer):
+    """Validate a hypothetical order to backtest."""
+    start_date_time = serializers.DateTimeField()
+    stop_loss = serializers.FloatField(min_value=0)
+    take_profit = serializers.FloatField(min_value=0)
+    leverage = serializers.FloatField(min_value=1, default=1)
+    amount = serializers.FloatField(min_value=0, default=100)
+
+
+class SweepSerializer(serializers.Serializer):
+    """Validate a parametrized SL/TP rule and its parameter grid."""
+    side = serializers.ChoiceField(choices=['long', 'short'], default='long')
+    every = serializers.IntegerField(min_value=1, default=60)
+    stop_loss_pct = serializers.ListField(
+        child=serializers.FloatField(min_value=0, max_value=1),
+        min_length=1,
+    )
+    take_profit_pct = serializers.ListField(
+        child=serializers.FloatField(min_value=0),
+        min_length=1,
+    )
+    leverage = serializers.FloatField(min_value=1, default=1)
+    amount = serializers.FloatField(min_value=0, default=100)
+
+    def validate(self, attrs):
+        """Bound the size of the parameter grid."""
+        size = len(attrs['stop_loss_pct']) * len(attrs['take_profit_pct'])
+        if size > MAX_COMBINATIONS:
+            raise serializers.ValidationError(
+                f'Too many combinations, max {MAX_COMBINATIONS}.'
+            )
+
+        return attrs
+
+
+class BacktestSerializer(CandleQuerySerializer):
+    """Validate a backtest of either hypothetical orders or a sweep."""
+    orders = BacktestOrderSerializer(many=True, required=False)
+    sweep = SweepSerializer(required=False)
+
+    def validate(self, attrs):
+        """Require exactly one of orders and sweep."""
+        attrs = super().validate(attrs)
+        if ('orders' in attrs) == ('sweep' in attrs):
+            raise serializers.ValidationError(
+                'Provide either orders or sweep.'
+            )
+        if len(attrs.get('orders', [])) > MAX_ORDERS:
+            raise serializers.ValidationError(
+                f'Too many orders, max {MAX_ORDERS}.'
+            )
+        if 'sweep' in attrs:
+            rule = attrs['sweep']
+            candles = (attrs['end'] - attrs['start']).total_seconds() \
+                / INTERVALS[attrs['interval']]
+            entries = -(-candles // rule['every'])
+            combinations = \
+                len(rule['stop_loss_pct']) * len(rule['take_profit_pct'])
+            if entries * (candles + combinations) > MAX_SWEEP_WORK:
+                raise serializers.ValidationError(
+                    'Sweep too large, use a larger every or interval, '
+                    'or a shorter range.'
+                )
+
+        return attrs
@@ -0,0 +1,268 @@
+"""
+Push stream of the latest prices over WebSocket and Server-Sent Events.
+
+The polling tasks publish every batch of quotes on a Redis channel. Each
+ASGI process runs a single listener thread that fans the quotes out to
+the clients subscribed to their symbols. A client only buffers the
+latest quote per symbol, so a slow consumer receives coalesced updates
+at its own pace and costs constant memory instead of a growing queue.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from urllib.parse import parse_qs
+
+import redis
+
+from core.cache import get_redis
+from market.prices import PRICES_CHANNEL, get_prices
+
+
+logger = logging.getLogger(__name__)
+
+WEBSOCKET_PATH = '/ws/prices/'
+SSE_PATH = '/api/prices/stream/'
+HEARTBEAT = 15
+LISTEN_TIMEOUT = 1.0
+RECONNECT_DELAY = 1
+MAX_RECONNECT_DELAY = 30
+
+
+class Subscription:
+    """Coalescing buffer of the latest quote per symbol for one client."""
+
+    def __init__(self, symbols=None):
+        self.symbols = set(symbols) if symbols else None
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+    def offer(self, quote):
+        """Buffer quote, replacing any unsent quote of its symbol."""
+        self.pending[quote['symbol']] = quote
+        self.ready.set()
+
+    def seed(self, quotes):
+        """Buffer snapshot quotes unless a fresher tick already arrived."""
+        for symbol, quote in quotes.items():
+            if quote is not None:
+                self.pending.setdefault(symbol, quote)
+        if self.pending:
+            self.ready.set()
+
+    async def get(self, timeout=None):
+        """
+        Wait for updates and return them as a {symbol: quote} mapping,
+        or an empty one if none arrived within timeout seconds.
+        """
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return {}
+
+        self.ready.clear()
+        batch, self.pending = self.pending, {}
+        return batch
+
+
+class PriceHub:
+    """
+    Listen to the price channel in a background thread and hand every
+    quote to the subscriptions of its symbol on the event loop.
+    """
+
+    def __init__(self):
+        self.by_symbol = defaultdict(set)
+        self.everything = set()
+        self.loop = None
+        self.thread = None
+        self.stopped = threading.Event()
+
+    def subscribe(self, subscription):
+        """Register a subscription, starting the listener if needed."""
+        self._start()
+        if subscription.symbols is None:
+            self.everything.add(subscription)
+        for symbol in subscription.symbols or ():
+            self.by_symbol[symbol].add(subscription)
+
+    def unsubscribe(self, subscription):
+        """Forget a subscription."""
+        self.everything.discard(subscription)
+        for symbol in subscription.symbols or ():
+            subscribers = self.by_symbol.get(symbol)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.by_symbol[symbol]
+
+    def dispatch(self, quotes):
+        """Offer each quote to its subscribers. Runs on the event loop."""
+        for quote in quotes:
+            for subscription in self.by_symbol.get(quote['symbol'], ()):
+                subscription.offer(quote)
+            for subscription in self.everything:
+                subscription.offer(quote)
+
+    def stop(self):
+        """Ask the listener thread to exit."""
+        self.stopped.set()
+
+    def _start(self):
+        self.loop = asyncio.get_running_loop()
+        if self.thread is not None and self.thread.is_alive():
+            return
+
+        self.stopped.clear()
+        self.thread = threading.Thread(
+            target=self._listen, name='price-hub', daemon=True,
+        )
+        self.thread.start()
+
+    def _listen(self):
+        """Relay channel messages to the loop, reconnecting on errors."""
+        delay = RECONNECT_DELAY
+        while not self.stopped.is_set():
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(PRICES_CHANNEL)
+                delay = RECONNECT_DELAY
+                while not self.stopped.is_set():
+                    message = pubsub.get_message(timeout=LISTEN_TIMEOUT)
+                    if message is not None:
+                        self.loop.call_soon_threadsafe(
+                            self.dispatch, json.loads(message['data']),
+                        )
+            except redis.RedisError as exc:
+                logger.error(f"price stream listener failed: {exc}")
+                self.stopped.wait(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+            except RuntimeError:
+                # The event loop is closed, the server is shutting down.
+                return
+            finally:
+                pubsub.close()
+
+
+hub = PriceHub()
+
+
+def _symbols(scope):
+    """Symbols of the ?symbols=A,B query, None meaning every symbol."""
+    query = parse_qs(scope.get('query_string', b'').decode())
+    symbols = [
+        symbol
+        for value in query.get('symbols', [])
+        for symbol in value.split(',')
+        if symbol
+    ]
+    return symbols or None
+
+
+async def _snapshot(symbols):
+    """Return the cached quotes of symbols without blocking the loop."""
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(None, get_prices, symbols)
+    except redis.RedisError as exc:
+        logger.error(f"price snapshot failed: {exc}")
+        return {}
+
+
+async def _serve(scope, receive, send_updates, disconnect):
+    """
+    Subscribe a client, seed it with the cached quotes and push updates
+    until it disconnects or sending fails.
+    """
+    async def wait_disconnect():
+        while (await receive())['type'] != disconnect:
+            pass
+
+    symbols = _symbols(scope)
+    subscription = Subscription(symbols)
+    hub.subscribe(subscription)
+    tasks = [
+        asyncio.ensure_future(send_updates(subscription)),
+        asyncio.ensure_future(wait_disconnect()),
+    ]
+    try:
+        subscription.seed(await _snapshot(symbols))
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        hub.unsubscribe(subscription)
+
+
+async def websocket_prices(scope, receive, send):
+    """Stream {symbol: quote} JSON messages over a WebSocket."""
+    if (await receive())['type'] != 'websocket.connect':
+        return
+    await send({'type': 'websocket.accept'})
+
+    async def send_updates(subscription):
+        while True:
+            batch = await subscription.get()
+            await send({'type': 'websocket.send', 'text': json.dumps(batch)})
+
+    await _serve(scope, receive, send_updates, 'websocket.disconnect')
+
+
+async def sse_prices(scope, receive, send):
+    """Stream {symbol: quote} JSON events as Server-Sent Events."""
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+
+    async def send_updates(subscription):
+        while True:
+            batch = await subscription.get(timeout=HEARTBEAT)
+            if batch:
+                body = f'data: {json.dumps(batch)}\n\n'
+            else:
+                body = ': keep-alive\n\n'
+            await send({
+                'type': 'http.response.body',
+                'body': body.encode(),
+                'more_body': True,
+            })
+
+    await _serve(scope, receive, send_updates, 'http.disconnect')
+
+
+class PriceStreamRouter:
+    """ASGI application serving the price streams, passing the rest on."""
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get('path')
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'websocket':
+            if path == WEBSOCKET_PATH:
+                return await websocket_prices(scope, receive, send)
+            return await send({'type': 'websocket.close'})
+        if path == SSE_PATH and scope['method'] == 'GET':
+            return await sse_prices(scope, receive, send)
+
+        return await self.application(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        """Stop the price listener when the server shuts down."""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                hub.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -0,0 +1,28 @@
+"""
+Celery tasks for market analytics.
+"""
+from datetime import datetime
+
+from celery import shared_task
+
+import pytz
+
+from market.rollups import update_rollups
+
+
+@shared_task
+def refresh_rollups(batches):
+    """
+    Refresh the rollups covering the candles written by ingestion
+    shards, a list of get_minute_data results, in a single pass.
+    Return the number of rollup rows written.
+    """
+    batches = [b for b in batches if b and b['symbols']]
+    if not batches:
+        return 0
+
+    return update_rollups(
+        set().union(*(b['symbols'] for b in batches)),
+        datetime.fromtimestamp(min(b['start'] for b in batches), pytz.UTC),
+        datetime.fromtimestamp(max(b['end'] for b in batches), pytz.UTC),
+    )
@@ -0,0 +1,256 @@
+"""
+Tests for the backtesting engine and API.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+import numpy as np
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from market import backtest
+from market.tests.test_candle_api import START, create_candles
+from market.tests.test_indicators import random_candles
+from order.tests.test_order_api import create_user
+
+
+BACKTEST_URL = reverse('market:backtest')
+
+
+def naive_exit(data, entry, stop_loss, take_profit):
+    """Walk the bars one by one to find an order's exit."""
+    is_long = take_profit >= stop_loss
+    for i in range(entry, len(data['t'])):
+        low, high = data['l'][i], data['h'][i]
+        if is_long:
+            if low <= stop_loss:
+                return i, backtest.STOP_LOSS
+            if high >= take_profit:
+                return i, backtest.TAKE_PROFIT
+        else:
+            if high >= stop_loss:
+                return i, backtest.STOP_LOSS
+            if low <= take_profit:
+                return i, backtest.TAKE_PROFIT
+
+    return len(data['t']) - 1, backtest.OPEN
+
+
+class SimulateOrdersTests(SimpleTestCase):
+    """Test the vectorized order simulation."""
+
+    def test_matches_bar_by_bar_walk(self):
+        """Test exits equal a plain loop over bars, long and short."""
+        data = random_candles(size=500)
+        orders = []
+        for entry in (0, 0, 50, 120, 120, 400):
+            price = data['o'][entry]
+            orders.append({
+                'entry_time': data['t'][entry],
+                'stop_loss': price - 3, 'take_profit': price + 4,
+                'leverage': 2, 'amount': 100,
+            })
+            orders.append({
+                'entry_time': data['t'][entry] - 30,
+                'stop_loss': price + 2, 'take_profit': price - 5,
+                'leverage': 1, 'amount': 50,
+            })
+
+        results = backtest.simulate_orders(data, orders)
+
+        for order, result in zip(orders, results):
+            entry = int(-(-order['entry_time'] // 60))
+            index, reason = naive_exit(
+                data, entry, order['stop_loss'], order['take_profit'],
+            )
+            self.assertEqual(result['entry_time'], data['t'][entry])
+            self.assertEqual(result['exit_time'], data['t'][index])
+            self.assertEqual(result['exit_reason'], reason)
+
+    def test_pnl_and_unfilled(self):
+        """Test PnL uses leverage and late orders are not filled."""
+        data = {
+            't': np.array([0, 60, 120]),
+            'o': np.array([100.0, 100.0, 104.0]),
+            'h': np.array([101.0, 105.0, 106.0]),
+            'l': np.array([99.0, 98.0, 103.0]),
+            'c': np.array([100.0, 104.0, 105.0]),
+        }
+        orders = [
+            {'entry_time': 0, 'stop_loss': 95.0, 'take_profit': 105.0,
+             'leverage': 10, 'amount': 100},
+            {'entry_time': 0, 'stop_loss': 110.0, 'take_profit': 90.0,
+             'leverage': 1, 'amount': 100},
+            {'entry_time': 600, 'stop_loss': 95.0, 'take_profit': 105.0,
+             'leverage': 1, 'amount': 100},
+        ]
+
+        long, short, late = backtest.simulate_orders(data, orders)
+
+        self.assertEqual(long['exit_reason'], backtest.TAKE_PROFIT)
+        self.assertEqual(long['exit_time'], 60)
+        self.assertAlmostEqual(long['pnl'], 50.0)
+        self.assertEqual(short['exit_reason'], backtest.OPEN)
+        self.assertAlmostEqual(short['exit_price'], 105.0)
+        self.assertAlmostEqual(short['pnl'], -5.0)
+        self.assertEqual(late, {'filled': False})
+
+
+class SweepTests(SimpleTestCase):
+    """Test parameter sweeps."""
+
+    def test_matches_simulated_orders(self):
+        """Test every combination equals simulating its orders."""
+        data = random_candles(size=400)
+        sl_pcts, tp_pcts = [0.01, 0.02, 0.05], [0.01, 0.03]
+
+        results = backtest.sweep(
+            data, sl_pcts, tp_pcts, every=50, side='short', leverage=3,
+        )
+
+        self.assertEqual(len(results), 6)
+        self.assertEqual(
+            [r['pnl'] for r in results],
+            sorted((r['pnl'] for r in results), reverse=True),
+        )
+        for result in results:
+            orders = [
+                {
+                    'entry_time': data['t'][i],
+                    'stop_loss': data['o'][i] * (1 + result['stop_loss_pct']),
+                    'take_profit':
+                        data['o'][i] * (1 - result['take_profit_pct']),
+                    'leverage': 3,
+                    'amount': 100.0,
+                }
+                for i in range(0, 400, 50)
+            ]
+            trades = backtest.simulate_orders(data, orders)
+            self.assertEqual(result['trades'], 8)
+            self.assertAlmostEqual(
+                result['pnl'], sum(t['pnl'] for t in trades),
+            )
+            self.assertEqual(
+                result['wins'], sum(t['pnl'] > 0 for t in trades),
+            )
+
+    @patch('market.backtest.MIN_CHUNK', 2)
+    def test_process_pool_matches_single_process(self):
+        """Test fanning the grid out across processes changes nothing."""
+        self.addCleanup(backtest.shutdown_pool)
+        data = random_candles(size=300)
+        sl_pcts = [0.005 * i for i in range(1, 6)]
+        tp_pcts = [0.01 * i for i in range(1, 4)]
+
+        single = backtest.sweep(data, sl_pcts, tp_pcts, every=30)
+        pooled = backtest.sweep(data, sl_pcts, tp_pcts, every=30, workers=3)
+
+        self.assertEqual(single, pooled)
+        pool = backtest.get_pool(3)
+        self.assertIs(pool, backtest.get_pool(3))
+        self.assertEqual(pool._mp_context.get_start_method(), 'spawn')
+
+        backtest.shutdown_pool()
+
+        self.assertIsNot(backtest.get_pool(3), pool)
+
+
+@override_settings(BACKTEST_WORKERS=1)
+class BacktestApiTests(TestCase):
+    """Test the backtest endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        create_candles(minutes=30)
+        self.range = {
+            'symbol': 'BTC-USD',
+            'start': START.isoformat(),
+            'end': (START + timedelta(minutes=30)).isoformat(),
+        }
+
+    def test_auth_required(self):
+        """Test authentication is required to run a backtest."""
+        res = self.client.post(BACKTEST_URL, self.range, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_backtest_orders(self):
+        """Test hypothetical orders are filled and closed on candles."""
+        self.client.force_authenticate(self.user)
+        payload = dict(self.range, orders=[{
+            'start_date_time': (START + timedelta(minutes=5)).isoformat(),
+            'stop_loss': 100.0,
+            'take_profit': 110.0,
+            'leverage': 2,
+        }])
+
+        res = self.client.post(BACKTEST_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['candles'], 30)
+        order, = res.data['orders']
+        self.assertEqual(order['entry_price'], 105.0)
+        self.assertEqual(order['exit_reason'], backtest.TAKE_PROFIT)
+        self.assertAlmostEqual(order['pnl'], 200 * (110 / 105 - 1))
+
+    def test_backtest_sweep(self):
+        """Test a sweep returns every combination, best first."""
+        self.client.force_authenticate(self.user)
+        payload = dict(self.range, sweep={
+            'every': 10,
+            'stop_loss_pct': [0.01, 0.02],
+            'take_profit_pct': [0.01, 0.05, 0.5],
+        })
+
+        res = self.client.post(BACKTEST_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['sweep']), 6)
+        best = res.data['sweep'][0]
+        self.assertEqual(best['stop_loss_pct'], 0.02)
+        self.assertEqual(best['take_profit_pct'], 0.5)
+        self.assertEqual(best['wins'], 3)
+        self.assertEqual(best['trades'], 3)
+
+    def test_orders_or_sweep_required(self):
+        """Test exactly one of orders and sweep must be given."""
+        self.client.force_authenticate(self.user)
+
+        res = self.client.post(BACKTEST_URL, self.range, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch('market.serializers.MAX_SWEEP_WORK', 500)
+    def test_sweep_work_bounded(self):
+        """Test a rule entering on every candle of a long range is rejected."""
+        self.client.force_authenticate(self.user)
+        payload = dict(self.range, sweep={
+            'every': 1,
+            'stop_loss_pct': [0.01],
+            'take_profit_pct': [0.01],
+        })
+
+        res = self.client.post(BACKTEST_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        payload['sweep']['every'] = 10
+        res = self.client.post(BACKTEST_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @patch('market.serializers.MAX_COMBINATIONS', 4)
+    def test_sweep_grid_bounded(self):
+        """Test oversized parameter grids are rejected."""
+        self.client.force_authenticate(self.user)
+        payload = dict(self.range, sweep={
+            'stop_loss_pct': [0.01, 0.02, 0.03],
+            'take_profit_pct': [0.01, 0.02],
+        })
+
+        res = self.client.post(BACKTEST_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
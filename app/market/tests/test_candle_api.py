@@ -0,0 +1,115 @@
+"""
+Tests for the Candle API.
+"""
+import json
+from datetime import datetime, timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+
+import pytz
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Crypto
+from market.candles import resample_candles
+from market.rollups import rebuild_rollups
+
+
+CANDLES_URL = reverse('market:candles')
+START = datetime(2023, 1, 24, 12, 0, tzinfo=pytz.UTC)
+
+
+def create_candles(symbol='BTC-USD', minutes=10, offset=0, start=START):
+    """Create one minute candles whose prices rise with each minute."""
+    Crypto.objects.bulk_create([
+        Crypto(
+            date_and_time=start + timedelta(minutes=i),
+            open=100.0 + i,
+            high=101.0 + i,
+            low=99.0 + i,
+            close=100.5 + i,
+            volume=1.0,
+            symbol=symbol,
+        )
+        for i in range(offset, minutes)
+    ])
+
+
+class CandleApiTests(TestCase):
+    """Test the candle endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def get_json(self, params):
+        res = self.client.get(CANDLES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return json.loads(b''.join(res.streaming_content))
+
+    def test_resample_five_minutes(self):
+        """Test 5m candles are served from the rollup table."""
+        create_candles()
+        create_candles(symbol='ETH-USD')
+        rebuild_rollups()
+
+        data = self.get_json({
+            'symbol': 'BTC-USD',
+            'interval': '5m',
+            'start': START.isoformat(),
+            'end': (START + timedelta(hours=1)).isoformat(),
+        })
+
+        self.assertEqual(data['interval'], '5m')
+        self.assertEqual(data['t'], [
+            int(START.timestamp()),
+            int(START.timestamp()) + 300,
+        ])
+        self.assertEqual(data['o'], [100.0, 105.0])
+        self.assertEqual(data['h'], [105.0, 110.0])
+        self.assertEqual(data['l'], [99.0, 104.0])
+        self.assertEqual(data['c'], [104.5, 109.5])
+        self.assertEqual(data['v'], [5.0, 5.0])
+
+    def test_resample_one_minute_in_sql(self):
+        """Test the raw SQL aggregation matches the stored minutes."""
+        create_candles(minutes=3)
+
+        columns = resample_candles(
+            'BTC-USD', START, START + timedelta(hours=1), '5m',
+        )
+
+        self.assertEqual(columns['o'], [100.0])
+        self.assertEqual(columns['c'], [102.5])
+        self.assertEqual(columns['v'], [3.0])
+
+    def test_range_is_half_open(self):
+        """Test candles at the end of the range are excluded."""
+        create_candles()
+
+        data = self.get_json({
+            'symbol': 'BTC-USD',
+            'start': START.isoformat(),
+            'end': (START + timedelta(minutes=3)).isoformat(),
+        })
+
+        self.assertEqual(len(data['t']), 3)
+
+    def test_invalid_interval(self):
+        """Test an unknown interval is rejected."""
+        res = self.client.get(
+            CANDLES_URL, {'symbol': 'BTC-USD', 'interval': '7m'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_range_too_large(self):
+        """Test a range with too many candles is rejected."""
+        res = self.client.get(CANDLES_URL, {
+            'symbol': 'BTC-USD',
+            'start': '2020-01-01T00:00:00Z',
+            'end': '2023-01-01T00:00:00Z',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,215 @@
+"""
+Tests for the technical indicator engine and API.
+"""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+import numpy as np
+import pytz
+import redis
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from market import indicators
+from core.tests.fakes import FakeRedis
+from market.candles import floor_time
+from market.tests.test_candle_api import START, create_candles
+
+
+INDICATORS_URL = reverse('market:indicators')
+
+
+def random_candles(size=300, seed=1):
+    """Return random walk candle arrays."""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, size))
+    return {
+        't': np.arange(size, dtype=np.int64) * 60,
+        'o': close + rng.normal(0, 0.1, size),
+        'h': close + rng.uniform(0, 1, size),
+        'l': close - rng.uniform(0, 1, size),
+        'c': close,
+        'v': rng.uniform(1, 10, size),
+    }
+
+
+class IndicatorMathTests(SimpleTestCase):
+    """Test indicator computations."""
+
+    def test_ewm_matches_recursion(self):
+        """Test the blocked closed form equals the plain recursion."""
+        x = random_candles()['c']
+        expected = [x[0]]
+        for value in x[1:]:
+            expected.append(expected[-1] + 0.1 * (value - expected[-1]))
+
+        np.testing.assert_allclose(indicators.ewm(x, 0.1), expected)
+
+    def test_sma_values(self):
+        """Test the simple moving average of a ramp."""
+        data = {'c': np.arange(1.0, 6.0)}
+
+        sma = indicators.SMA(period=3).compute(data)['sma']
+
+        np.testing.assert_allclose(sma[2:], [2.0, 3.0, 4.0])
+        self.assertTrue(np.isnan(sma[:2]).all())
+
+    def test_step_matches_compute(self):
+        """Test appending bars one by one equals the vectorized series."""
+        data = random_candles()
+        for name in indicators.INDICATORS:
+            indicator = indicators.get_indicator(name)
+            series = indicator.compute(data)
+            split = 200
+            head = {k: v[:split] for k, v in data.items()}
+            state = indicator.state(head, indicator.compute(head), split - 1)
+            for i in range(split, len(data['t'])):
+                bar = {k: v[i] for k, v in data.items()}
+                values, state = indicator.step(state, bar)
+                for output in indicator.outputs:
+                    np.testing.assert_allclose(
+                        values[output], series[output][i], err_msg=name,
+                    )
+
+    def test_unknown_parameter(self):
+        """Test unknown indicator parameters are rejected."""
+        with self.assertRaises(ValueError):
+            indicators.get_indicator('sma', fast=3)
+
+
+class IndicatorApiTests(TestCase):
+    """Test the indicator endpoint."""
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = patch('market.indicators.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+
+    def test_sma_endpoint(self):
+        """Test an indicator is computed over the requested candles."""
+        create_candles(minutes=5)
+
+        res = self.client.get(INDICATORS_URL, {
+            'symbol': 'BTC-USD',
+            'indicator': 'sma',
+            'period': 3,
+            'start': START.isoformat(),
+            'end': (START + timedelta(hours=1)).isoformat(),
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['params'], {'period': 3})
+        self.assertEqual(len(res.data['t']), 5)
+        self.assertEqual(res.data['sma'][:2], [None, None])
+        self.assertEqual(res.data['sma'][2], 101.5)
+
+    def test_live_series_extended_incrementally(self):
+        """Test new candles only load the bars after the cached ones."""
+        start = floor_time(datetime.now(pytz.UTC) - timedelta(hours=2), '1h')
+        create_candles(minutes=20, start=start)
+        params = {
+            'symbol': 'BTC-USD',
+            'indicator': 'rsi',
+            'start': start.isoformat(),
+        }
+        self.client.get(INDICATORS_URL, params)
+        create_candles(minutes=45, offset=20, start=start)
+
+        with patch(
+            'market.indicators.load_candles', wraps=indicators.load_candles,
+        ) as patched_load:
+            res = self.client.get(INDICATORS_URL, params)
+
+        since = patched_load.call_args.args[1]
+        self.assertEqual(since, start + timedelta(minutes=19))
+        self.redis.store.clear()
+        fresh = self.client.get(INDICATORS_URL, params)
+        self.assertEqual(len(res.data['t']), 45)
+        np.testing.assert_allclose(
+            np.array(res.data['rsi'], dtype=float),
+            np.array(fresh.data['rsi'], dtype=float),
+        )
+
+    def test_empty_live_series_not_served_from_cache(self):
+        """Test candles arriving after an empty live call are served."""
+        start = floor_time(datetime.now(pytz.UTC) - timedelta(hours=2), '1h')
+        params = {
+            'symbol': 'BTC-USD',
+            'indicator': 'sma',
+            'period': 3,
+            'start': start.isoformat(),
+        }
+        self.assertEqual(self.client.get(INDICATORS_URL, params).data['t'], [])
+        create_candles(minutes=5, start=start)
+
+        res = self.client.get(INDICATORS_URL, params)
+
+        self.assertEqual(len(res.data['t']), 5)
+
+    def test_future_end_not_cached(self):
+        """Test a range still in progress is recomputed on every call."""
+        start = floor_time(datetime.now(pytz.UTC) - timedelta(hours=2), '1h')
+        params = {
+            'symbol': 'BTC-USD',
+            'indicator': 'sma',
+            'period': 3,
+            'start': start.isoformat(),
+            'end': (start + timedelta(days=1)).isoformat(),
+        }
+        create_candles(minutes=3, start=start)
+        self.client.get(INDICATORS_URL, params)
+        create_candles(minutes=8, offset=3, start=start)
+
+        res = self.client.get(INDICATORS_URL, params)
+
+        self.assertEqual(len(res.data['t']), 8)
+
+    def test_cache_shared_across_processes(self):
+        """Test a series cached by one process is served to the others."""
+        create_candles(minutes=5)
+        params = {
+            'symbol': 'BTC-USD',
+            'indicator': 'sma',
+            'period': 3,
+            'start': START.isoformat(),
+            'end': (START + timedelta(hours=1)).isoformat(),
+        }
+        self.client.get(INDICATORS_URL, params)
+
+        with patch('market.indicators.load_candles') as patched_load:
+            res = self.client.get(INDICATORS_URL, params)
+
+        patched_load.assert_not_called()
+        self.assertEqual(len(res.data['t']), 5)
+
+    def test_cache_outage_computes_series(self):
+        """Test series are still served when Redis is unreachable."""
+        create_candles(minutes=5)
+
+        with patch(
+            'market.indicators.get_redis', side_effect=redis.ConnectionError,
+        ):
+            res = self.client.get(INDICATORS_URL, {
+                'symbol': 'BTC-USD',
+                'indicator': 'sma',
+                'period': 3,
+                'start': START.isoformat(),
+                'end': (START + timedelta(hours=1)).isoformat(),
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['t']), 5)
+
+    def test_invalid_indicator(self):
+        """Test an unknown indicator is rejected."""
+        res = self.client.get(
+            INDICATORS_URL, {'symbol': 'BTC-USD', 'indicator': 'foo'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
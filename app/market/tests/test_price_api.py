@@ -0,0 +1,119 @@
+"""
+Tests for the Price API.
+"""
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+import pytz
+import redis
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ticker
+from core.tests.fakes import FakeRedis
+from market import prices
+
+
+PRICES_URL = reverse('market:prices')
+
+
+def create_ticker(symbol, price):
+    """Create and return an unsaved sample Ticker."""
+    return Ticker(
+        symbol=symbol,
+        price=price,
+        bid=price - 1,
+        ask=price + 1,
+        volume=100.0,
+        time=datetime(2023, 1, 24, 17, 59, tzinfo=pytz.UTC),
+    )
+
+
+class PriceApiTests(SimpleTestCase):
+    """Test the latest price cache and its endpoint."""
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = patch('market.prices.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+
+    def test_set_prices_single_round_trip(self):
+        """Test every quote is written into one hash."""
+        prices.set_prices([
+            create_ticker('BTC-USD', 21000.0),
+            create_ticker('ETH-USD', 1500.0),
+        ])
+
+        stored = self.redis.hashes[prices.PRICES_KEY]
+        self.assertEqual(len(stored), 2)
+        self.assertEqual(json.loads(stored[b'ETH-USD'])['price'], 1500.0)
+        self.assertEqual(prices.get_price('BTC-USD'), 21000.0)
+        self.assertIsNone(prices.get_price('AVAX-USD'))
+
+    def test_set_prices_publishes_quotes(self):
+        """Test the batch of quotes is published to stream subscribers."""
+        prices.set_prices([create_ticker('BTC-USD', 21000.0)])
+        prices.set_prices([])
+
+        (channel, message), = self.redis.published
+        self.assertEqual(channel, prices.PRICES_CHANNEL)
+        self.assertEqual(json.loads(message)[0]['price'], 21000.0)
+
+    def test_get_prices_for_symbols(self):
+        """Test the endpoint returns quotes for the requested symbols."""
+        prices.set_prices([
+            create_ticker('BTC-USD', 21000.0),
+            create_ticker('ETH-USD', 1500.0),
+        ])
+
+        res = self.client.get(PRICES_URL, {'symbols': 'BTC-USD,AVAX-USD'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['BTC-USD']['price'], 21000.0)
+        self.assertIsNone(res.data['AVAX-USD'])
+        self.assertNotIn('ETH-USD', res.data)
+
+    def test_get_all_prices(self):
+        """Test every cached quote is returned without a filter."""
+        prices.set_prices([
+            create_ticker('BTC-USD', 21000.0),
+            create_ticker('ETH-USD', 1500.0),
+        ])
+
+        res = self.client.get(PRICES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data), {'BTC-USD', 'ETH-USD'})
+
+    def test_empty_symbols_error(self):
+        """Test an empty symbol list is rejected."""
+        res = self.client.get(PRICES_URL, {'symbols': ','})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@patch('market.prices.get_redis', side_effect=redis.ConnectionError)
+class PriceFallbackTests(TestCase):
+    """Test quotes are served from the database without Redis."""
+
+    def test_stored_tickers_served(self, patched_redis):
+        """Test the endpoint falls back to the stored tickers."""
+        create_ticker('BTC-USD', 21000.0).save()
+        create_ticker('ETH-USD', 1500.0).save()
+        client = APIClient()
+
+        res = client.get(PRICES_URL, {'symbols': 'BTC-USD,AVAX-USD'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['BTC-USD']['price'], 21000.0)
+        self.assertIsNone(res.data['AVAX-USD'])
+        self.assertEqual(set(client.get(PRICES_URL).data), {
+            'BTC-USD', 'ETH-USD',
+        })
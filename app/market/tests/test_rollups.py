@@ -0,0 +1,103 @@
+"""
+Tests for the incremental candle rollups.
+"""
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from core.models import Crypto, CryptoRollup
+from core.ingest import upsert_candles
+from market.rollups import update_rollups_for
+from market.tasks import refresh_rollups
+from market.tests.test_candle_api import START, create_candles
+
+
+class RollupTests(TestCase):
+    """Test rollups are maintained from minute candles."""
+
+    def test_update_only_touched_buckets(self):
+        """Test new candles refresh their buckets in every interval."""
+        create_candles(minutes=10)
+        call_command('rebuild_crypto_rollups', stdout=StringIO())
+        untouched = CryptoRollup.objects.get(interval='5m', bucket=START)
+
+        candle = Crypto(
+            date_and_time=START + timedelta(minutes=7),
+            open=106.0,
+            high=200.0,
+            low=106.0,
+            close=106.5,
+            volume=3.0,
+            symbol='BTC-USD',
+        )
+        upsert_candles([candle])
+        update_rollups_for([candle])
+
+        five = CryptoRollup.objects.get(
+            interval='5m', bucket=START + timedelta(minutes=5),
+        )
+        self.assertEqual(five.high, 200.0)
+        self.assertEqual(five.volume, 7.0)
+        self.assertEqual(five.open, 105.0)
+        self.assertEqual(five.close, 109.5)
+        hour = CryptoRollup.objects.get(interval='1h', bucket=START)
+        self.assertEqual(hour.volume, 12.0)
+        day = CryptoRollup.objects.get(interval='1d')
+        self.assertEqual(day.high, 200.0)
+        untouched_now = CryptoRollup.objects.get(interval='5m', bucket=START)
+        self.assertEqual(untouched_now.id, untouched.id)
+
+    def test_refresh_after_ingestion_shards(self):
+        """Test one task refreshes the rollups of every shard's candles."""
+        create_candles(minutes=10)
+        create_candles(symbol='ETH-USD', minutes=10)
+        start = START.timestamp()
+
+        written = refresh_rollups([
+            {'stored': 5, 'symbols': ['BTC-USD'],
+             'start': start, 'end': start + 240},
+            {'stored': 0, 'symbols': [], 'start': None, 'end': None},
+            {'stored': 1, 'symbols': ['ETH-USD'],
+             'start': start + 540, 'end': start + 540},
+        ])
+
+        self.assertGreater(written, 0)
+        for symbol in ('BTC-USD', 'ETH-USD'):
+            hour = CryptoRollup.objects.get(
+                symbol=symbol, interval='1h', bucket=START,
+            )
+            self.assertEqual(hour.volume, 10.0)
+        self.assertEqual(refresh_rollups([None]), 0)
+
+    def test_rebuild_command_per_symbol(self):
+        """Test the rebuild command can target a single symbol."""
+        create_candles(minutes=10)
+        create_candles(symbol='ETH-USD', minutes=10)
+
+        call_command(
+            'rebuild_crypto_rollups', '--symbol', 'ETH-USD', stdout=StringIO(),
+        )
+
+        self.assertEqual(CryptoRollup.objects.filter(
+            symbol='ETH-USD', interval='5m').count(), 2)
+        self.assertFalse(CryptoRollup.objects.filter(
+            symbol='BTC-USD').exists())
+
+    def test_migration_backfills_existing_candles(self):
+        """Test candles stored before the rollups existed get rolled up."""
+        create_candles(minutes=10)
+        migration = import_module(
+            'core.migrations.0031_backfill_crypto_rollups',
+        )
+
+        migration.backfill_rollups(apps, connection.schema_editor())
+
+        self.assertEqual(
+            CryptoRollup.objects.filter(interval='5m').count(), 2,
+        )
+        self.assertTrue(CryptoRollup.objects.filter(interval='1d').exists())
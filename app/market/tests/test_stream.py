@@ -0,0 +1,234 @@
+"""
+Tests for the price push streams.
+"""
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from market import stream
+
+
+def quote(symbol, price):
+    """Return a sample quote."""
+    return {'symbol': symbol, 'price': price}
+
+
+class FakePubSub:
+    """Pub/sub stand-in delivering queued messages, then stopping."""
+
+    def __init__(self, hub, messages):
+        self.hub = hub
+        self.messages = list(messages)
+
+    def subscribe(self, channel):
+        self.channel = channel
+
+    def get_message(self, timeout=None):
+        if not self.messages:
+            self.hub.stop()
+            return None
+        return {'data': self.messages.pop(0)}
+
+    def close(self):
+        pass
+
+
+class Client:
+    """Drive an ASGI connection from a test."""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.incoming = asyncio.Queue()
+        self.sent = asyncio.Queue()
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send(self, message):
+        await self.sent.put(message)
+
+    async def next_sent(self):
+        return await asyncio.wait_for(self.sent.get(), 1)
+
+
+class SubscriptionTests(SimpleTestCase):
+    """Test per client buffering."""
+
+    def test_slow_consumer_gets_latest_quote_per_symbol(self):
+        """Test unsent quotes are coalesced to the latest per symbol."""
+        async def run():
+            subscription = stream.Subscription(['BTC-USD', 'ETH-USD'])
+            for price in range(1000):
+                subscription.offer(quote('BTC-USD', price))
+            subscription.offer(quote('ETH-USD', 1.0))
+
+            batch = await subscription.get()
+            empty = await subscription.get(timeout=0.01)
+            return batch, empty
+
+        batch, empty = asyncio.run(run())
+
+        self.assertEqual(batch['BTC-USD']['price'], 999)
+        self.assertEqual(batch['ETH-USD']['price'], 1.0)
+        self.assertEqual(empty, {})
+
+    def test_snapshot_does_not_override_fresh_ticks(self):
+        """Test cached quotes only fill symbols without a newer tick."""
+        async def run():
+            subscription = stream.Subscription()
+            subscription.offer(quote('BTC-USD', 2.0))
+            subscription.seed({
+                'BTC-USD': quote('BTC-USD', 1.0),
+                'ETH-USD': quote('ETH-USD', 3.0),
+                'AVAX-USD': None,
+            })
+            return await subscription.get()
+
+        batch = asyncio.run(run())
+
+        self.assertEqual(batch, {
+            'BTC-USD': quote('BTC-USD', 2.0),
+            'ETH-USD': quote('ETH-USD', 3.0),
+        })
+
+
+class PriceHubTests(SimpleTestCase):
+    """Test quotes are fanned out per symbol."""
+
+    def test_dispatch_by_symbol(self):
+        """Test quotes reach subscribers of their symbol only."""
+        async def run():
+            hub = stream.PriceHub()
+            btc = stream.Subscription(['BTC-USD'])
+            everything = stream.Subscription()
+            with patch.object(hub, '_start'):
+                hub.subscribe(btc)
+                hub.subscribe(everything)
+            hub.dispatch([quote('BTC-USD', 1.0), quote('ETH-USD', 2.0)])
+            hub.unsubscribe(btc)
+            hub.dispatch([quote('BTC-USD', 3.0)])
+            return btc.pending, everything.pending, hub.by_symbol
+
+        btc, everything, by_symbol = asyncio.run(run())
+
+        self.assertEqual(btc, {'BTC-USD': quote('BTC-USD', 1.0)})
+        self.assertEqual(everything['BTC-USD']['price'], 3.0)
+        self.assertEqual(everything['ETH-USD']['price'], 2.0)
+        self.assertEqual(dict(by_symbol), {})
+
+    @patch('market.stream.get_redis')
+    def test_listener_relays_channel_messages(self, patched_redis):
+        """Test published batches are dispatched on the event loop."""
+        async def run():
+            hub = stream.PriceHub()
+            hub.loop = asyncio.get_running_loop()
+            patched_redis.return_value.pubsub.return_value = FakePubSub(
+                hub, [json.dumps([quote('BTC-USD', 1.0)])],
+            )
+            hub.dispatch = MagicMock()
+            await hub.loop.run_in_executor(None, hub._listen)
+            await asyncio.sleep(0)
+            return hub.dispatch
+
+        dispatch = asyncio.run(run())
+
+        dispatch.assert_called_once_with([quote('BTC-USD', 1.0)])
+
+
+@patch('market.stream.hub._start')
+@patch('market.stream.get_prices')
+class PriceStreamRouterTests(SimpleTestCase):
+    """Test the ASGI price stream endpoints."""
+
+    def setUp(self):
+        self.django = MagicMock()
+        self.app = stream.PriceStreamRouter(self.django)
+
+    def test_websocket_stream(self, patched_prices, patched_start):
+        """Test a socket gets the snapshot, then its symbols' ticks."""
+        patched_prices.return_value = {'BTC-USD': quote('BTC-USD', 1.0)}
+
+        async def run():
+            client = Client({
+                'type': 'websocket',
+                'path': stream.WEBSOCKET_PATH,
+                'query_string': b'symbols=BTC-USD',
+            })
+            await client.incoming.put({'type': 'websocket.connect'})
+            task = asyncio.ensure_future(
+                self.app(client.scope, client.receive, client.send)
+            )
+            accepted = await client.next_sent()
+            snapshot = await client.next_sent()
+            stream.hub.dispatch([
+                quote('ETH-USD', 5.0),
+                quote('BTC-USD', 2.0),
+                quote('BTC-USD', 3.0),
+            ])
+            tick = await client.next_sent()
+            await client.incoming.put({'type': 'websocket.disconnect'})
+            await asyncio.wait_for(task, 1)
+            return accepted, snapshot, tick
+
+        accepted, snapshot, tick = asyncio.run(run())
+
+        patched_prices.assert_called_once_with(['BTC-USD'])
+        self.assertEqual(accepted['type'], 'websocket.accept')
+        self.assertEqual(json.loads(snapshot['text'])['BTC-USD']['price'], 1)
+        self.assertEqual(json.loads(tick['text']), {
+            'BTC-USD': quote('BTC-USD', 3.0),
+        })
+        self.assertEqual(dict(stream.hub.by_symbol), {})
+
+    @patch('market.stream.HEARTBEAT', 0.01)
+    def test_sse_stream(self, patched_prices, patched_start):
+        """Test events are streamed with keep-alive comments in between."""
+        patched_prices.return_value = {}
+
+        async def run():
+            client = Client({
+                'type': 'http',
+                'method': 'GET',
+                'path': stream.SSE_PATH,
+                'query_string': b'',
+            })
+            task = asyncio.ensure_future(
+                self.app(client.scope, client.receive, client.send)
+            )
+            start = await client.next_sent()
+            keep_alive = await client.next_sent()
+            stream.hub.dispatch([quote('ETH-USD', 5.0)])
+            while True:
+                event = await client.next_sent()
+                if event['body'].startswith(b'data:'):
+                    break
+            await client.incoming.put({'type': 'http.disconnect'})
+            await asyncio.wait_for(task, 1)
+            return start, keep_alive, event
+
+        start, keep_alive, event = asyncio.run(run())
+
+        patched_prices.assert_called_once_with(None)
+        self.assertIn(
+            (b'content-type', b'text/event-stream'), start['headers'],
+        )
+        self.assertEqual(keep_alive['body'], b': keep-alive\n\n')
+        self.assertEqual(
+            json.loads(event['body'][len(b'data: '):]),
+            {'ETH-USD': quote('ETH-USD', 5.0)},
+        )
+        self.assertEqual(stream.hub.everything, set())
+
+    def test_other_requests_reach_django(self, patched_prices, patched_start):
+        """Test plain HTTP requests are handled by the Django app."""
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/prices/'}
+
+        async def run():
+            self.django.return_value = asyncio.sleep(0)
+            await self.app(scope, None, None)
+
+        asyncio.run(run())
+
+        self.django.assert_called_once_with(scope, None, None)
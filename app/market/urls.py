@@ -0,0 +1,16 @@
+"""
+URL mappings for the Market data APIs.
+"""
+from django.urls import path
+
+from market import views
+
+
+app_name = 'market'
+
+urlpatterns = [
+    path('prices/', views.PriceView.as_view(), name='prices'),
+    path('candles/', views.CandleView.as_view(), name='candles'),
+    path('indicators/', views.IndicatorView.as_view(), name='indicators'),
+    path('backtest/', views.BacktestView.as_view(), name='backtest'),
+]
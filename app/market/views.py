@@ -0,0 +1,152 @@
+"""
+Views for the Market data APIs.
+"""
+import logging
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+import redis
+
+from market.backtest import simulate_orders, sweep
+from market.candles import get_candles, iter_json
+from market.indicators import indicator_series, load_candles
+from market.prices import get_prices, stored_prices
+from market.serializers import (
+    BacktestSerializer,
+    CandleQuerySerializer,
+    IndicatorQuerySerializer,
+)
+from user.authentication import CachedTokenAuthentication
+
+
+logger = logging.getLogger(__name__)
+
+
+class PriceView(APIView):
+    """Serve the latest cached quotes for one or many symbols."""
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        """Return quotes for ?symbols=A,B (every cached symbol if unset)."""
+        symbols = request.query_params.get('symbols')
+        if symbols is not None:
+            symbols = [s for s in symbols.split(',') if s]
+            if not symbols:
+                return Response(
+                    {'symbols': 'Provide a comma separated list of symbols.'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        try:
+            return Response(get_prices(symbols))
+        except redis.RedisError as exc:
+            logger.error(f"price cache unavailable, reading tickers: {exc}")
+            return Response(stored_prices(symbols))
+
+
+class CandleView(APIView):
+    """Serve OHLCV candles resampled to the requested interval."""
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        """Stream candles as column arrays (t, o, h, l, c, v)."""
+        query = CandleQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        columns = get_candles(
+            params['symbol'],
+            params['start'],
+            params['end'],
+            params['interval'],
+        )
+        header = {
+            'symbol': params['symbol'],
+            'interval': params['interval'],
+        }
+
+        return StreamingHttpResponse(
+            iter_json(header, columns),
+            content_type='application/json',
+        )
+
+
+class IndicatorView(APIView):
+    """Serve a technical indicator computed over stored candles."""
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        """Return the indicator series as column arrays."""
+        query = IndicatorQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        indicator = params['indicator']
+
+        series = indicator_series(
+            params['symbol'],
+            params['interval'],
+            indicator,
+            params['start'],
+            params['end'],
+        )
+
+        return Response({
+            'symbol': params['symbol'],
+            'interval': params['interval'],
+            'indicator': indicator.name,
+            'params': indicator.p,
+            **series,
+        })
+
+
+class BacktestView(APIView):
+    """Backtest SL/TP orders or rules against stored candles."""
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Simulate the orders, or sweep the rule's parameter grid."""
+        query = BacktestSerializer(data=request.data)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        data = load_candles(
+            params['symbol'],
+            params['start'],
+            params['end'],
+            params['interval'],
+        )
+        result = {
+            'symbol': params['symbol'],
+            'interval': params['interval'],
+            'candles': len(data['t']),
+        }
+
+        if 'orders' in params:
+            result['orders'] = simulate_orders(data, [
+                dict(order, entry_time=order['start_date_time'].timestamp())
+                for order in params['orders']
+            ])
+        else:
+            rule = params['sweep']
+            result['sweep'] = sweep(
+                data,
+                rule['stop_loss_pct'],
+                rule['take_profit_pct'],
+                every=rule['every'],
+                side=rule['side'],
+                leverage=rule['leverage'],
+                amount=rule['amount'],
+                workers=settings.BACKTEST_WORKERS,
+            )
+
+        return Response(result)
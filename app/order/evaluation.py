@@ -0,0 +1,170 @@
+"""
+Stop-loss / take-profit evaluation of open orders.
+"""
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Case, F, Q, Value, When
+
+import pytz
+
+from core.models import Order
+from core.symbols import registry
+
+
+class TriggerIndex:
+    """
+    Sorted trigger levels of the open orders of one symbol.
+
+    Levels live in two sorted lists: `below` fires once the price drops
+    to the level (long stop loss, short take profit), `above` once it
+    rises to it (long take profit, short stop loss). Each order has one
+    entry in both lists; entries of orders that are gone are dropped
+    lazily, so a tick costs O(log n + hits).
+    """
+
+    def __init__(self):
+        self.below = []
+        self.above = []
+        self.live = set()
+
+    def __len__(self):
+        return len(self.live)
+
+    def add(self, order_id, stop_loss, take_profit):
+        """Index an open order."""
+        if take_profit >= stop_loss:
+            low, high = stop_loss, take_profit
+        else:
+            low, high = take_profit, stop_loss
+        self.below.insert(bisect_left(self.below, (low, order_id)),
+                          (low, order_id))
+        self.above.insert(bisect_left(self.above, (high, order_id)),
+                          (high, order_id))
+        self.live.add(order_id)
+
+    def hits(self, price):
+        """Pop and return the ids of every order triggered at price."""
+        start = bisect_left(self.below, (price, -1))
+        end = bisect_right(self.above, (price, float('inf')))
+        triggered = [i for _, i in self.below[start:]]
+        triggered += [i for _, i in self.above[:end]]
+        del self.below[start:]
+        del self.above[:end]
+
+        hits = {i for i in triggered if i in self.live}
+        self.live -= hits
+        return hits
+
+
+class EvaluationEngine:
+    """
+    Keep trigger indexes of open orders in memory and close the orders
+    crossed by each new price batch.
+
+    Orders created since the last batch are indexed incrementally; the
+    whole index is rebuilt every ORDER_INDEX_REFRESH seconds to pick up
+    edited or externally closed orders. The closing UPDATE re-checks the
+    levels in SQL, so a stale index can never close an order wrongly;
+    hit orders it leaves open are indexed again at their current levels.
+    """
+
+    def __init__(self, refresh_interval=None):
+        self.refresh_interval = (
+            settings.ORDER_INDEX_REFRESH
+            if refresh_interval is None else refresh_interval
+        )
+        self.indexes = defaultdict(TriggerIndex)
+        self.last_id = 0
+        self.built_at = None
+
+    def _load(self, queryset):
+        rows = queryset.filter(close_date_time__isnull=True).values_list(
+            'id', 'symbol', 'stop_loss', 'take_profit',
+        )
+        for order_id, symbol, stop_loss, take_profit in rows.iterator():
+            self.indexes[symbol].add(order_id, stop_loss, take_profit)
+            self.last_id = max(self.last_id, order_id)
+
+    def refresh(self):
+        """Rebuild the indexes if stale, else index new orders only."""
+        now = time.monotonic()
+        if (
+            self.built_at is None
+            or now - self.built_at >= self.refresh_interval
+        ):
+            self.indexes = defaultdict(TriggerIndex)
+            self.last_id = 0
+            self._load(Order.objects.all())
+            self.built_at = now
+        else:
+            self._load(Order.objects.filter(id__gt=self.last_id))
+
+    def evaluate(self, prices, now=None):
+        """
+        Close every open order whose SL or TP is crossed by prices, a
+        {symbol: price} mapping, with one UPDATE. Prices of inactive
+        symbols are ignored. Return how many orders were closed.
+        """
+        self.refresh()
+
+        hits = {}
+        for symbol, price in prices.items():
+            if symbol in self.indexes and registry.is_active(symbol):
+                ids = self.indexes[symbol].hits(price)
+                if ids:
+                    hits[symbol] = (price, ids)
+
+        closed = close_orders(hits, now)
+        if closed < sum(len(ids) for _, ids in hits.values()):
+            self._load(Order.objects.filter(id__in=[
+                i for _, ids in hits.values() for i in ids
+            ]))
+
+        return closed
+
+
+def _crossed(price):
+    """Q matching orders whose SL or TP is crossed at price."""
+    is_long = Q(take_profit__gte=F('stop_loss'))
+    is_short = Q(take_profit__lt=F('stop_loss'))
+    return (
+        is_long & (Q(stop_loss__gte=price) | Q(take_profit__lte=price))
+    ) | (
+        is_short & (Q(stop_loss__lte=price) | Q(take_profit__gte=price))
+    )
+
+
+def close_orders(hits, now=None):
+    """
+    Close the orders in hits, a {symbol: (price, ids)} mapping, at the
+    price of their symbol with a single UPDATE. Return how many orders
+    were closed.
+    """
+    if not hits:
+        return 0
+
+    now = now or datetime.now(pytz.UTC)
+    condition = Q()
+    for symbol, (price, ids) in hits.items():
+        condition |= Q(symbol=symbol, id__in=ids) & _crossed(price)
+
+    return Order.objects.filter(
+        condition,
+        close_date_time__isnull=True,
+    ).update(
+        close_date_time=now,
+        closing_price=Case(
+            *[
+                When(symbol=s, then=Value(Decimal(str(p))))
+                for s, (p, _) in hits.items()
+            ]
+        ),
+    )
+
+
+engine = EvaluationEngine()
@@ -0,0 +1,12 @@
+"""
+Pagination for the Order APIs.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class OrderCursorPagination(CursorPagination):
+    """Keyset pagination over the order id, newest first."""
+    ordering = '-id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
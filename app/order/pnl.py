@@ -0,0 +1,148 @@
+"""
+Vectorized profit and loss computation for order portfolios.
+"""
+from decimal import Decimal
+
+import numpy as np
+
+import redis
+
+from core.models import DECIMAL_PLACES, Ticker
+from market.prices import get_prices
+
+
+ORDER_COLUMNS = (
+    'symbol',
+    'amount',
+    'leverage',
+    'initial_price',
+    'closing_price',
+    'stop_loss',
+    'take_profit',
+)
+SCALE = 10 ** DECIMAL_PLACES
+
+
+def latest_prices(symbols):
+    """
+    Return {symbol: price} from the price cache, falling back to the
+    stored tickers if Redis is unavailable.
+    """
+    try:
+        quotes = get_prices(symbols)
+        return {s: q['price'] for s, q in quotes.items() if q}
+    except redis.RedisError:
+        return dict(
+            Ticker.objects.filter(symbol__in=symbols)
+            .values_list('symbol', 'price')
+        )
+
+
+def _scaled(values):
+    """Fixed-point values as int64 counts of 10^-8 (None counted as 0)."""
+    return np.array([
+        0 if v is None
+        else int((Decimal(str(v)) * SCALE).to_integral_value())
+        for v in values
+    ], dtype=np.int64)
+
+
+def _unscaled(count):
+    """Turn a count of 10^-8 back into a Decimal."""
+    return Decimal(int(count)).scaleb(-DECIMAL_PLACES)
+
+
+def compute_pnl(rows, prices):
+    """
+    Compute PnL for rows of ORDER_COLUMNS values in one vectorized pass.
+
+    amount is the margin put up, amount * leverage the exposure. Orders
+    are long when take_profit is above stop_loss. Closed orders realize
+    PnL at closing_price; open ones are marked to prices, a {symbol:
+    price} mapping, and left out of unrealized PnL if unpriced.
+
+    Margins, exposures and each order's PnL, rounded to 10^-8, are
+    summed as scaled int64 so totals are exact Decimals; only the price
+    ratio of an order is taken in floating point.
+    """
+    summary = {
+        'orders': len(rows),
+        'open_orders': 0,
+        'realized_pnl': _unscaled(0),
+        'unrealized_pnl': _unscaled(0),
+        'exposure': _unscaled(0),
+        'margin': _unscaled(0),
+        'symbols': {},
+    }
+    if not rows:
+        return summary
+
+    (
+        symbols, amount, leverage, initial, closing, stop_loss, take_profit,
+    ) = zip(*rows)
+    names, symbol_idx = np.unique(np.array(symbols), return_inverse=True)
+    initial, closing, stop_loss, take_profit = (
+        np.array(column, dtype=np.float64)
+        for column in (initial, closing, stop_loss, take_profit)
+    )
+    amount = _scaled(amount)
+
+    is_open = np.isnan(closing)
+    direction = np.where(take_profit >= stop_loss, 1.0, -1.0)
+    exposure = amount * np.array(leverage, dtype=np.int64)
+    marks = np.array(
+        [prices.get(name, np.nan) for name in names], dtype=np.float64,
+    )
+    exit_price = np.where(is_open, marks[symbol_idx], closing)
+    pnl = np.rint(direction * exposure * (exit_price / initial - 1.0))
+    pnl = np.nan_to_num(pnl).astype(np.int64)
+
+    realized = np.where(is_open, 0, pnl)
+    unrealized = np.where(is_open, pnl, 0)
+    open_exposure = np.where(is_open, exposure, 0)
+    open_margin = np.where(is_open, amount, 0)
+
+    def per_symbol(column):
+        totals = np.zeros(len(names), dtype=np.int64)
+        np.add.at(totals, symbol_idx, column)
+        return totals
+
+    by_symbol = zip(
+        names,
+        per_symbol(np.ones_like(pnl)),
+        per_symbol(is_open.astype(np.int64)),
+        per_symbol(realized),
+        per_symbol(unrealized),
+        per_symbol(open_exposure),
+        per_symbol(open_margin),
+    )
+    summary.update({
+        'open_orders': int(is_open.sum()),
+        'realized_pnl': _unscaled(realized.sum()),
+        'unrealized_pnl': _unscaled(unrealized.sum()),
+        'exposure': _unscaled(open_exposure.sum()),
+        'margin': _unscaled(open_margin.sum()),
+        'symbols': {
+            str(name): {
+                'orders': int(count),
+                'open_orders': int(open_count),
+                'realized_pnl': _unscaled(r),
+                'unrealized_pnl': _unscaled(u),
+                'exposure': _unscaled(e),
+                'margin': _unscaled(m),
+                'price': prices.get(name),
+            }
+            for name, count, open_count, r, u, e, m in by_symbol
+        },
+    })
+
+    return summary
+
+
+def portfolio_summary(queryset):
+    """Load the orders of queryset as arrays and summarize their PnL."""
+    rows = list(queryset.order_by().values_list(*ORDER_COLUMNS))
+    open_symbols = {r[0] for r in rows if r[4] is None}
+    prices = latest_prices(sorted(open_symbols)) if open_symbols else {}
+
+    return compute_pnl(rows, prices)
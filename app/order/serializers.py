@@ -1,12 +1,43 @@
 """
 Serializers for Order APIs.
 """
+from datetime import datetime
+from decimal import Decimal
+
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+import pytz
+
+from core.models import DECIMAL_PLACES, MAX_DIGITS, Order
+from core.symbols import registry
+from order.pnl import latest_prices
+
 
-from core.models import Order
+MAX_BULK_ORDERS = 500
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Drop every field not listed in the ?fields= query parameter of read
+    requests. Writes keep every field, so none is silently skipped.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        requested = (
+            request
+            and request.method in SAFE_METHODS
+            and request.query_params.get('fields')
+        )
+        if requested:
+            keep = set(requested.split(','))
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
+
+
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for Orders."""
 
     class Meta:
@@ -19,6 +50,35 @@ class OrderSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id']
 
+    PRICE_FIELDS = ('initial_price', 'stop_loss', 'take_profit')
+
+    def validate_symbol(self, value):
+        """Only active registered symbols are tradable."""
+        if not registry.is_active(value):
+            raise serializers.ValidationError(
+                f'{value} is not a tradable symbol.'
+            )
+
+        return value
+
+    def validate(self, attrs):
+        """Price levels must be whole ticks of the order's symbol."""
+        name = attrs.get('symbol') or getattr(self.instance, 'symbol', None)
+        symbol = registry.get(name)
+        if symbol is None:
+            return attrs
+
+        errors = {
+            field: [f'Must be a multiple of the tick size {symbol.tick_size}.']
+            for field in self.PRICE_FIELDS
+            if attrs.get(field) is not None
+            and attrs[field] % symbol.tick_size
+        }
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        return attrs
+
 
 class OrderDetailSerializer(OrderSerializer):
     """Serializer for Order Detail view."""
@@ -32,3 +92,106 @@ class OrderDetailSerializer(OrderSerializer):
             'close_date_time',
             'closing_price',
         ]
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    List serializer for bulk requests. Errors are reported per item, as
+    a list aligned with the request with {} for the valid items.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) > MAX_BULK_ORDERS:
+            raise serializers.ValidationError({
+                'non_field_errors': [
+                    f'At most {MAX_BULK_ORDERS} orders per request.'
+                ],
+            })
+
+        return super().to_internal_value(data)
+
+
+class OrderBulkCreateSerializer(BulkListSerializer):
+    """Create every order of the list with a single INSERT."""
+
+    def create(self, validated_data):
+        return Order.objects.bulk_create(
+            [Order(**attrs) for attrs in validated_data]
+        )
+
+
+class OrderCloseSerializer(serializers.Serializer):
+    """
+    Serializer for closing an Order. The closing price defaults to the
+    latest price of the order's symbol.
+    """
+    id = serializers.IntegerField()
+    closing_price = serializers.DecimalField(
+        max_digits=MAX_DIGITS,
+        decimal_places=DECIMAL_PLACES,
+        required=False,
+    )
+    close_date_time = serializers.DateTimeField(required=False)
+
+
+class OrderBulkCloseSerializer(BulkListSerializer):
+    """
+    Close the open orders of the requesting user with a single UPDATE.
+    Must be validated inside a transaction, the orders are locked.
+    """
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+        ids = [item['id'] for item in items]
+        orders = Order.objects.select_for_update().filter(
+            user=self.context['request'].user,
+            id__in=ids,
+        ).in_bulk()
+        prices = latest_prices({
+            orders[item['id']].symbol
+            for item in items
+            if item['id'] in orders and 'closing_price' not in item
+        })
+        now = datetime.now(pytz.UTC)
+
+        errors = []
+        seen = set()
+        for item in items:
+            order = orders.get(item['id'])
+            error = {}
+            if order is None:
+                error['id'] = ['Order not found.']
+            elif order.close_date_time is not None:
+                error['id'] = ['Order is already closed.']
+            elif item['id'] in seen:
+                error['id'] = ['Order is listed more than once.']
+            elif 'closing_price' not in item:
+                if order.symbol not in prices:
+                    error['closing_price'] = [
+                        f'No price available for {order.symbol}.'
+                    ]
+                else:
+                    price = str(prices[order.symbol])
+                    item['closing_price'] = Decimal(price)
+            seen.add(item['id'])
+            item['order'] = order
+            item.setdefault('close_date_time', now)
+            errors.append(error)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        return items
+
+    def create(self, validated_data):
+        orders = []
+        for item in validated_data:
+            order = item['order']
+            order.closing_price = item['closing_price']
+            order.close_date_time = item['close_date_time']
+            orders.append(order)
+        Order.objects.bulk_update(
+            orders, ['closing_price', 'close_date_time'],
+        )
+
+        return orders
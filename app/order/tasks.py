@@ -0,0 +1,20 @@
+"""
+Celery tasks for Orders.
+"""
+from celery import shared_task
+from celery.utils.log import get_task_logger
+
+from order.evaluation import engine
+
+
+logger = get_task_logger(__name__)
+
+
+@shared_task
+def evaluate_orders(prices):
+    """Close open orders crossed by a {symbol: price} batch."""
+    closed = engine.evaluate(prices)
+    if closed:
+        logger.info(f"closed {closed} order(s) at {prices}")
+
+    return closed
@@ -0,0 +1,160 @@
+"""
+Tests for the bulk Order APIs.
+"""
+from datetime import datetime
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+
+import pytz
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Order
+from core.symbols import registry
+from order.tests.test_order_api import create_order, create_user
+
+
+BULK_URL = reverse('order:order-bulk-create')
+BULK_CLOSE_URL = reverse('order:order-bulk-close')
+
+
+def order_payload(**params):
+    """Return a sample order as posted by clients."""
+    payload = {
+        'symbol': 'BTC-USD',
+        'amount': 100.0,
+        'start_date_time': '2023-01-13T14:30:12Z',
+        'initial_price': 21000.0,
+        'stop_loss': 20000.0,
+        'take_profit': 23000.0,
+        'leverage': 10,
+    }
+    payload.update(params)
+    return payload
+
+
+class BulkCreateTests(TestCase):
+    """Test creating orders in bulk."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+
+    def test_auth_required(self):
+        """Test auth is required to create orders in bulk."""
+        res = APIClient().post(BULK_URL, [order_payload()], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bulk_create(self):
+        """Test a basket of orders is created with one query."""
+        payload = [order_payload(initial_price=i) for i in range(1, 51)]
+        registry.all()
+
+        with self.assertNumQueries(3):
+            res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 50)
+        orders = Order.objects.filter(user=self.user).order_by('id')
+        self.assertEqual(orders.count(), 50)
+        self.assertEqual([o.id for o in orders], [o['id'] for o in res.data])
+
+    def test_errors_reported_per_item(self):
+        """Test invalid items are reported in place and nothing is saved."""
+        payload = [
+            order_payload(),
+            order_payload(leverage='high'),
+            order_payload(),
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('leverage', res.data[1])
+        self.assertEqual(res.data[2], {})
+        self.assertFalse(Order.objects.exists())
+
+    @patch('order.serializers.MAX_BULK_ORDERS', 2)
+    def test_bulk_size_limited(self):
+        """Test oversized baskets are rejected."""
+        res = self.client.post(
+            BULK_URL, [order_payload()] * 3, format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('non_field_errors', res.data)
+
+
+class BulkCloseTests(TestCase):
+    """Test closing orders in bulk."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_close(self):
+        """Test orders are closed at the given or latest price."""
+        btc = create_order(user=self.user, symbol='BTC-USD')
+        eth = create_order(user=self.user, symbol='ETH-USD')
+        closed_at = datetime(2023, 2, 1, tzinfo=pytz.UTC)
+
+        with patch(
+            'order.serializers.latest_prices',
+            return_value={'ETH-USD': 1500.0},
+        ) as patched_prices:
+            res = self.client.post(BULK_CLOSE_URL, [
+                {
+                    'id': btc.id,
+                    'closing_price': 140000.0,
+                    'close_date_time': closed_at.isoformat(),
+                },
+                {'id': eth.id},
+            ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        patched_prices.assert_called_once_with({'ETH-USD'})
+        btc.refresh_from_db()
+        eth.refresh_from_db()
+        self.assertEqual(btc.closing_price, 140000.0)
+        self.assertEqual(btc.close_date_time, closed_at)
+        self.assertEqual(eth.closing_price, 1500.0)
+        self.assertIsNotNone(eth.close_date_time)
+        self.assertEqual(res.data[1]['closing_price'], 1500.0)
+
+    @patch('order.serializers.latest_prices', return_value={})
+    def test_errors_reported_per_item(self, patched_prices):
+        """Test unknown, foreign, closed or unpriced orders are rejected."""
+        other = create_user(email='other@example.com', password='test123')
+        mine = create_order(user=self.user)
+        closed = create_order(
+            user=self.user,
+            close_date_time=datetime(2023, 2, 1, tzinfo=pytz.UTC),
+            closing_price=1.0,
+        )
+        foreign = create_order(user=other)
+
+        res = self.client.post(BULK_CLOSE_URL, [
+            {'id': mine.id, 'closing_price': 1.0},
+            {'id': closed.id, 'closing_price': 1.0},
+            {'id': foreign.id, 'closing_price': 1.0},
+            {'id': mine.id, 'closing_price': 1.0},
+            {'id': foreign.id + 1000},
+            {'id': create_order(user=self.user).id},
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('already closed', res.data[1]['id'][0])
+        self.assertIn('not found', res.data[2]['id'][0])
+        self.assertIn('more than once', res.data[3]['id'][0])
+        self.assertIn('not found', res.data[4]['id'][0])
+        self.assertIn('closing_price', res.data[5])
+        mine.refresh_from_db()
+        self.assertIsNone(mine.close_date_time)
@@ -0,0 +1,121 @@
+"""
+Tests for the stop-loss / take-profit evaluation engine.
+"""
+from datetime import datetime
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase
+
+import pytz
+
+from core.models import Order
+from order.evaluation import EvaluationEngine, TriggerIndex
+from order.tests.test_order_api import create_order, create_user
+
+
+class TriggerIndexTests(SimpleTestCase):
+    """Test the sorted trigger index."""
+
+    def test_long_and_short_levels(self):
+        """Test longs and shorts fire on the right side of the price."""
+        index = TriggerIndex()
+        index.add(1, stop_loss=90, take_profit=110)
+        index.add(2, stop_loss=110, take_profit=90)
+        index.add(3, stop_loss=80, take_profit=120)
+
+        self.assertEqual(index.hits(100), set())
+        self.assertEqual(index.hits(89), {1, 2})
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.hits(121), {3})
+        self.assertEqual(index.hits(50), set())
+
+
+class EvaluationEngineTests(TestCase):
+    """Test open orders are closed by price batches."""
+
+    def setUp(self):
+        self.user = create_user(email='user@example.com', password='test123')
+        self.engine = EvaluationEngine(refresh_interval=3600)
+        self.now = datetime(2023, 1, 24, 18, 0, tzinfo=pytz.UTC)
+
+    def test_crossed_orders_closed(self):
+        """Test crossed orders close at the batch price."""
+        long_order = create_order(
+            self.user, symbol='BTC-USD', stop_loss=90, take_profit=110,
+        )
+        short_order = create_order(
+            self.user, symbol='BTC-USD', stop_loss=110, take_profit=90,
+        )
+        other = create_order(
+            self.user, symbol='ETH-USD', stop_loss=90, take_profit=110,
+        )
+
+        closed = self.engine.evaluate(
+            {'BTC-USD': 111.0, 'ETH-USD': 100.0}, now=self.now,
+        )
+
+        self.assertEqual(closed, 2)
+        for order in (long_order, short_order):
+            order.refresh_from_db()
+            self.assertEqual(order.closing_price, 111.0)
+            self.assertEqual(order.close_date_time, self.now)
+        other.refresh_from_db()
+        self.assertIsNone(other.close_date_time)
+
+    def test_inactive_symbols_ignored(self):
+        """Test prices of deactivated symbols close nothing."""
+        order = create_order(
+            self.user, symbol='ETH-USD', stop_loss=90, take_profit=110,
+        )
+
+        with patch(
+            'order.evaluation.registry.is_active',
+            side_effect=lambda symbol: symbol != 'ETH-USD',
+        ):
+            closed = self.engine.evaluate({'ETH-USD': 85.0}, now=self.now)
+
+        self.assertEqual(closed, 0)
+        order.refresh_from_db()
+        self.assertIsNone(order.close_date_time)
+
+    def test_new_orders_indexed_incrementally(self):
+        """Test orders created after the first batch are evaluated."""
+        self.engine.evaluate({'BTC-USD': 100.0})
+        order = create_order(
+            self.user, symbol='BTC-USD', stop_loss=90, take_profit=110,
+        )
+
+        closed = self.engine.evaluate({'BTC-USD': 85.0}, now=self.now)
+
+        self.assertEqual(closed, 1)
+        order.refresh_from_db()
+        self.assertEqual(order.closing_price, 85.0)
+
+    def test_stale_index_does_not_close_edited_order(self):
+        """Test levels are re-checked in SQL before closing."""
+        order = create_order(
+            self.user, symbol='BTC-USD', stop_loss=90, take_profit=110,
+        )
+        self.engine.evaluate({'BTC-USD': 100.0})
+        Order.objects.filter(id=order.id).update(take_profit=150)
+
+        closed = self.engine.evaluate({'BTC-USD': 120.0})
+
+        self.assertEqual(closed, 0)
+        order.refresh_from_db()
+        self.assertIsNone(order.close_date_time)
+
+    def test_edited_order_reindexed(self):
+        """Test an order left open by the SQL re-check is evaluated again."""
+        order = create_order(
+            self.user, symbol='BTC-USD', stop_loss=90, take_profit=110,
+        )
+        self.engine.evaluate({'BTC-USD': 100.0})
+        Order.objects.filter(id=order.id).update(take_profit=150)
+        self.engine.evaluate({'BTC-USD': 120.0})
+
+        closed = self.engine.evaluate({'BTC-USD': 151.0}, now=self.now)
+
+        self.assertEqual(closed, 1)
+        order.refresh_from_db()
+        self.assertEqual(order.closing_price, 151.0)
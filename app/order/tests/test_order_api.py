@@ -2,6 +2,7 @@
 Tests for the Order APIs
 """
 from datetime import datetime
+from decimal import Decimal
 
 from django.contrib.auth import get_user_model
 from django.test import TestCase
@@ -11,7 +12,8 @@ import pytz
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Order
+from core.models import Order, Symbol
+from core.symbols import registry
 
 from order.serializers import (
     OrderSerializer,
@@ -80,7 +82,7 @@ class PrivateOrderApiTests(TestCase):
         orders = Order.objects.all().order_by('-id')
         serializer = OrderSerializer(orders, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_order_list_limited_to_user(self):
         """Test list of orders is limited to authenticated user."""
@@ -97,7 +99,52 @@ class PrivateOrderApiTests(TestCase):
         orders = Order.objects.filter(user=self.user)
         serializer = OrderSerializer(orders, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertCountEqual(res.data, serializer.data)
+        self.assertCountEqual(res.data['results'], serializer.data)
+
+    def test_order_list_cursor_pagination(self):
+        """Test the order list is paginated by id with a cursor."""
+        orders = [create_order(user=self.user) for _ in range(5)]
+
+        res = self.client.get(ORDERS_URL, {'page_size': 3})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [o['id'] for o in res.data['results']]
+        self.assertEqual(ids, [o.id for o in orders[::-1][:3]])
+        self.assertIsNone(res.data['previous'])
+
+        res = self.client.get(res.data['next'])
+
+        ids = [o['id'] for o in res.data['results']]
+        self.assertEqual(ids, [orders[1].id, orders[0].id])
+        self.assertIsNone(res.data['next'])
+
+    def test_order_list_sparse_fields(self):
+        """Test ?fields= limits the returned fields."""
+        create_order(user=self.user)
+
+        res = self.client.get(ORDERS_URL, {'fields': 'id,symbol'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data['results'][0]), {'id', 'symbol'})
+
+    def test_sparse_fields_ignored_on_create(self):
+        """Test ?fields= does not drop fields from a create."""
+        payload = {
+            'symbol': 'BTC-USD',
+            'start_date_time': datetime(
+                2023, 1, 13, 14, 30, 12, tzinfo=pytz.UTC
+            ),
+            'initial_price': Decimal('100.00'),
+            'stop_loss': Decimal('90.00'),
+            'take_profit': Decimal('110.00'),
+            'leverage': 10,
+        }
+
+        res = self.client.post(f'{ORDERS_URL}?fields=id', payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        order = Order.objects.get(id=res.data['id'])
+        self.assertEqual(order.initial_price, Decimal('100.00'))
 
     def test_get_order_detail(self):
         """Test get order detail."""
@@ -111,13 +158,13 @@ class PrivateOrderApiTests(TestCase):
     def test_create_order(self):
         """Test creating an order."""
         payload = {
-            'symbol': 'BTC',
+            'symbol': 'BTC-USD',
             'start_date_time': datetime(
                 2023, 1, 13, 14, 30, 12, tzinfo=pytz.UTC
             ),
-            'initial_price': 133100.455,
-            'stop_loss': 131100.015,
-            'take_profit': 163000.355,
+            'initial_price': Decimal('133100.45'),
+            'stop_loss': Decimal('131100.01'),
+            'take_profit': Decimal('163000.35'),
             'leverage': 10,
         }
         res = self.client.post(ORDERS_URL, payload)
@@ -129,23 +176,63 @@ class PrivateOrderApiTests(TestCase):
             self.assertEqual(getattr(order, k), v)
         self.assertEqual(order.user, self.user)
 
+    def test_create_order_unknown_symbol(self):
+        """Test orders on unregistered or inactive symbols are rejected."""
+        Symbol.objects.filter(name='ETH-USD').update(is_active=False)
+        registry.clear()
+        self.addCleanup(registry.clear)
+        payload = {
+            'start_date_time': datetime(
+                2023, 1, 13, 14, 30, 12, tzinfo=pytz.UTC
+            ),
+            'initial_price': 100,
+            'stop_loss': 90,
+            'take_profit': 110,
+            'leverage': 10,
+        }
+
+        for symbol in ('DOGE-USD', 'ETH-USD'):
+            res = self.client.post(ORDERS_URL, dict(payload, symbol=symbol))
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('symbol', res.data)
+        self.assertFalse(Order.objects.exists())
+
+    def test_create_order_off_tick(self):
+        """Test price levels must be whole ticks of the symbol."""
+        payload = {
+            'symbol': 'BTC-USD',
+            'start_date_time': datetime(
+                2023, 1, 13, 14, 30, 12, tzinfo=pytz.UTC
+            ),
+            'initial_price': '100.005',
+            'stop_loss': '90.00',
+            'take_profit': '110.1',
+            'leverage': 10,
+        }
+
+        res = self.client.post(ORDERS_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(res.data), ['initial_price'])
+
     def test_partial_update(self):
         """Test partial update on an order."""
-        original_amount = 100.0
-        original_stop_loss = 131100.015
+        original_amount = Decimal('100.0')
+        original_stop_loss = Decimal('131100.015')
         order = create_order(
             user=self.user,
             start_date_time=datetime(
                 2023, 1, 13, 14, 30, 12, tzinfo=pytz.UTC
             ),
             amount=original_amount,
-            initial_price=133100.455,
+            initial_price=Decimal('133100.455'),
             stop_loss=original_stop_loss,
-            take_profit=163000.355,
+            take_profit=Decimal('163000.355'),
             leverage=10,
         )
 
-        payload = {'amount': 1000.0}
+        payload = {'amount': Decimal('1000.0')}
         url = detail_url(order.id)
         res = self.client.patch(url, payload)
 
@@ -163,22 +250,22 @@ class PrivateOrderApiTests(TestCase):
             start_date_time=datetime(
                 2023, 1, 13, 14, 30, 12, tzinfo=pytz.UTC
             ),
-            amount=100.0,
-            initial_price=133100.455,
-            take_profit=163000.355,
-            stop_loss=131100.015,
+            amount=Decimal('100.0'),
+            initial_price=Decimal('133100.455'),
+            take_profit=Decimal('163000.355'),
+            stop_loss=Decimal('131100.015'),
             leverage=10,
         )
 
         payload = {
-            'symbol': 'BTC',
+            'symbol': 'BTC-USD',
             'start_date_time': datetime(
                 2023, 1, 23, 11, 22, 13, tzinfo=pytz.UTC
             ),
-            'amount': 250.0,
-            'initial_price': 101222.202,
-            'take_profit': 102222.202,
-            'stop_loss': 100000.100,
+            'amount': Decimal('250.0'),
+            'initial_price': Decimal('101222.20'),
+            'take_profit': Decimal('102222.20'),
+            'stop_loss': Decimal('100000.10'),
             'leverage': 15,
         }
         url = detail_url(order.id)
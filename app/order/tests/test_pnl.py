@@ -0,0 +1,117 @@
+"""
+Tests for the portfolio PnL summary.
+"""
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+import pytz
+import redis
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ticker
+from order.pnl import compute_pnl
+from order.tests.test_order_api import create_order, create_user
+
+
+SUMMARY_URL = reverse('order:order-summary')
+
+
+class ComputePnlTests(SimpleTestCase):
+    """Test the vectorized PnL computation."""
+
+    def test_realized_and_unrealized(self):
+        """Test long, short, closed and open orders are combined."""
+        rows = [
+            ('BTC-USD', 100.0, 10, 100.0, 110.0, 90.0, 120.0),
+            ('BTC-USD', 100.0, 5, 100.0, None, 120.0, 80.0),
+            ('ETH-USD', None, 2, 50.0, None, 40.0, 60.0),
+            ('AVAX-USD', 10.0, 1, 20.0, None, 10.0, 30.0),
+        ]
+
+        summary = compute_pnl(rows, {'BTC-USD': 90.0, 'ETH-USD': 55.0})
+
+        self.assertEqual(summary['orders'], 4)
+        self.assertEqual(summary['open_orders'], 3)
+        self.assertAlmostEqual(summary['realized_pnl'], 100.0)
+        self.assertAlmostEqual(summary['unrealized_pnl'], 50.0)
+        self.assertAlmostEqual(summary['exposure'], 510.0)
+        self.assertAlmostEqual(summary['margin'], 110.0)
+        btc = summary['symbols']['BTC-USD']
+        self.assertEqual(btc['orders'], 2)
+        self.assertAlmostEqual(btc['unrealized_pnl'], 50.0)
+        self.assertIsNone(summary['symbols']['AVAX-USD']['price'])
+
+    def test_totals_are_exact(self):
+        """Test totals are summed in fixed point, not floating point."""
+        rows = [
+            ('BTC-USD', Decimal('0.1'), 3, Decimal('10'), Decimal('11'),
+             Decimal('9'), Decimal('12')),
+        ] * 10 + [
+            ('ETH-USD', Decimal('0.1'), 1, Decimal('10'), None,
+             Decimal('9'), Decimal('12')),
+        ] * 10
+
+        summary = compute_pnl(rows, {'ETH-USD': Decimal('10')})
+
+        self.assertEqual(summary['realized_pnl'], Decimal('0.3'))
+        self.assertEqual(summary['unrealized_pnl'], Decimal('0'))
+        self.assertEqual(summary['margin'], Decimal('1'))
+        self.assertEqual(summary['exposure'], Decimal('1'))
+        self.assertIsInstance(summary['margin'], Decimal)
+
+    def test_empty_portfolio(self):
+        """Test a user without orders gets a zero summary."""
+        summary = compute_pnl([], {})
+
+        self.assertEqual(summary['orders'], 0)
+        self.assertEqual(summary['realized_pnl'], 0.0)
+
+
+class SummaryApiTests(TestCase):
+    """Test the order summary endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='user@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+
+    @patch('order.pnl.get_prices')
+    def test_summary_limited_to_user(self, patched_prices):
+        """Test only the user's orders are summarized."""
+        patched_prices.return_value = {'BTC-USD': {'price': 110.0}}
+        other = create_user(email='other@example.com', password='test123')
+        create_order(
+            self.user, symbol='BTC-USD', amount=10.0, leverage=2,
+            initial_price=100.0, stop_loss=90.0, take_profit=120.0,
+        )
+        create_order(other, symbol='BTC-USD')
+
+        res = self.client.get(SUMMARY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['orders'], 1)
+        self.assertAlmostEqual(res.data['unrealized_pnl'], 2.0)
+        patched_prices.assert_called_once_with(['BTC-USD'])
+
+    @patch('order.pnl.get_prices', side_effect=redis.ConnectionError)
+    def test_summary_falls_back_to_tickers(self, patched_prices):
+        """Test stored tickers price open orders when Redis is down."""
+        Ticker.objects.create(
+            symbol='BTC-USD',
+            price=90.0,
+            time=datetime(2023, 1, 24, tzinfo=pytz.UTC),
+        )
+        create_order(
+            self.user, symbol='BTC-USD', amount=10.0, leverage=1,
+            initial_price=100.0, stop_loss=80.0, take_profit=120.0,
+        )
+
+        res = self.client.get(SUMMARY_URL)
+
+        self.assertAlmostEqual(res.data['unrealized_pnl'], -1.0)
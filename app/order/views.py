@@ -1,24 +1,38 @@
 """
 Views for the Order APIs.
 """
-from rest_framework import viewsets
-from rest_framework.authentication import TokenAuthentication
+from django.db import transaction
+
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
 from core.models import Order
 from order import serializers
+from order.pagination import OrderCursorPagination
+from order.pnl import portfolio_summary
+from user.authentication import CachedTokenAuthentication
 
 
 class OrderViewset(viewsets.ModelViewSet):
     """View for manage Order APIs."""
     serializer_class = serializers.OrderDetailSerializer
     queryset = Order.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = OrderCursorPagination
 
     def get_queryset(self):
         """Retrieve Orders for authenticated user"""
-        return self.queryset.filter(user=self.request.user).order_by('-id')
+        queryset = self.queryset.filter(
+            user=self.request.user
+        ).order_by('-id')
+        if self.action == 'list':
+            fields = self.get_serializer().fields
+            return queryset.values('id', *fields)
+
+        return queryset
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
@@ -30,3 +44,38 @@ class OrderViewset(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """Create a new order."""
         serializer.save(user=self.request.user)
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """Return realized/unrealized PnL, exposure and margin."""
+        return Response(portfolio_summary(self.get_queryset()))
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """Create a list of orders in one transaction."""
+        serializer = serializers.OrderBulkCreateSerializer(
+            child=serializers.OrderDetailSerializer(),
+            data=request.data,
+            context=self.get_serializer_context(),
+        )
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save(user=request.user)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], url_path='bulk/close')
+    def bulk_close(self, request):
+        """Close a list of open orders in one transaction."""
+        serializer = serializers.OrderBulkCloseSerializer(
+            child=serializers.OrderCloseSerializer(),
+            data=request.data,
+            context=self.get_serializer_context(),
+        )
+        with transaction.atomic():
+            serializer.is_valid(raise_exception=True)
+            orders = serializer.save()
+
+        return Response(
+            serializers.OrderDetailSerializer(orders, many=True).data
+        )
@@ -0,0 +1,169 @@
+"""
+Token authentication with cached token to user lookups.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+
+import redis
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from core.cache import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_KEY_PREFIX = 'auth:token:'
+# User fields kept in the cache. The password hash and anything else
+# stay in the database and are loaded on access.
+CACHED_USER_FIELDS = ('id', 'email', 'name', 'is_active', 'is_staff',
+                      'is_superuser')
+
+
+class LRUCache:
+    """Thread-safe bounded mapping whose entries expire after ttl seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Return the live value of key, or None."""
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires <= time.monotonic():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store value, evicting the least recently used entries."""
+        with self.lock:
+            self.data[key] = (value, time.monotonic() + self.ttl)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove key if present."""
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self):
+        """Remove every entry."""
+        with self.lock:
+            self.data.clear()
+
+
+local_tokens = LRUCache(
+    settings.AUTH_TOKEN_LOCAL_SIZE,
+    settings.AUTH_TOKEN_LOCAL_TTL,
+)
+
+
+def _redis_key(key):
+    """Redis key of a token, hashed so raw tokens are never stored."""
+    return TOKEN_KEY_PREFIX + hashlib.sha256(key.encode()).hexdigest()
+
+
+def _dump_user(user):
+    return json.dumps({f: getattr(user, f) for f in CACHED_USER_FIELDS})
+
+
+def _load_user(payload):
+    """
+    Rebuild a user from its cached fields. The others are deferred, so
+    saving it only writes the cached fields.
+    """
+    fields = json.loads(payload)
+    model = get_user_model()
+    names = [
+        f.attname for f in model._meta.concrete_fields if f.attname in fields
+    ]
+    return model.from_db(
+        DEFAULT_DB_ALIAS, names, [fields[name] for name in names],
+    )
+
+
+def get_cached_user(key):
+    """Return the cached user of token key, or None on a miss."""
+    payload = local_tokens.get(key)
+    if payload is None:
+        try:
+            payload = get_redis().get(_redis_key(key))
+        except redis.RedisError as exc:
+            logger.error(f"token cache read failed: {exc}")
+            return None
+        if payload is None:
+            return None
+        local_tokens.set(key, payload)
+
+    return _load_user(payload)
+
+
+def cache_user(key, user):
+    """Cache the user of token key locally and in Redis."""
+    payload = _dump_user(user)
+    local_tokens.set(key, payload)
+    try:
+        get_redis().set(
+            _redis_key(key), payload, ex=settings.AUTH_TOKEN_CACHE_TTL,
+        )
+    except redis.RedisError as exc:
+        logger.error(f"token cache write failed: {exc}")
+
+
+def invalidate_tokens(keys):
+    """Drop the cached users of token keys."""
+    keys = list(keys)
+    if not keys:
+        return
+
+    for key in keys:
+        local_tokens.delete(key)
+    try:
+        get_redis().delete(*[_redis_key(key) for key in keys])
+    except redis.RedisError as exc:
+        logger.error(f"token cache invalidation failed: {exc}")
+
+
+def invalidate_user(user_id):
+    """Drop the cached copies of a user under each of its tokens."""
+    invalidate_tokens(
+        Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+    )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication answering token lookups from the cache, so hot
+    requests authenticate without the Token and User join query.
+
+    Cached users are dropped when their token is deleted (logout) or the
+    user is saved (password change, deactivation), see user.signals.
+    Users cached as inactive are checked against the database again.
+    """
+
+    def authenticate_credentials(self, key):
+        user = get_cached_user(key)
+        if user is None or not user.is_active:
+            user, token = super().authenticate_credentials(key)
+            cache_user(key, user)
+            return user, token
+
+        return user, Token(key=key, user=user)
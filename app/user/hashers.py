@@ -0,0 +1,15 @@
+"""
+Password hashers with their cost tuned from settings.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """
+    Argon2id with the cost parameters of the ARGON2_* settings. Hashes
+    made with other parameters are rehashed on the next login.
+    """
+    time_cost = settings.ARGON2_TIME_COST
+    memory_cost = settings.ARGON2_MEMORY_COST
+    parallelism = settings.ARGON2_PARALLELISM
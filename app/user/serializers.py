@@ -25,7 +25,7 @@ class UserSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         """Update and return user."""
-        password = validated_data.pop('pasword', None)
+        password = validated_data.pop('password', None)
         user = super().update(instance, validated_data)
 
         if password:
@@ -0,0 +1,23 @@
+"""
+Keep the token cache in step with users and their tokens.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from user.authentication import invalidate_tokens, invalidate_user
+
+
+@receiver(post_delete, sender=Token)
+def revoke_deleted_token(sender, instance, **kwargs):
+    """Stop serving a deleted token, e.g. after logout."""
+    invalidate_tokens([instance.key])
+
+
+@receiver(post_save, sender=get_user_model())
+def drop_changed_user(sender, instance, created, **kwargs):
+    """Drop cached copies of a saved user, e.g. new password or inactive."""
+    if not created:
+        invalidate_user(instance.pk)
@@ -0,0 +1,173 @@
+"""
+Tests for the cached token authentication.
+"""
+import json
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+import redis
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import User
+from core.tests.fakes import FakeRedis
+
+from user import authentication
+from user.tests.test_user_api import ME_URL, create_user
+
+
+LOGOUT_URL = reverse('user:logout')
+
+
+class LRUCacheTests(SimpleTestCase):
+    """Test the bounded local cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest untouched entry is evicted when full."""
+        cache = authentication.LRUCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    @patch('user.authentication.time.monotonic')
+    def test_entries_expire(self, patched_monotonic):
+        """Test entries are dropped once their ttl has passed."""
+        patched_monotonic.return_value = 100.0
+        cache = authentication.LRUCache(maxsize=2, ttl=5)
+        cache.set('a', 1)
+
+        patched_monotonic.return_value = 105.0
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache.data), 0)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test token lookups are cached and invalidated."""
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = patch(
+            'user.authentication.get_redis', return_value=self.redis,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        authentication.local_tokens.clear()
+        self.addCleanup(authentication.local_tokens.clear)
+
+        self.user = create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='test name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_cached_requests_skip_token_query(self):
+        """Test repeated requests authenticate without any query."""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_other_process_reads_redis(self):
+        """Test a process with a cold local cache is served from Redis."""
+        self.client.get(ME_URL)
+        authentication.local_tokens.clear()
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_logout_revokes_token(self):
+        """Test a logged out token is rejected at once."""
+        self.client.get(ME_URL)
+
+        res = self.client.post(LOGOUT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+        self.assertEqual(self.redis.store, {})
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_drops_cached_user(self):
+        """Test a password change is not hidden by a stale cached user."""
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {'password': 'newpassword123'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.redis.store, {})
+        self.assertIsNone(authentication.local_tokens.get(self.token.key))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('newpassword123'))
+
+    def test_deactivated_user_rejected(self):
+        """Test a deactivated user can no longer authenticate."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_hash_not_cached(self):
+        """Test only the listed user fields reach Redis, as JSON."""
+        self.client.get(ME_URL)
+
+        payload, = (v.decode() for v in self.redis.store.values())
+        self.assertEqual(
+            set(json.loads(payload)), set(authentication.CACHED_USER_FIELDS),
+        )
+        self.assertNotIn(self.user.password, payload)
+
+    def test_cached_user_update_keeps_password(self):
+        """Test saving a cached user does not blank its other fields."""
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {'name': 'new name'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'new name')
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    def test_cached_inactive_user_rechecked(self):
+        """Test a user cached as inactive is rejected by the database."""
+        self.client.get(ME_URL)
+        User.objects.filter(id=self.user.id).update(is_active=False)
+        authentication.local_tokens.clear()
+        key, payload = next(iter(self.redis.store.items()))
+        self.redis.store[key] = json.dumps(
+            dict(json.loads(payload), is_active=False),
+        )
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_redis_outage_falls_back_to_database(self):
+        """Test requests still authenticate when Redis is unreachable."""
+        with patch(
+            'user.authentication.get_redis',
+            side_effect=redis.ConnectionError,
+        ):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
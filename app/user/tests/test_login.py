@@ -0,0 +1,133 @@
+"""
+Tests for password hashing and login rate limiting.
+"""
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+import redis
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user.tests.test_user_api import TOKEN_URL, create_user
+
+
+PBKDF2 = 'django.contrib.auth.hashers.PBKDF2PasswordHasher'
+
+
+class PasswordHasherTests(TestCase):
+    """Test the configured password hashers."""
+
+    def test_new_passwords_use_argon2(self):
+        """Test passwords are hashed with the tuned Argon2id hasher."""
+        user = create_user(email='test@example.com', password='testpass123')
+
+        self.assertTrue(
+            user.password.startswith('argon2$argon2id$v=19$m=19456,t=2,p=1$')
+        )
+
+    @patch('user.throttling.get_redis', side_effect=redis.ConnectionError)
+    def test_login_rehashes_legacy_password(self, patched_redis):
+        """Test a PBKDF2 password is upgraded on a successful login."""
+        with override_settings(PASSWORD_HASHERS=[PBKDF2]):
+            user = create_user(
+                email='test@example.com',
+                password='testpass123',
+            )
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+
+        res = APIClient().post(TOKEN_URL, {
+            'email': 'test@example.com',
+            'password': 'testpass123',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('argon2$'))
+        self.assertTrue(user.check_password('testpass123'))
+
+
+@patch('user.throttling.get_redis')
+class LoginThrottleTests(TestCase):
+    """Test login attempts are rate limited per IP and per email."""
+
+    payload = {'email': ' Test@Example.com', 'password': 'wrong'}
+
+    def test_buckets_per_ip_and_email(self, patched_redis):
+        """Test each attempt takes a token from its IP and email buckets."""
+        script = patched_redis.return_value.register_script.return_value
+        script.return_value = [1, b'0']
+
+        APIClient().post(TOKEN_URL, self.payload, REMOTE_ADDR='10.0.0.1')
+        APIClient().post(
+            TOKEN_URL,
+            dict(self.payload, email='test@example.com'),
+            REMOTE_ADDR='10.0.0.2',
+        )
+
+        buckets = [call.kwargs['keys'][0] for call in script.call_args_list]
+        self.assertEqual(buckets[0], 'ratelimit:login:ip:10.0.0.1')
+        self.assertEqual(buckets[2], 'ratelimit:login:ip:10.0.0.2')
+        self.assertTrue(buckets[1].startswith('ratelimit:login:email:'))
+        self.assertEqual(buckets[1], buckets[3])
+
+    def test_forwarded_for_not_trusted(self, patched_redis):
+        """Test a spoofed X-Forwarded-For does not get a fresh bucket."""
+        script = patched_redis.return_value.register_script.return_value
+        script.return_value = [1, b'0']
+
+        APIClient().post(
+            TOKEN_URL,
+            self.payload,
+            REMOTE_ADDR='10.0.0.1',
+            HTTP_X_FORWARDED_FOR='203.0.113.7',
+        )
+
+        bucket = script.call_args_list[0].kwargs['keys'][0]
+        self.assertEqual(bucket, 'ratelimit:login:ip:10.0.0.1')
+
+    def test_non_string_email(self, patched_redis):
+        """Test a malformed email is rejected, not a server error."""
+        script = patched_redis.return_value.register_script.return_value
+        script.return_value = [1, b'0']
+
+        res = APIClient().post(
+            TOKEN_URL, {'email': ['a@b.c'], 'password': 'x'}, format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_script_registered_once(self, patched_redis):
+        """Test the bucket script is not re-registered per request."""
+        client = patched_redis.return_value
+        client.register_script.return_value.registered_client = client
+        client.register_script.return_value.return_value = [1, b'0']
+
+        APIClient().post(TOKEN_URL, self.payload)
+        APIClient().post(TOKEN_URL, self.payload)
+
+        client.register_script.assert_called_once()
+
+    def test_empty_bucket_rejected(self, patched_redis):
+        """Test an exhausted bucket answers 429 with Retry-After."""
+        script = patched_redis.return_value.register_script.return_value
+        script.side_effect = [[1, b'0'], [0, b'7.5']]
+
+        res = APIClient().post(TOKEN_URL, self.payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '8')
+
+    def test_redis_outage_lets_logins_through(self, patched_redis):
+        """Test logins still work when Redis is unreachable."""
+        patched_redis.side_effect = redis.ConnectionError
+        create_user(email='test@example.com', password='testpass123')
+
+        res = APIClient().post(TOKEN_URL, {
+            'email': 'test@example.com',
+            'password': 'testpass123',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('token', res.data)
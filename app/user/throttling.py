@@ -0,0 +1,123 @@
+"""
+Redis token bucket throttles for the login endpoint.
+"""
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+
+import redis
+
+from rest_framework.throttling import BaseThrottle
+
+from core.cache import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: bucket, ARGV: capacity, refill rate (tokens/s), now (s).
+# Returns {allowed, seconds until the next token as a string}.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+_token_bucket = None
+
+
+def token_bucket_script():
+    """Return the token bucket script, registered once per Redis client."""
+    global _token_bucket
+    client = get_redis()
+    if _token_bucket is None or _token_bucket.registered_client is not client:
+        _token_bucket = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    return _token_bucket
+
+
+def consume(bucket, capacity, rate):
+    """
+    Take one token from bucket, refilled at rate tokens per second up to
+    capacity. Return (allowed, seconds until a token is available).
+    """
+    allowed, wait = token_bucket_script()(
+        keys=[bucket], args=[capacity, rate, time.time()],
+    )
+    return bool(allowed), float(wait)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle requests sharing a key with a Redis token bucket sized by
+    the (capacity, tokens per second) setting named `rate_setting`.
+    Requests are let through if Redis is unreachable.
+    """
+    scope = None
+    rate_setting = None
+
+    def get_key(self, request):
+        """Return the bucket key of request, or None to not throttle it."""
+        raise NotImplementedError('.get_key() must be overridden')
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        key = self.get_key(request)
+        if key is None:
+            return True
+
+        capacity, rate = getattr(settings, self.rate_setting)
+        try:
+            allowed, self.retry_after = consume(
+                f'ratelimit:{self.scope}:{key}', capacity, rate,
+            )
+        except redis.RedisError as exc:
+            logger.error(f"rate limiter unavailable: {exc}")
+            return True
+
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    """
+    Throttle login attempts per client IP: REMOTE_ADDR, or the address
+    the last of NUM_PROXIES trusted proxies saw in X-Forwarded-For.
+    """
+    scope = 'login:ip'
+    rate_setting = 'LOGIN_RATE_LIMIT_IP'
+
+    def get_key(self, request):
+        return self.get_ident(request)
+
+
+class LoginEmailThrottle(TokenBucketThrottle):
+    """Throttle login attempts per target email, whatever their IP."""
+    scope = 'login:email'
+    rate_setting = 'LOGIN_RATE_LIMIT_EMAIL'
+
+    def get_key(self, request):
+        data = request.data if isinstance(request.data, dict) else {}
+        email = data.get('email')
+        if not isinstance(email, str) or not email:
+            return None
+
+        return hashlib.sha256(email.strip().lower().encode()).hexdigest()
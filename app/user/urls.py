@@ -11,5 +11,6 @@ app_name = 'user'
 urlpatterns = [
     path('create/', views.CreateUserView.as_view(), name='create'),
     path('token/', views.CreateTokenView.as_view(), name='token'),
-    path('me/', views.ManageUserView.as_view(), name='me')
+    path('me/', views.ManageUserView.as_view(), name='me'),
+    path('logout/', views.LogoutView.as_view(), name='logout'),
 ]
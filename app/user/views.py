@@ -1,10 +1,14 @@
 """
 Views for the User API.
 """
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions, status
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 
+from user.authentication import CachedTokenAuthentication
+from user.throttling import LoginEmailThrottle, LoginIPThrottle
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
@@ -20,14 +24,26 @@ class CreateTokenView(ObtainAuthToken):
     """Create a new Auth Token for User."""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         """Retrieve and return the authenticated User."""
         return self.request.user
+
+
+class LogoutView(APIView):
+    """Revoke the Auth Token of the authenticated user."""
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        """Delete the token the request was authenticated with."""
+        request.auth.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)